@@ -0,0 +1,277 @@
+"""Deterministic local stand-ins for Gemini and the Vertex AI RAG Engine."""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from tools.retrievers import RetrievedContext, Retriever
+from utils.tracing import span
+
+_ORDER_ID_PATTERN = re.compile(r'\b(?:WN|WG|HD)\d+\b')
+
+
+class Latency:
+    """Injected latency drawn from a seeded log-normal distribution."""
+
+    def __init__(
+        self, median_ms: float = 0.0, jitter: float = 0.0, seed: int = 0
+    ):
+        """Initializes the distribution.
+
+        Args:
+            median_ms (float): The median delay in milliseconds.
+            jitter (float): The log-normal sigma. 0 gives a constant delay.
+            seed (int): The seed of the random generator.
+        """
+        self.median_ms = median_ms
+        self.jitter = jitter
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Draws one delay.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            factor = self._random.lognormvariate(0.0, self.jitter)
+        return self.median_ms * factor / 1000
+
+    async def wait(self) -> None:
+        """Sleeps for one delay without blocking the event loop."""
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def block(self) -> None:
+        """Sleeps for one delay, blocking the calling thread."""
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One scripted customer conversation.
+
+    Attributes:
+        message (str): The customer's opening message.
+        intent (str): The intent the fake model classifies it as.
+        customer_motivation (str): The motivation the fake model passes to
+            the instruction tool.
+        order_id (str): The order the conversation is about.
+    """
+
+    message: str
+    intent: str
+    customer_motivation: str
+    order_id: str
+
+    @property
+    def follow_up(self) -> str:
+        """The customer's confirmation on the second turn."""
+        return f'Yes, please go ahead with order {self.order_id}.'
+
+
+class FakeLlm(BaseLlm):
+    """Scripted model that drives both agents through their tools.
+
+    The instruction agent calls `get_instructions_for_user_motivation` for
+    the scenario of the opening message. The order agent checks the order
+    on the first turn, unless its status was prefetched into the prompt,
+    and cancels or returns it once the customer confirms.
+    After any tool response the model answers with text.
+    """
+
+    model: str = 'fake-llm'
+    latency: Latency = Latency()
+    scenarios: dict[str, Scenario] = {}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Answers a request after the injected latency.
+
+        Args:
+            llm_request (LlmRequest): The request built by the agent.
+            stream (bool): Ignored; one response is always returned.
+
+        Yields:
+            LlmResponse: The scripted response.
+        """
+        with span('llm.generate', contents=len(llm_request.contents)):
+            await self.latency.wait()
+            yield LlmResponse(content=self._respond(llm_request))
+
+    def _respond(self, llm_request: LlmRequest) -> types.Content:
+        """Picks the scripted response for a request."""
+        last = llm_request.contents[-1] if llm_request.contents else None
+        if last and any(part.function_response for part in last.parts or []):
+            return _text('Thanks for waiting, this is all taken care of.')
+
+        texts = [
+            part.text
+            for content in llm_request.contents
+            if content.role == 'user' and not _is_other_agent(content)
+            for part in content.parts or []
+            if part.text
+        ]
+        tools = llm_request.tools_dict
+        if 'get_instructions_for_user_motivation' in tools:
+            scenario = self.scenarios.get(texts[0]) if texts else None
+            if scenario is None:
+                return _text('Could you tell me more about your issue?')
+            return _call(
+                'get_instructions_for_user_motivation',
+                intent=scenario.intent,
+                customer_motivation=scenario.customer_motivation,
+            )
+
+        order_ids = _ORDER_ID_PATTERN.findall(' '.join(texts))
+        if not order_ids:
+            return _text('Could you please provide your order number?')
+        order_id = order_ids[-1]
+        if not texts[-1].startswith('Yes'):
+            if '### Prefetched Order Status ###' in str(
+                llm_request.config.system_instruction
+            ):
+                return _text('I can see your order. Shall I go ahead?')
+            return _call('check_order_status', order_id=order_id)
+        if order_id.startswith('WN'):
+            return _call('cancel_order', order_id=order_id)
+        return _call(
+            'initiate_return',
+            order_id=order_id,
+            reason='no longer needed',
+            return_method='store',
+        )
+
+
+def _is_other_agent(content: types.Content) -> bool:
+    """Whether a user content relays another agent's events."""
+    parts = content.parts or []
+    return bool(parts) and (parts[0].text or '').startswith('For context:')
+
+
+def _text(text: str) -> types.Content:
+    """Builds a text response."""
+    return types.Content(role='model', parts=[types.Part(text=text)])
+
+
+def _call(name: str, **args: str) -> types.Content:
+    """Builds a function call response."""
+    return types.Content(
+        role='model',
+        parts=[
+            types.Part(function_call=types.FunctionCall(name=name, args=args))
+        ],
+    )
+
+
+class FakeRetriever:
+    """Wraps a local retriever with the latency of a remote RAG call."""
+
+    def __init__(self, retriever: Retriever, latency: Latency):
+        """Initializes the retriever.
+
+        Args:
+            retriever (Retriever): The retriever producing the contexts.
+            latency (Latency): The injected latency of each call.
+        """
+        self.retriever = retriever
+        self.latency = latency
+
+    def retrieve(self, query: str, top_k: int = 3) -> list[RetrievedContext]:
+        """Retrieves contexts after the injected latency.
+
+        Args:
+            query (str): The text to search for.
+            top_k (int): The maximum number of contexts to return.
+
+        Returns:
+            list[RetrievedContext]: The contexts, closest first.
+        """
+        self.latency.block()
+        return self.retriever.retrieve(query, top_k)
+
+
+class _FakeResponse:
+    """The `text` of a `GenerativeModel` response."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeSummaryModel:
+    """Stand-in for the summary `GenerativeModel` with injected latency."""
+
+    def __init__(self, latency: Latency, chunks: int = 4):
+        """Initializes the model.
+
+        Args:
+            latency (Latency): The injected latency of a full response.
+            chunks (int): The number of chunks of a streamed response.
+        """
+        self.latency = latency
+        self.chunks = chunks
+
+    @staticmethod
+    def _summary(prompt: str) -> str:
+        """Builds a deterministic step list for a prompt."""
+        return '\n'.join(
+            f'{step}. Resolve step {step} for a {len(prompt)} character '
+            'request and confirm it with the customer.'
+            for step in range(1, 6)
+        )
+
+    def generate_content(self, prompt: str) -> _FakeResponse:
+        """Summarizes a prompt, blocking for the injected latency.
+
+        Args:
+            prompt (str): The summary prompt.
+
+        Returns:
+            _FakeResponse: The summary.
+        """
+        self.latency.block()
+        return _FakeResponse(self._summary(prompt))
+
+    async def generate_content_async(
+        self, prompt: str, stream: bool = False
+    ) -> _FakeResponse | AsyncGenerator[_FakeResponse, None]:
+        """Summarizes a prompt without blocking the event loop.
+
+        Args:
+            prompt (str): The summary prompt.
+            stream (bool): Whether to return the summary in chunks, with
+                the latency spread across them.
+
+        Returns:
+            _FakeResponse | AsyncGenerator[_FakeResponse, None]: The
+            summary, or an iterator over its chunks.
+        """
+        text = self._summary(prompt)
+        if not stream:
+            await self.latency.wait()
+            return _FakeResponse(text)
+
+        async def chunks() -> AsyncGenerator[_FakeResponse, None]:
+            delay = self.latency.sample() / self.chunks
+            size = -(-len(text) // self.chunks)
+            for start in range(0, len(text), size):
+                await asyncio.sleep(delay)
+                yield _FakeResponse(text[start : start + size])
+
+        return chunks()
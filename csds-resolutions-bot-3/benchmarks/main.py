@@ -0,0 +1,276 @@
+"""Benchmark the resolutions pipeline end to end without network access.
+
+Drives `orchestrator.agent.root_agent` through the ADK runner with an
+in-memory session service. Gemini, the RAG Engine and the summary model are
+replaced by deterministic stand-ins with injected latency, and every stage
+is timed from the spans recorded by `utils.tracing`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+AGENT_ROOT = Path(__file__).resolve().parents[1] / 'resolutions_agent'
+APP_NAME = 'resolutions_benchmark'
+
+
+def configure_environment() -> None:
+    """Points the agents at the local stand-ins before they are imported."""
+    sys.path.insert(0, str(AGENT_ROOT))
+    os.environ.setdefault('GOOGLE_CLOUD_LLM_NAME', 'fake-llm')
+    os.environ.setdefault('RAG_RETRIEVER', 'local')
+    os.environ['TRACE_EXPORTER'] = 'memory'
+    os.environ['TRACE_SAMPLE_RATE'] = '1'
+
+    import vertexai
+
+    # The summary model is built on first use; no request is ever sent.
+    vertexai.init(project='benchmark', location='us-central1')
+
+
+def percentiles(samples_ms: list[float]) -> dict[str, float]:
+    """Summarizes latency samples.
+
+    Args:
+        samples_ms (list[float]): The latencies in milliseconds.
+
+    Returns:
+        dict[str, float]: The count, mean, p50, p95, p99 and max.
+    """
+    values = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(values),
+        'mean': float(values.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': float(values.max()),
+    }
+
+
+def build_scenarios(count: int, seed: int) -> list:
+    """Builds scripted conversations from the knowledge base.
+
+    Args:
+        count (int): The number of conversations.
+        seed (int): The seed of the scenario generator.
+
+    Returns:
+        list[Scenario]: The conversations.
+    """
+    from fakes import Scenario
+    from tools.knowledge_base import load_knowledge_base
+
+    rng = random.Random(seed)
+    entries = load_knowledge_base()
+    scenarios = []
+    for index in range(count):
+        entry = rng.choice(entries)
+        prefix = rng.choice(['WN', 'WG', 'HD'])
+        order_id = f'{prefix}{index:03d}{rng.randrange(10**6):06d}'
+        scenarios.append(
+            Scenario(
+                message=f'{entry["customer_motivation"]} '
+                f'My order number is {order_id}.',
+                intent=entry['intent'],
+                customer_motivation=entry['customer_motivation'],
+                order_id=order_id,
+            )
+        )
+    return scenarios
+
+
+async def run_conversation(runner, scenario, user_id: str) -> list[float]:
+    """Plays one scripted conversation.
+
+    Args:
+        runner (Runner): The runner of the pipeline.
+        scenario (Scenario): The conversation to play.
+        user_id (str): The customer of the session.
+
+    Returns:
+        list[float]: The latency of each turn in milliseconds.
+    """
+    from google.genai import types
+
+    session = await runner.session_service.create_session(
+        app_name=APP_NAME, user_id=user_id
+    )
+    turn_ms = []
+    for text in (scenario.message, scenario.follow_up):
+        start = time.perf_counter()
+        async for _ in runner.run_async(
+            user_id=user_id,
+            session_id=session.id,
+            new_message=types.Content(
+                role='user', parts=[types.Part(text=text)]
+            ),
+        ):
+            pass
+        turn_ms.append((time.perf_counter() - start) * 1000)
+    return turn_ms
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """Runs the benchmark.
+
+    Args:
+        args (argparse.Namespace): The parsed command line.
+
+    Returns:
+        dict: The latency report.
+    """
+    from fakes import (
+        FakeLlm,
+        FakeRetriever,
+        FakeSummaryModel,
+        Latency,
+    )
+    from google.adk.agents import LlmAgent
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from orchestrator.agent import root_agent
+    from tools import tools
+    from tools.retrievers import LocalVectorRetriever, set_retriever
+
+    from utils import tracing
+
+    scenarios = build_scenarios(args.conversations + 1, args.seed)
+    llm = FakeLlm(
+        latency=Latency(args.llm_ms, args.jitter, args.seed),
+        scenarios={scenario.message: scenario for scenario in scenarios},
+    )
+    for agent in root_agent.sub_agents:
+        if isinstance(agent, LlmAgent):
+            agent.model = llm
+    set_retriever(
+        FakeRetriever(
+            LocalVectorRetriever.from_knowledge_base(),
+            Latency(args.rag_ms, args.jitter, args.seed + 1),
+        )
+    )
+    tools.summary_model = FakeSummaryModel(
+        Latency(args.summary_ms, args.jitter, args.seed + 2)
+    )
+    runner = Runner(
+        agent=root_agent,
+        app_name=APP_NAME,
+        session_service=InMemorySessionService(),
+    )
+
+    # Warm up indexes and caches outside the measurement.
+    await run_conversation(runner, scenarios[0], 'warmup')
+    exporter = tracing.MemorySpanExporter()
+    tracing.set_exporter(exporter)
+
+    semaphore = asyncio.Semaphore(args.sessions)
+
+    async def bounded(index: int) -> list[float]:
+        async with semaphore:
+            return await run_conversation(
+                runner, scenarios[index], f'customer-{index}'
+            )
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(bounded(index) for index in range(1, len(scenarios)))
+    )
+    elapsed = time.perf_counter() - start
+
+    stages = defaultdict(list)
+    for finished in exporter.spans:
+        stages[finished.name].append(finished.duration_ms)
+
+    return {
+        'config': vars(args),
+        'elapsed_seconds': elapsed,
+        'throughput': {
+            'conversations_per_second': len(results) / elapsed,
+            'turns_per_second': sum(map(len, results)) / elapsed,
+        },
+        'conversation_ms': percentiles([sum(turns) for turns in results]),
+        'turn_ms': percentiles([ms for turns in results for ms in turns]),
+        'stages_ms': {
+            name: percentiles(samples)
+            for name, samples in sorted(stages.items())
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    """Prints the latency report as a table.
+
+    Args:
+        report (dict): The report built by `run_benchmark`.
+    """
+    rows = {
+        'conversation': report['conversation_ms'],
+        'turn': report['turn_ms'],
+        **report['stages_ms'],
+    }
+    width = max(len(name) for name in rows)
+    print(f'{"stage":<{width}} {"count":>7} {"p50":>9} {"p95":>9} {"p99":>9}')
+    for name, stats in rows.items():
+        print(
+            f'{name:<{width}} {stats["count"]:>7} {stats["p50"]:>9.1f} '
+            f'{stats["p95"]:>9.1f} {stats["p99"]:>9.1f}'
+        )
+    throughput = report['throughput']
+    print(
+        f'\n{report["config"]["conversations"]} conversations over '
+        f'{report["config"]["sessions"]} concurrent sessions in '
+        f'{report["elapsed_seconds"]:.2f}s: '
+        f'{throughput["conversations_per_second"]:.1f} conversations/s, '
+        f'{throughput["turns_per_second"]:.1f} turns/s'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--conversations', type=int, default=50)
+    parser.add_argument(
+        '--sessions',
+        type=int,
+        default=8,
+        help='Conversations run concurrently.',
+    )
+    parser.add_argument(
+        '--llm-ms', type=float, default=300, help='Median model latency.'
+    )
+    parser.add_argument(
+        '--rag-ms', type=float, default=150, help='Median RAG latency.'
+    )
+    parser.add_argument(
+        '--summary-ms',
+        type=float,
+        default=800,
+        help='Median summary model latency.',
+    )
+    parser.add_argument(
+        '--jitter',
+        type=float,
+        default=0.25,
+        help='Log-normal sigma of every injected latency.',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--output', type=Path, help='Also write the report as JSON.'
+    )
+    args = parser.parse_args()
+
+    configure_environment()
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, indent=2, default=str), encoding='utf-8'
+        )
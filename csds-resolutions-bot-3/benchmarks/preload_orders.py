@@ -0,0 +1,61 @@
+"""Fill the order store with synthetic orders for a load test.
+
+Orders are generated by `tools.orders.get_order_generator`, configured by
+the `SYNTHETIC_ORDER_*` variables, and written in batches to the store
+selected by `ORDER_STORE_*`, typically `ORDER_STORE_BACKEND=sqlite` with an
+`ORDER_STORE_MAX_ENTRIES` above the count. The same seed always yields the
+same orders, so runs against a preloaded store are reproducible.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+AGENT_ROOT = Path(__file__).resolve().parents[1] / 'resolutions_agent'
+
+
+def main() -> None:
+    """Runs the preload from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=100000)
+    parser.add_argument(
+        '--prefixes',
+        default='WN,WG,HD',
+        help='Comma-separated order ID prefixes, used in turn.',
+    )
+    parser.add_argument(
+        '--start', type=int, default=0, help='Number of the first order.'
+    )
+    parser.add_argument(
+        '--seed', type=int, help='Overrides SYNTHETIC_ORDER_SEED.'
+    )
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        os.environ['SYNTHETIC_ORDER_SEED'] = str(args.seed)
+    sys.path.insert(0, str(AGENT_ROOT))
+    from tools.order_store import get_order_store
+    from tools.orders import get_order_generator
+    from tools.synthetic_orders import preload_orders
+
+    start = time.perf_counter()
+    stored = preload_orders(
+        get_order_store(),
+        get_order_generator(),
+        args.count,
+        prefixes=args.prefixes.split(','),
+        batch_size=args.batch_size,
+        start=args.start,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f'Stored {stored} orders in {elapsed:.2f}s: '
+        f'{stored / elapsed:.0f} orders/s'
+    )
+
+
+if __name__ == '__main__':
+    main()
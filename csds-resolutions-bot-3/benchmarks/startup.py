@@ -0,0 +1,185 @@
+"""Profile the cold start of the resolutions pipeline.
+
+Imports `orchestrator.agent.root_agent` in a fresh interpreter with
+`-X importtime`, then reports where the import time goes, by package and for
+each of the agent's own modules, followed by the time of each warm-up step
+of `tools.startup.warm_up` with the offline retriever.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+AGENT_ROOT = Path(__file__).resolve().parents[1] / 'resolutions_agent'
+
+# Packages whose import time is reported per sub-package.
+_NAMESPACES = ('google', 'google.cloud')
+
+
+def agent_environment() -> dict[str, str]:
+    """Returns the environment the agent is imported with."""
+    env = dict(os.environ)
+    env.setdefault('GOOGLE_CLOUD_LLM_NAME', 'gemini-2.5-flash')
+    env.setdefault('RAG_RETRIEVER', 'local')
+    env['STARTUP_WARM_UP'] = 'none'
+    return env
+
+
+def profile_imports() -> tuple[float, list[dict]]:
+    """Imports the root agent in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        tuple[float, list[dict]]: The wall time of the interpreter in
+        seconds, and the self and cumulative microseconds and depth of each
+        imported module, in import order.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [
+            sys.executable,
+            '-X',
+            'importtime',
+            '-c',
+            'from orchestrator.agent import root_agent',
+        ],
+        cwd=AGENT_ROOT,
+        env=agent_environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:') :].split('|')
+        modules.append(
+            {
+                'module': name.strip(),
+                'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+            }
+        )
+    return wall, modules
+
+
+def package_of(module: str) -> str:
+    """Returns the package a module's import time is reported under."""
+    parts = module.split('.')
+    for depth in range(len(_NAMESPACES), 0, -1):
+        if '.'.join(parts[:depth]) == _NAMESPACES[depth - 1]:
+            return '.'.join(parts[: depth + 1])
+    return parts[0]
+
+
+def import_report(modules: list[dict], top: int) -> dict:
+    """Summarizes an import profile.
+
+    Args:
+        modules (list[dict]): The profile from `profile_imports`.
+        top (int): The number of packages to list.
+
+    Returns:
+        dict: The total import time, the self time of the heaviest
+        packages, and the times of the agent's own modules, in
+        milliseconds.
+    """
+    by_package = defaultdict(int)
+    for module in modules:
+        by_package[package_of(module['module'])] += module['self_us']
+    own_packages = {path.name for path in AGENT_ROOT.iterdir()}
+    own = [
+        {
+            'module': module['module'],
+            'self_ms': module['self_us'] / 1000,
+            'cumulative_ms': module['cumulative_us'] / 1000,
+        }
+        for module in modules
+        if module['module'].split('.')[0] in own_packages
+    ]
+    return {
+        'total_ms': sum(m['self_us'] for m in modules) / 1000,
+        'packages_ms': {
+            package: us / 1000
+            for package, us in sorted(
+                by_package.items(), key=lambda item: -item[1]
+            )[:top]
+        },
+        'agent_modules': sorted(own, key=lambda m: -m['cumulative_ms']),
+    }
+
+
+def profile_warm_up() -> dict[str, float]:
+    """Imports the root agent in this process and times each warm-up step.
+
+    Returns:
+        dict[str, float]: The milliseconds of each warm-up step.
+    """
+    os.environ.update(agent_environment())
+    sys.path.insert(0, str(AGENT_ROOT))
+    from orchestrator.agent import root_agent
+    from tools.startup import warm_up
+
+    return {
+        name: seconds * 1000 for name, seconds in warm_up(root_agent).items()
+    }
+
+
+def print_report(report: dict) -> None:
+    """Prints the startup report as tables."""
+    imports = report['imports']
+    print(
+        f'\nInterpreter with root_agent import: {report["wall_ms"]:.0f}ms, '
+        f'of which imports: {imports["total_ms"]:.0f}ms'
+    )
+    print(f'\n{"package (self time)":<45} {"ms":>9}')
+    for package, ms in imports['packages_ms'].items():
+        print(f'{package:<45} {ms:>9.1f}')
+    print(f'\n{"agent module":<45} {"self ms":>9} {"cum ms":>9}')
+    for module in imports['agent_modules']:
+        print(
+            f'{module["module"]:<45} {module["self_ms"]:>9.1f} '
+            f'{module["cumulative_ms"]:>9.1f}'
+        )
+    print(f'\n{"warm-up step":<45} {"ms":>9}')
+    for step, ms in report['warm_up_ms'].items():
+        print(f'{step:<45} {ms:>9.1f}')
+
+
+def main() -> None:
+    """Runs the profile from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--top', type=int, default=15, help='Packages to list.'
+    )
+    parser.add_argument(
+        '--no-warm-up',
+        action='store_true',
+        help='Only profile the imports.',
+    )
+    parser.add_argument(
+        '--output', type=Path, help='Also write the report as JSON.'
+    )
+    args = parser.parse_args()
+
+    wall, modules = profile_imports()
+    report = {
+        'wall_ms': wall * 1000,
+        'imports': import_report(modules, args.top),
+        'warm_up_ms': {} if args.no_warm_up else profile_warm_up(),
+    }
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
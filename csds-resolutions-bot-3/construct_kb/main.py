@@ -1,30 +1,103 @@
 """Create a RAG Corpus, Import Files, and Generate a response."""
 
-from utils.upload_to_gcs import upload_json_file_to_gcs
+import argparse
+
+from utils.kb_documents import build_kb_documents
+from utils.kb_sync import LocalBlobStore, LocalRagCorpus, sync_knowledge_base
+from utils.resolution_guides import build_resolution_guides
+from utils.upload_to_gcs import GcsBlobStore
 from utils.vertexai_rag_utils import (
+    VertexRagCorpus,
     _retrieve_response,
     create_rag_corpus,
     import_files_to_rag_corpus,
 )
 
 if __name__ == '__main__':
-    # upload a JSON file to GCS
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--build-only',
+        action='store_true',
+        help='Only build the local artifacts; skip the upload and import.',
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Publish only the entries changed since the last sync, one '
+        'file per entry, into the existing corpus.',
+    )
+    parser.add_argument(
+        '--local-root',
+        help='With --incremental, sync into local stand-ins for GCS and the '
+        'RAG corpus under this directory.',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='With --incremental, only print what would change.',
+    )
+    args = parser.parse_args()
+
     project_id = 'hd-contactctr-dev'
     bucket_name = 'csds-resolutions-bot-dev'
     source_file_path = 'construct_kb/data/llm_full_knowledge_base.json'
-    destination_blob_name = 'data/llm_full_knowledge_base.json'
 
-    upload_json_file_to_gcs(
-        project_id, bucket_name, source_file_path, destination_blob_name
+    # build the pre-summarized resolution guides served by the agent
+    guides_file_path = 'construct_kb/data/resolution_guides.json'
+    guides = build_resolution_guides(source_file_path, guides_file_path)
+    print(
+        f'Resolution guides written to {guides_file_path} '
+        f'(KB version {guides["kb_version"]}).'
     )
 
-    # create a RAG corpus
+    # build one retrieval document per intent
+    documents_file_path = 'construct_kb/data/kb_documents.json'
+    documents = build_kb_documents(source_file_path, documents_file_path)
+    print(
+        f'{len(documents["documents"])} KB documents written to '
+        f'{documents_file_path}.'
+    )
+    if args.build_only:
+        raise SystemExit(0)
+
     display_name = 'csds-resolutions-bot-dev'
     embedding_model = 'publishers/google/models/text-embedding-005'
+
+    if args.incremental:
+        if args.local_root:
+            blob_store = LocalBlobStore(f'{args.local_root}/gcs')
+            rag_client = LocalRagCorpus(f'{args.local_root}/rag')
+            manifest_path = f'{args.local_root}/kb_manifest.json'
+        else:
+            blob_store = GcsBlobStore(project_id, bucket_name)
+            rag_client = VertexRagCorpus(project_id, embedding_model)
+            manifest_path = 'construct_kb/data/kb_manifest.json'
+        plan = sync_knowledge_base(
+            source_file_path,
+            manifest_path,
+            blob_store,
+            rag_client,
+            display_name,
+            dry_run=args.dry_run,
+        )
+        print(f'Knowledge base sync: {plan.summary()}.')
+        raise SystemExit(1 if plan.failed else 0)
+
+    # upload one document per intent to GCS
+    blob_store = GcsBlobStore(project_id, bucket_name)
+    paths = [
+        blob_store.upload(
+            f'data/documents/{document["id"]}.txt',
+            document['text'].encode('utf-8'),
+            'text/plain',
+        )
+        for document in documents['documents'].values()
+    ]
+
+    # create a RAG corpus
     rag_corpus = create_rag_corpus(project_id, display_name, embedding_model)
     print(f'RAG Corpus created: {rag_corpus.name}')
     # import files to the RAG corpus
-    paths = [f'gs://{bucket_name}/{destination_blob_name}']
     import_files_to_rag_corpus(rag_corpus, paths)
     print(f'Files imported to RAG Corpus: {rag_corpus.name}')
 
@@ -0,0 +1,140 @@
+"""Functions to build one retrieval document per knowledge base intent."""
+
+import hashlib
+import json
+import re
+
+DOCUMENTS_FORMAT_VERSION = 1
+
+# Chunk size, in tokens, the documents are imported with. Every document
+# must fit in one chunk so retrieval never splits an intent.
+DOCUMENT_CHUNK_TOKENS = 1024
+
+# Rough characters per token of English text for Gemini tokenizers.
+_CHARS_PER_TOKEN = 4
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+# Categories of entries without an explicit `category`, by the first
+# pattern found at a word start in the intent.
+_CATEGORY_PATTERNS = tuple(
+    (category, re.compile(rf'\b(?:{pattern})'))
+    for category, pattern in (
+        ('cancellation', r'cancel'),
+        ('returns', r'return|refund|damaged|replacement|reshipment'),
+        ('pickup', r'pickup|bopis|in-store'),
+        ('delivery', r'deliver|shipping|tracking|address|fulfillment'),
+        (
+            'billing',
+            r'payment|price|discount|perks|promotional|gift card|credit|'
+            r'charge|fees?\b|tax|fraud',
+        ),
+        ('account', r'account|phone|contact information'),
+        ('orders', r'order'),
+    )
+)
+
+
+def entry_key(entry: dict) -> str:
+    """Returns the stable identifier of a knowledge base entry.
+
+    Args:
+        entry (dict): A knowledge base entry.
+
+    Returns:
+        str: The entry's intent as a slug, such as `account-security`.
+    """
+    return _NON_WORD.sub('-', entry['intent'].lower()).strip('-')
+
+
+def entry_category(entry: dict) -> str:
+    """Returns the category of a knowledge base entry.
+
+    Args:
+        entry (dict): A knowledge base entry.
+
+    Returns:
+        str: The entry's `category`, or one inferred from its intent.
+    """
+    if entry.get('category'):
+        return entry['category']
+    intent = entry['intent'].lower()
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(intent):
+            return category
+    return 'general'
+
+
+def render_kb_document(entry: dict) -> str:
+    """Renders a knowledge base entry as its canonical retrieval text.
+
+    The text starts with the intent and category, so any chunk of it can be
+    traced back to its entry, followed by the motivation, goals and one
+    line per guide step. It carries the same content as the entry's JSON
+    without the syntax.
+
+    Args:
+        entry (dict): A knowledge base entry.
+
+    Returns:
+        str: The document text.
+    """
+    lines = [
+        f'Intent: {entry["intent"]}',
+        f'Category: {entry_category(entry)}',
+        f'Customer Motivation: {entry["customer_motivation"]}',
+        'Resolution Goals:',
+    ]
+    lines.extend(f'- {goal}' for goal in entry['resolution_goals'])
+    lines.append('Resolution Guide:')
+    for number, step in enumerate(entry['resolution_guide'], start=1):
+        lines.append(f'{number}. {step["step"]}: {" ".join(step["details"])}')
+    return '\n'.join(lines)
+
+
+def build_kb_documents(
+    source_file_path: str,
+    destination_file_path: str,
+) -> dict:
+    """Writes the versioned per-intent documents artifact.
+
+    Each document records its intent, category and content version next to
+    the canonical text. The artifact records the knowledge base content
+    hash so the agent can ignore documents that are out of date.
+
+    Args:
+        source_file_path (str): The path to the knowledge base JSON file.
+        destination_file_path (str): The path of the artifact to write.
+
+    Returns:
+        dict: The artifact that was written.
+    """
+    with open(source_file_path, 'rb') as file:
+        raw = file.read()
+
+    documents = {}
+    for entry in json.loads(raw):
+        text = render_kb_document(entry)
+        if len(text) > DOCUMENT_CHUNK_TOKENS * _CHARS_PER_TOKEN:
+            print(
+                f'Warning: the "{entry["intent"]}" document may exceed one '
+                f'{DOCUMENT_CHUNK_TOKENS} token chunk.'
+            )
+        documents[entry['intent']] = {
+            'id': entry_key(entry),
+            'category': entry_category(entry),
+            'version': hashlib.sha256(text.encode('utf-8')).hexdigest()[:12],
+            'text': text,
+        }
+
+    artifact = {
+        'format_version': DOCUMENTS_FORMAT_VERSION,
+        'kb_version': hashlib.sha256(raw).hexdigest()[:16],
+        'documents': documents,
+    }
+
+    with open(destination_file_path, 'w', encoding='utf-8') as file:
+        json.dump(artifact, file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+    return artifact
@@ -0,0 +1,400 @@
+"""Incremental sync of the knowledge base to GCS and a RAG corpus.
+
+Each knowledge base entry is published as its own retrieval document whose
+name includes the document's content hash. A local manifest records what
+was last published, so a sync only uploads and imports added or changed
+entries and deletes the files of removed ones.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+from utils.kb_documents import entry_key, render_kb_document
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+def entry_hash(entry: dict) -> str:
+    """Returns the content hash of a knowledge base entry's document.
+
+    Hashing the rendered document rather than the entry means a change to
+    the document format republishes every entry.
+
+    Args:
+        entry (dict): A knowledge base entry.
+
+    Returns:
+        str: The hex SHA-256 of the entry's retrieval document.
+    """
+    document = render_kb_document(entry)
+    return hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+
+class BlobStore(Protocol):
+    """Object storage the entry documents are published to."""
+
+    def upload(self, name: str, data: bytes, content_type: str) -> str:
+        """Uploads an object.
+
+        Args:
+            name (str): The object name.
+            data (bytes): The content.
+            content_type (str): The MIME type of the content.
+
+        Returns:
+            str: The URI the RAG corpus imports the object from.
+        """
+        ...
+
+    def delete(self, name: str) -> None:
+        """Deletes an object, ignoring objects that do not exist.
+
+        Args:
+            name (str): The object name.
+        """
+        ...
+
+
+class RagCorpusClient(Protocol):
+    """A RAG corpus the entry documents are imported into."""
+
+    def ensure_corpus(
+        self, display_name: str, corpus_name: str | None = None
+    ) -> str:
+        """Returns an existing corpus, creating it if needed.
+
+        Args:
+            display_name (str): The display name of the corpus.
+            corpus_name (str | None): The resource name of a corpus created
+                by an earlier sync.
+
+        Returns:
+            str: The resource name of the corpus.
+        """
+        ...
+
+    def import_files(
+        self, corpus_name: str, uris: list[str]
+    ) -> dict[str, str]:
+        """Imports files into the corpus.
+
+        Args:
+            corpus_name (str): The resource name of the corpus.
+            uris (list[str]): The URIs of the files to import.
+
+        Returns:
+            dict[str, str]: The resource name of each imported file, keyed
+            by URI. Files that failed to import are missing.
+        """
+        ...
+
+    def delete_file(self, file_name: str) -> None:
+        """Deletes an imported file, ignoring files that do not exist.
+
+        Args:
+            file_name (str): The resource name of the file.
+        """
+        ...
+
+
+@dataclass
+class SyncPlan:
+    """The changes between the knowledge base and the last published state.
+
+    Attributes:
+        added (list[str]): Keys of entries that were never published.
+        changed (list[str]): Keys of entries whose content changed.
+        removed (list[str]): Keys of published entries no longer in the
+            knowledge base.
+        unchanged (list[str]): Keys of entries that are up to date.
+        failed (list[str]): Keys of added or changed entries whose import
+            failed. Their previous version stays published and the next
+            sync tries them again.
+    """
+
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether there is nothing to publish."""
+        return not (self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        """Returns a one line description of the plan."""
+        summary = (
+            f'{len(self.added)} added, {len(self.changed)} changed, '
+            f'{len(self.removed)} removed, {len(self.unchanged)} unchanged'
+        )
+        if self.failed:
+            summary += f', {len(self.failed)} failed'
+        return summary
+
+
+def load_manifest(path: str) -> dict:
+    """Reads the manifest of the last sync.
+
+    Args:
+        path (str): The manifest file.
+
+    Returns:
+        dict: The manifest, or an empty one if the file does not exist.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return {
+            'format_version': MANIFEST_FORMAT_VERSION,
+            'corpus_name': None,
+            'entries': {},
+        }
+    if manifest.get('format_version') != MANIFEST_FORMAT_VERSION:
+        raise ValueError(
+            f'Unsupported manifest format {manifest.get("format_version")} '
+            f'in {path}.'
+        )
+    return manifest
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    """Writes the manifest atomically.
+
+    Args:
+        path (str): The manifest file.
+        manifest (dict): The manifest.
+    """
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+        file.write('\n')
+    os.replace(temp_path, path)
+
+
+def plan_sync(entries: Iterable[dict], manifest: dict) -> SyncPlan:
+    """Compares the knowledge base with the manifest.
+
+    Args:
+        entries (Iterable[dict]): The knowledge base entries.
+        manifest (dict): The manifest of the last sync.
+
+    Returns:
+        SyncPlan: The entries to add, update and remove.
+    """
+    published = manifest['entries']
+    plan = SyncPlan()
+    seen = set()
+    for entry in entries:
+        key = entry_key(entry)
+        if key in seen:
+            raise ValueError(f'Duplicate knowledge base intent: {key}')
+        seen.add(key)
+        if key not in published:
+            plan.added.append(key)
+        elif published[key]['hash'] != entry_hash(entry):
+            plan.changed.append(key)
+        else:
+            plan.unchanged.append(key)
+    plan.removed = sorted(set(published) - seen)
+    return plan
+
+
+def sync_knowledge_base(
+    source_file_path: str,
+    manifest_path: str,
+    blob_store: BlobStore,
+    rag_client: RagCorpusClient,
+    display_name: str,
+    blob_prefix: str = 'data/documents',
+    dry_run: bool = False,
+) -> SyncPlan:
+    """Publishes the changes to the knowledge base since the last sync.
+
+    Changed documents are uploaded under a new, hash-suffixed name and
+    imported before their previous file is deleted, so retrieval never
+    misses an intent during a sync. An entry whose import fails keeps its
+    previous file and is listed in `SyncPlan.failed`. The manifest is saved
+    after every applied step, so an interrupted sync resumes where it
+    stopped.
+
+    Args:
+        source_file_path (str): The path to the knowledge base JSON file.
+        manifest_path (str): The manifest recording the last sync.
+        blob_store (BlobStore): Where entry documents are uploaded.
+        rag_client (RagCorpusClient): The corpus entry documents are
+            imported into.
+        display_name (str): The display name of the corpus.
+        blob_prefix (str): The object name prefix of entry documents.
+        dry_run (bool): Only compute the plan.
+
+    Returns:
+        SyncPlan: The changes that were published.
+    """
+    with open(source_file_path, encoding='utf-8') as file:
+        entry_list = json.load(file)
+    manifest = load_manifest(manifest_path)
+    # Planned before keying the entries, so duplicate intents are rejected.
+    plan = plan_sync(entry_list, manifest)
+    if dry_run:
+        return plan
+    entries = {entry_key(entry): entry for entry in entry_list}
+
+    corpus_name = rag_client.ensure_corpus(
+        display_name, manifest.get('corpus_name')
+    )
+    if corpus_name != manifest.get('corpus_name'):
+        # A new corpus holds none of the previously published files.
+        manifest = {**manifest, 'corpus_name': corpus_name, 'entries': {}}
+        plan = plan_sync(entries.values(), manifest)
+        save_manifest(manifest_path, manifest)
+    published = manifest['entries']
+
+    uploads = {}
+    for key in plan.added + plan.changed:
+        digest = entry_hash(entries[key])
+        blob_name = f'{blob_prefix}/{key}-{digest[:12]}.txt'
+        data = render_kb_document(entries[key])
+        uri = blob_store.upload(blob_name, data.encode('utf-8'), 'text/plain')
+        uploads[key] = (digest, blob_name, uri)
+
+    if uploads:
+        file_names = rag_client.import_files(
+            corpus_name, [uri for _, _, uri in uploads.values()]
+        )
+        for key, (digest, blob_name, uri) in uploads.items():
+            if uri not in file_names:
+                # Without recording the new hash, the next sync retries it.
+                print(f'Import of {key} failed; keeping its published file.')
+                plan.failed.append(key)
+                blob_store.delete(blob_name)
+                continue
+            previous = published.get(key)
+            published[key] = {
+                'hash': digest,
+                'blob': blob_name,
+                'uri': uri,
+                'rag_file': file_names[uri],
+            }
+            save_manifest(manifest_path, manifest)
+            if previous is not None:
+                _delete_published(blob_store, rag_client, previous)
+
+    for key in plan.removed:
+        _delete_published(blob_store, rag_client, published.pop(key))
+        save_manifest(manifest_path, manifest)
+
+    return plan
+
+
+def _delete_published(
+    blob_store: BlobStore, rag_client: RagCorpusClient, published: dict
+) -> None:
+    """Deletes the imported file and the object of a published entry."""
+    if published.get('rag_file'):
+        rag_client.delete_file(published['rag_file'])
+    blob_store.delete(published['blob'])
+
+
+class LocalBlobStore:
+    """Stand-in for a GCS bucket backed by a local directory."""
+
+    def __init__(self, root: str):
+        """Initializes the store.
+
+        Args:
+            root (str): The directory objects are written to.
+        """
+        self.root = Path(root)
+
+    def upload(self, name: str, data: bytes, content_type: str) -> str:
+        """Writes an object to the directory.
+
+        Args:
+            name (str): The object name.
+            data (bytes): The content.
+            content_type (str): Ignored.
+
+        Returns:
+            str: The `file://` URI of the object.
+        """
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path.resolve().as_uri()
+
+    def delete(self, name: str) -> None:
+        """Deletes an object from the directory.
+
+        Args:
+            name (str): The object name.
+        """
+        (self.root / name).unlink(missing_ok=True)
+
+
+class LocalRagCorpus:
+    """Stand-in for a Vertex AI RAG corpus backed by a local directory.
+
+    Imported files are copied into one directory per corpus, which makes
+    the result of a sync easy to inspect.
+    """
+
+    def __init__(self, root: str):
+        """Initializes the client.
+
+        Args:
+            root (str): The directory corpora are created in.
+        """
+        self.root = Path(root)
+
+    def ensure_corpus(
+        self, display_name: str, corpus_name: str | None = None
+    ) -> str:
+        """Returns the directory of a corpus, creating it if needed.
+
+        Args:
+            display_name (str): The display name of the corpus.
+            corpus_name (str | None): The name of an existing corpus.
+
+        Returns:
+            str: The name of the corpus.
+        """
+        corpus_name = corpus_name or f'corpora/{display_name}'
+        (self.root / corpus_name).mkdir(parents=True, exist_ok=True)
+        return corpus_name
+
+    def import_files(
+        self, corpus_name: str, uris: list[str]
+    ) -> dict[str, str]:
+        """Copies files into the corpus directory.
+
+        Args:
+            corpus_name (str): The name of the corpus.
+            uris (list[str]): The `file://` URIs of the files.
+
+        Returns:
+            dict[str, str]: The name of each imported file, keyed by URI.
+        """
+        names = {}
+        for uri in uris:
+            source = Path(uri.removeprefix('file://'))
+            names[uri] = f'{corpus_name}/{source.name}'
+            shutil.copyfile(source, self.root / names[uri])
+        return names
+
+    def delete_file(self, file_name: str) -> None:
+        """Deletes a file from its corpus directory.
+
+        Args:
+            file_name (str): The name of the file.
+        """
+        (self.root / file_name).unlink(missing_ok=True)
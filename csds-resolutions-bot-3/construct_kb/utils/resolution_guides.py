@@ -0,0 +1,61 @@
+"""Functions to build pre-summarized resolution guides from the KB."""
+
+import hashlib
+import json
+
+GUIDES_FORMAT_VERSION = 1
+
+
+def render_resolution_guide(entry: dict) -> str:
+    """Renders a knowledge base entry as a compact step list.
+
+    Args:
+        entry (dict): A knowledge base entry with `resolution_goals` and
+            `resolution_guide` fields.
+
+    Returns:
+        str: The goals followed by one numbered line per guide step.
+    """
+    lines = [f'Resolution goals for "{entry["intent"]}":']
+    lines.extend(f'- {goal}' for goal in entry['resolution_goals'])
+    lines.append('Steps:')
+    for number, step in enumerate(entry['resolution_guide'], start=1):
+        lines.append(f'{number}. {step["step"]}: {" ".join(step["details"])}')
+    return '\n'.join(lines)
+
+
+def build_resolution_guides(
+    source_file_path: str,
+    destination_file_path: str,
+) -> dict:
+    """Writes the versioned resolution guides artifact.
+
+    The artifact is built deterministically from the knowledge base, so
+    rebuilding an unchanged knowledge base produces an identical file. It
+    records the knowledge base content hash so the agent can ignore guides
+    that are out of date.
+
+    Args:
+        source_file_path (str): The path to the knowledge base JSON file.
+        destination_file_path (str): The path of the artifact to write.
+
+    Returns:
+        dict: The artifact that was written.
+    """
+    with open(source_file_path, 'rb') as file:
+        raw = file.read()
+
+    artifact = {
+        'format_version': GUIDES_FORMAT_VERSION,
+        'kb_version': hashlib.sha256(raw).hexdigest()[:16],
+        'guides': {
+            entry['intent']: render_resolution_guide(entry)
+            for entry in json.loads(raw)
+        },
+    }
+
+    with open(destination_file_path, 'w', encoding='utf-8') as file:
+        json.dump(artifact, file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+    return artifact
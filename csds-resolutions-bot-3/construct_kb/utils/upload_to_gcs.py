@@ -1,5 +1,6 @@
 """Functions to upload JSON files to Google Cloud Storage (GCS)."""
 
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
 
 
@@ -42,3 +43,46 @@ def upload_json_file_to_gcs(
         print(f"Error: The local file '{source_file_path}' was not found.")
     except Exception as e:
         print(f'An error occurred during file upload: {e}')
+
+
+class GcsBlobStore:
+    """Uploads and deletes objects in a GCS bucket."""
+
+    def __init__(self, project_id: str, bucket_name: str):
+        """Initializes the client.
+
+        Args:
+            project_id (str): The ID of your Google Cloud project.
+            bucket_name (str): The ID of your GCS bucket.
+        """
+        self.bucket_name = bucket_name
+        self.bucket = storage.Client(project=project_id).bucket(bucket_name)
+
+    def upload(self, name: str, data: bytes, content_type: str) -> str:
+        """Uploads an object.
+
+        Args:
+            name (str): The path/name of the object in GCS.
+            data (bytes): The content.
+            content_type (str): The MIME type of the content.
+
+        Returns:
+            str: The `gs://` URI of the object.
+        """
+        self.bucket.blob(name).upload_from_string(
+            data, content_type=content_type
+        )
+        print(f'Uploaded gs://{self.bucket_name}/{name}')
+        return f'gs://{self.bucket_name}/{name}'
+
+    def delete(self, name: str) -> None:
+        """Deletes an object, ignoring objects that do not exist.
+
+        Args:
+            name (str): The path/name of the object in GCS.
+        """
+        try:
+            self.bucket.blob(name).delete()
+            print(f'Deleted gs://{self.bucket_name}/{name}')
+        except NotFound:
+            pass
@@ -1,9 +1,25 @@
 """Utility functions for working with Vertex AI RAG."""
 
 import vertexai
+from google.api_core.exceptions import NotFound
+from utils.kb_documents import DOCUMENT_CHUNK_TOKENS
 from vertexai import rag
 
 
+def document_transformation_config() -> rag.TransformationConfig:
+    """Returns the chunking that keeps each KB document in one chunk.
+
+    Returns:
+        rag.TransformationConfig: Chunks of `DOCUMENT_CHUNK_TOKENS` tokens
+        without overlap.
+    """
+    return rag.TransformationConfig(
+        chunking_config=rag.ChunkingConfig(
+            chunk_size=DOCUMENT_CHUNK_TOKENS, chunk_overlap=0
+        )
+    )
+
+
 def create_rag_corpus(
     project_id: str,
     display_name: str,
@@ -46,11 +62,14 @@ def import_files_to_rag_corpus(rag_corpus: rag.RagCorpus, paths: list[str]):
        rag_corpus (rag.RagCorpus): The RAG corpus to import files into.
        paths (list[str]): List of GCS paths to the files to be imported.
     """
-    # Import Files to the RagCorpus
-    rag.import_files(
-        rag_corpus.name,  # type: ignore
-        paths,
-    )
+    # Import Files to the RagCorpus, in batches of the per-request limit
+    batch_size = VertexRagCorpus.IMPORT_BATCH_SIZE
+    for start in range(0, len(paths), batch_size):
+        rag.import_files(
+            rag_corpus.name,  # type: ignore
+            paths[start : start + batch_size],
+            transformation_config=document_transformation_config(),
+        )
 
 
 def _retrieve_response(rag_corpus: rag.RagCorpus):
@@ -79,3 +98,106 @@ def _retrieve_response(rag_corpus: rag.RagCorpus):
     print(response)
 
     return response
+
+
+class VertexRagCorpus:
+    """Manages the files of a Vertex AI RAG corpus."""
+
+    # The maximum number of GCS paths per import request.
+    IMPORT_BATCH_SIZE = 25
+
+    def __init__(
+        self,
+        project_id: str,
+        embedding_model: str = 'publishers/google/models/text-embedding-005',
+        location: str = 'us-central1',
+    ):
+        """Initializes Vertex AI.
+
+        Args:
+            project_id (str): The ID of your Google Cloud project.
+            embedding_model (str): The embedding model of a new corpus.
+            location (str): The location of the corpus.
+        """
+        self.project_id = project_id
+        self.embedding_model = embedding_model
+        self.location = location
+        vertexai.init(project=project_id, location=location)
+
+    def ensure_corpus(
+        self, display_name: str, corpus_name: str | None = None
+    ) -> str:
+        """Returns an existing corpus, creating it if needed.
+
+        Args:
+            display_name (str): The display name of the corpus.
+            corpus_name (str | None): The resource name of a corpus created
+                by an earlier sync.
+
+        Returns:
+            str: The resource name of the corpus.
+        """
+        if corpus_name:
+            try:
+                return rag.get_corpus(corpus_name).name
+            except NotFound:
+                print(f'RAG Corpus {corpus_name} no longer exists.')
+        for corpus in rag.list_corpora():
+            if corpus.display_name == display_name:
+                print(f'Reusing RAG Corpus: {corpus.name}')
+                return corpus.name
+        corpus = create_rag_corpus(
+            self.project_id, display_name, self.embedding_model, self.location
+        )
+        print(f'RAG Corpus created: {corpus.name}')
+        return corpus.name
+
+    def import_files(
+        self, corpus_name: str, uris: list[str]
+    ) -> dict[str, str]:
+        """Imports files into the corpus.
+
+        Args:
+            corpus_name (str): The resource name of the corpus.
+            uris (list[str]): The GCS URIs of the files to import.
+
+        Returns:
+            dict[str, str]: The resource name of each imported file, keyed
+            by URI. Files that failed to import are missing.
+        """
+        for start in range(0, len(uris), self.IMPORT_BATCH_SIZE):
+            batch = uris[start : start + self.IMPORT_BATCH_SIZE]
+            response = rag.import_files(
+                corpus_name,
+                batch,
+                transformation_config=document_transformation_config(),
+            )
+            print(
+                f'Imported {response.imported_rag_files_count} files into '
+                f'{corpus_name} ({response.failed_rag_files_count} failed).'
+            )
+            if response.failed_rag_files_count:
+                print(
+                    f'Warning: {response.failed_rag_files_count} of '
+                    f'{len(batch)} files failed to import; they are left '
+                    'out of the result.'
+                )
+        wanted = set(uris)
+        return {
+            uri: rag_file.name
+            for rag_file in rag.list_files(corpus_name)
+            for uri in rag_file.gcs_source.uris
+            if uri in wanted
+        }
+
+    def delete_file(self, file_name: str) -> None:
+        """Deletes an imported file, ignoring files that do not exist.
+
+        Args:
+            file_name (str): The resource name of the file.
+        """
+        try:
+            rag.delete_file(file_name)
+            print(f'Deleted RAG file: {file_name}')
+        except NotFound:
+            pass
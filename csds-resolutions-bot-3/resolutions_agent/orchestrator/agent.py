@@ -2,6 +2,7 @@
 
 from google.adk.agents import SequentialAgent
 from order_resolution.agent import order_resolver
+from tools.startup import start_warm_up
 
 from resolutions_agent.agent import resolutions_agent
 
@@ -14,3 +15,6 @@ code_pipeline_agent = SequentialAgent(
 
 # For ADK tools compatibility, the root agent must be named `root_agent`
 root_agent = code_pipeline_agent
+
+# Optionally build the lazily created clients before the first request.
+start_warm_up(root_agent)
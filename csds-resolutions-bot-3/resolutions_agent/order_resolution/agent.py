@@ -1,25 +1,42 @@
 """Order resolution agent for The Home Depot customer service."""
 
-import os
-
 from google.adk.agents import LlmAgent
-from tools.tools import cancel_order, check_order_status, initiate_return
-
-from utils import read_instructions_from_file
+from tools.async_tools import (
+    cancel_order,
+    check_order_status,
+    check_orders_status,
+    initiate_return,
+)
+from tools.instruction_store import stored_instructions
+from tools.prefetch import apply_order_prefetch, prefetched_orders
+from utils.models import CONVERSATION, tiered_llm
+from utils.prompts import instruction_provider
+from utils.tracing import end_agent_span
 
 from .callbacks import check_if_agent_should_run
 
 description = """A customer service agent for The Home Depot, focused on order
 cancellations and returns."""
 
+PROMPT = 'order_resolution/instructions.md'
 
 order_resolver = LlmAgent(
     name='customer_service_agent',
-    model=os.environ.get('GOOGLE_CLOUD_LLM_NAME', ''),
+    model=tiered_llm(CONVERSATION, cached_prompt=PROMPT),
     description=description,
-    instruction=read_instructions_from_file(
-        './order_resolution/instructions.md'
+    # The retrieved instructions are appended as historically proven steps.
+    # Order status prefetched for this turn is appended after them.
+    instruction=instruction_provider(
+        PROMPT,
+        steps=stored_instructions,
+        appendix=prefetched_orders,
     ),
-    tools=[check_order_status, cancel_order, initiate_return],
-    before_agent_callback=check_if_agent_should_run,
+    tools=[
+        check_order_status,
+        check_orders_status,
+        cancel_order,
+        initiate_return,
+    ],
+    before_agent_callback=[check_if_agent_should_run, apply_order_prefetch],
+    after_agent_callback=end_agent_span,
 )
@@ -2,35 +2,89 @@
 
 from google.adk.agents.callback_context import CallbackContext
 from google.genai import types
-from utils import read_instructions_from_file
+from tools.async_tools import lookup_instructions
+from tools.instruction_store import (
+    INSTRUCTIONS_KEY,
+    instructions_query,
+    resolve_instructions,
+    store_instructions,
+)
+from tools.streaming import get_instruction_stream
+from tools.tools import CLARIFICATION_RESPONSE
+from utils.tracing import annotate, end_agent_span, start_agent_span
 
 # ruff: noqa: E501
 
 
-def check_if_agent_should_run(
+def refresh_streamed_instructions(callback_context: CallbackContext) -> None:
+    """Copies instructions that are still streaming into session state."""
+    stream = get_instruction_stream(
+        callback_context.state.get('instructions_stream')
+    )
+    if stream is None:
+        return
+    current_instructions = resolve_instructions(callback_context.state) or ''
+    if len(stream.text) > len(current_instructions):
+        store_instructions(callback_context.state, stream.text)
+    if stream.done:
+        callback_context.state['instructions_stream'] = None
+
+
+async def recover_instructions(
+    callback_context: CallbackContext,
+) -> str | None:
+    """Looks up again instructions this process's store does not hold.
+
+    Session state keeps only a reference into a process-local store, so a
+    restarted worker, or another worker than the one that served the
+    retrieval, finds nothing behind it. The lookup is redone from the
+    intent and customer motivation recorded with the reference. If that is
+    impossible the reference is cleared, so that the order agent skips this
+    turn and the instructions are retrieved again on the next one.
+
+    Args:
+        callback_context (CallbackContext): The context of the agent run.
+
+    Returns:
+        str | None: The instructions, or None if they could not be
+        recovered.
+    """
+    instructions = None
+    query = instructions_query(callback_context.state)
+    if query is not None:
+        instructions = await lookup_instructions(*query, callback_context)
+        if instructions == CLARIFICATION_RESPONSE:
+            instructions = None
+    annotate(instructions_recovered=instructions is not None)
+    if instructions is None:
+        callback_context.state[INSTRUCTIONS_KEY] = None
+    else:
+        store_instructions(callback_context.state, instructions, *query)
+    return instructions
+
+
+async def check_if_agent_should_run(
     callback_context: CallbackContext,
 ) -> types.Content | None:
     """Checks 'instructions' in session state."""
     agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    current_state = callback_context.state.to_dict()
-
-    print(f'\n[Callback] Entering agent: {agent_name} (Inv: {invocation_id})')
-    print(f'[Callback] Current State: {current_state}')
-
-    # Check the condition in session state dictionary
-    if current_state.get('instructions', False) and not current_state.get('instructions_filled', False):
-        print(
-            f'[Callback] State condition not met: Proceeding with agent {agent_name}.'
-        )
-        instructions = current_state.get('instructions')
-        callback_context.agent_instruction_override = f"{read_instructions_from_file('./order_resolution/instructions.md')}\n\n### Historically Proven Steps ###\n{instructions}"
-        print(f'[Callback] Agent instructions overridden with: {instructions[:30]}...')
-        current_state['instructions_filled'] = True
-        print(f'[Callback] State instructions filled: {current_state["instructions_filled"]}')
+    start_agent_span(callback_context)
+    refresh_streamed_instructions(callback_context)
+    if (
+        callback_context.state.get(INSTRUCTIONS_KEY)
+        and resolve_instructions(callback_context.state) is None
+    ):
+        await recover_instructions(callback_context)
+
+    # The agent runs on every turn once instructions are in session state.
+    if callback_context.state.get(INSTRUCTIONS_KEY):
+        # The agent's instruction provider appends these as proven steps.
+        instructions = resolve_instructions(callback_context.state)
+        annotate(instructions_chars=len(instructions or ''))
         # Return None to allow the LlmAgent's normal execution
         return None
     else:
+        end_agent_span(callback_context, skipped=True)
         # Return Content to skip the agent's run
         return types.Content(
             parts=[
@@ -1,26 +1,36 @@
 """Agent to test out RAG engine to retrieve instructions from files."""
 
-import os
-
 from google.adk.agents import LlmAgent
-from tools.tools import get_instructions_for_user_motivation
-
-from utils import read_instructions_from_file
+from tools.async_tools import get_instructions_for_user_motivation
+from tools.prefetch import start_order_prefetch
+from utils.models import ROUTER, tiered_llm
+from utils.prompts import instruction_provider
+from utils.tracing import end_agent_span
 
-from .callbacks import add_instructions_callback, check_if_agent_should_run
+from .callbacks import (
+    add_instructions_callback,
+    check_if_agent_should_run,
+    route_intent_fast_path,
+)
 
 description = """Agent to retrieve instructions to handle user requests.
 Handles user intent classification and retrieves relevant step-by-step
 instructions to solve users problem based on the user's classified intent."""
 
+PROMPT = 'resolutions_agent/instructions.md'
+
 resolutions_agent = LlmAgent(
     name='retrieve_instructions_agent',
-    model=os.environ.get('GOOGLE_CLOUD_LLM_NAME', ''),
+    model=tiered_llm(ROUTER, cached_prompt=PROMPT),
     description=description,
-    instruction=read_instructions_from_file(
-        './resolutions_agent/instructions.md'
-    ),
+    instruction=instruction_provider(PROMPT),
     tools=[get_instructions_for_user_motivation],
-    before_agent_callback=check_if_agent_should_run,
+    # Order lookups start before anything else and overlap the retrieval.
+    before_agent_callback=[
+        start_order_prefetch,
+        check_if_agent_should_run,
+        route_intent_fast_path,
+    ],
     after_tool_callback=add_instructions_callback,
+    after_agent_callback=end_agent_span,
 )
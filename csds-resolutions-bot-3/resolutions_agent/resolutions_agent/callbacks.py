@@ -6,6 +6,15 @@ from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools.base_tool import BaseTool
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
+from tools.async_tools import lookup_instructions
+from tools.instruction_store import store_instructions
+from tools.intent_router import (
+    get_intent_classifier,
+    router_enabled,
+    router_threshold,
+)
+from tools.tools import CLARIFICATION_RESPONSE
+from utils.tracing import end_agent_span, span, start_agent_span
 
 # ruff: noqa: E501
 
@@ -17,26 +26,24 @@ def add_instructions_callback(
     tool_response: dict,
 ) -> None:
     """Callback to handle the response from the tool."""
-    tool_context.state['instructions'] = tool_response
-    if 'instructions_filled' not in tool_context.state:
-        # Initialize instructions_filled to False if not already set
-        # This ensures the state is ready for the agent's run
-        tool_context.state['instructions_filled'] = False
+    # Session state keeps a reference; the text lives in the store.
+    store_instructions(
+        tool_context.state,
+        tool_response,
+        args.get('intent'),
+        args.get('customer_motivation'),
+    )
 
 def check_if_agent_should_run(
     callback_context: CallbackContext,
 ) -> types.Content | None:
     """Checks 'instructions' in session state."""
     agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    current_state = callback_context.state.to_dict()
-
-    print(f'\n[Callback] Entering agent: {agent_name} (Inv: {invocation_id})')
-    print(f'[Callback] Current State: {current_state}')
+    start_agent_span(callback_context)
 
     # Check the condition in session state dictionary
-    if current_state.get('instructions', False):
-        print(f'[Callback] Instructions filled : Skipping agent {agent_name}.')
+    if callback_context.state.get('instructions', False):
+        end_agent_span(callback_context, skipped=True)
         # Return Content to skip the agent's run
         return types.Content(
             parts=[
@@ -47,8 +54,56 @@ def check_if_agent_should_run(
             role='model',  # Assign model role to the overriding response
         )
     else:
-        print(
-            f'[Callback] State condition not met: Proceeding with agent {agent_name}.'
-        )
         # Return None to allow the LlmAgent's normal execution
         return None
+
+
+async def route_intent_fast_path(
+    callback_context: CallbackContext,
+) -> types.Content | None:
+    """Resolves confidently classified intents without an LLM turn.
+
+    The customer's message is classified against the knowledge base intents.
+    Above `INTENT_ROUTER_THRESHOLD` the instructions are looked up directly
+    and stored in session state, and the agent's LLM turn is skipped.
+    Anything less certain returns None so the agent runs as usual.
+    """
+    if not router_enabled() or not callback_context.user_content:
+        return None
+
+    message = ' '.join(
+        part.text
+        for part in callback_context.user_content.parts or []
+        if part.text
+    )
+    with span('router.classify', message_chars=len(message)) as classify:
+        prediction = get_intent_classifier().predict(message)
+        if prediction is not None:
+            classify.set(
+                intent=prediction.intent, confidence=prediction.confidence
+            )
+    if prediction is None or prediction.confidence < router_threshold():
+        return None
+
+    instructions = await lookup_instructions(
+        prediction.intent, message, callback_context
+    )
+    if instructions == CLARIFICATION_RESPONSE:
+        return None
+
+    store_instructions(
+        callback_context.state, instructions, prediction.intent, message
+    )
+    callback_context.state['routed_intent'] = prediction.intent
+    end_agent_span(callback_context, routed=True)
+    return types.Content(
+        parts=[
+            types.Part(
+                text=f'I have retrieved the instructions for your '
+                f"{prediction.intent.lower()} request. I'll pass this "
+                'information along to an Associate who will help get this '
+                'resolved for you.'
+            )
+        ],
+        role='model',
+    )
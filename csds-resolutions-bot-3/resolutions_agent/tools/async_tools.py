@@ -0,0 +1,315 @@
+"""Async, non-blocking variants of the resolutions agent tools.
+
+The ADK runner executes every session on one event loop, so the blocking
+tools in `tools.tools` stall all concurrent conversations while they wait
+on the network. These variants offload blocking work to a bounded thread
+pool, use the native async Gemini client where one exists, and bound every
+remote call with a timeout. They share the name, parameters and docstring
+of the synchronous tools so the function declarations the model sees are
+unchanged.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.tool_context import ToolContext
+from utils.resilience import CircuitBreaker
+from utils.tracing import span
+
+from . import tools
+from .encoding import encode_response
+from .streaming import start_instruction_stream, streaming_enabled
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('TOOL_EXECUTOR_WORKERS', 16)),
+    thread_name_prefix='tools',
+)
+
+
+def _timeout(name: str, default: float) -> float:
+    """Reads a timeout in seconds from the environment."""
+    return float(os.environ.get(name, default))
+
+
+def _declared_as(sync_tool: Callable[..., Any]) -> Callable:
+    """Gives an async tool the name and docstring of its sync counterpart.
+
+    Unlike `functools.wraps`, the async tool keeps its own signature, so an
+    optional `tool_context` parameter is still injected by ADK.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        func.__name__ = sync_tool.__name__
+        func.__doc__ = sync_tool.__doc__
+        return func
+
+    return decorator
+
+
+async def run_blocking(
+    func: Callable[..., Any], *args: Any, timeout: float | None = None
+) -> Any:
+    """Runs a blocking callable on the bounded tool executor.
+
+    Args:
+        func (Callable[..., Any]): The blocking callable.
+        *args (Any): Positional arguments for `func`.
+        timeout (float | None): Seconds to wait before raising
+            `TimeoutError`. The worker thread itself cannot be interrupted,
+            but the caller is released and the result is discarded.
+
+    Returns:
+        Any: The return value of `func`.
+    """
+    loop = asyncio.get_running_loop()
+    # Like `asyncio.to_thread`, run in a copy of the caller's context so
+    # spans opened by `func` nest under the caller's span.
+    context = contextvars.copy_context()
+    return await asyncio.wait_for(
+        loop.run_in_executor(
+            _executor, functools.partial(context.run, func, *args)
+        ),
+        timeout,
+    )
+
+
+@_declared_as(tools.get_instructions_for_user_motivation)
+async def get_instructions_for_user_motivation(
+    intent: str,
+    customer_motivation: str,
+    tool_context: ToolContext | None = None,
+) -> str:
+    """Async variant of `tools.get_instructions_for_user_motivation`."""
+    return await lookup_instructions(intent, customer_motivation, tool_context)
+
+
+async def lookup_instructions(
+    intent: str,
+    customer_motivation: str,
+    context: CallbackContext | None = None,
+) -> str:
+    """Looks up resolution instructions without blocking the event loop.
+
+    With `INSTRUCTIONS_STREAMING` enabled and a context to record it in, the
+    summary is streamed: this returns as soon as a usable prefix of complete
+    lines exists, records the stream in `state['instructions_stream']`, and
+    the rest of the text keeps arriving in the background.
+
+    Args:
+        intent (str): A high level generic title for the user's intent.
+        customer_motivation (str): A brief description of the user's
+            motivation for contacting The Home Depot.
+        context (CallbackContext | None): The tool or callback context
+            whose session state records a streamed summary.
+
+    Returns:
+        str: The step-by-step instructions, or a request for clarification.
+    """
+    invocation_id = context.invocation_id if context else None
+    with span(
+        'tool.get_instructions_for_user_motivation',
+        invocation_id,
+        intent=intent,
+    ) as tool:
+        response = await _lookup_instructions(
+            intent, customer_motivation, context
+        )
+        tool.set(response_chars=len(response))
+    return response
+
+
+async def _lookup_instructions(
+    intent: str,
+    customer_motivation: str,
+    context: CallbackContext | None,
+) -> str:
+    """Runs the cache, retrieval and summary steps of an instruction lookup.
+
+    The steps are those of `tools._lookup_instructions`, with retrieval
+    offloaded to the tool executor and the summary awaited or streamed.
+    """
+    if not intent:
+        return tools.CLARIFICATION_RESPONSE
+    cached_response = tools.cached_instructions(intent, customer_motivation)
+    if cached_response is not None:
+        return cached_response
+
+    text = tools.build_intent_query(intent, customer_motivation)
+    try:
+        with span('rag.retrieve', query_chars=len(text)) as retrieval:
+            contexts = await run_blocking(
+                tools.retrieve_contexts,
+                text,
+                timeout=_timeout('RAG_TIMEOUT_SECONDS', 10),
+            )
+            retrieval.set(contexts=len(contexts))
+    except Exception as e:
+        return tools.retrieval_failed(e)
+
+    response = tools.guide_instructions(contexts)
+    if response is not None:
+        tools.cache_instructions(intent, customer_motivation, response)
+        return response
+
+    prompt = tools.build_summary_prompt(text, contexts)
+    try:
+        if (
+            streaming_enabled()
+            and context is not None
+            and tools.summary_call.breaker.state == CircuitBreaker.CLOSED
+        ):
+            # The full text is cached once the stream completes.
+            with span('llm.summarize', prompt_chars=len(prompt)) as llm:
+                response = await _stream_summary(
+                    prompt, intent, customer_motivation, context
+                )
+                llm.set(response_chars=len(response), streamed=True)
+            return response
+        with span('llm.summarize', prompt_chars=len(prompt)) as llm:
+            response = await tools.summary_call.call_async(
+                tools.summary_model.generate_content_async,
+                prompt,
+                timeout=_timeout('SUMMARY_TIMEOUT_SECONDS', 30),
+            )
+            response = response.text.strip()
+            llm.set(response_chars=len(response))
+    except Exception as e:
+        return tools.summary_failed(e, contexts)
+
+    tools.cache_instructions(intent, customer_motivation, response)
+    return response
+
+
+async def _stream_summary(
+    prompt: str,
+    intent: str,
+    customer_motivation: str,
+    context: CallbackContext,
+) -> str:
+    """Streams the summary and returns its first usable prefix."""
+
+    def on_complete(text: str) -> None:
+        tools.cache_instructions(intent, customer_motivation, text)
+
+    stream = start_instruction_stream(tools.summary_model, prompt, on_complete)
+    context.state['instructions_stream'] = stream.stream_id
+    response = await stream.wait_for_prefix(
+        min_chars=int(os.environ.get('INSTRUCTIONS_STREAMING_MIN_CHARS', 200)),
+        timeout=_timeout('SUMMARY_TIMEOUT_SECONDS', 30),
+    )
+    return response
+
+
+async def _run_order_tool(
+    tool_name: str,
+    payload: Callable[..., dict],
+    tool_context: ToolContext | None,
+    order_id: str | list[str],
+    *args: Any,
+    mutating: bool = False,
+) -> str:
+    """Builds an order tool response off the event loop and encodes it.
+
+    The response is encoded on the event loop, the only place session state
+    may be touched, with the order tool timeout applied to the lookup.
+
+    A timed-out worker thread keeps running, so a mutating tool may still
+    change the order after the timeout. Its timeout is therefore reported
+    as an unknown outcome, pointing the agent at the order status rather
+    than at a retry that would fail against the already changed order.
+    """
+    invocation_id = tool_context.invocation_id if tool_context else None
+    with span(f'tool.{tool_name}', invocation_id) as tool:
+        try:
+            response = await run_blocking(
+                payload,
+                order_id,
+                *args,
+                timeout=_timeout('TOOL_TIMEOUT_SECONDS', 10),
+            )
+        except TimeoutError:
+            print(f'TOOL TIMED OUT: {tool_name} for {order_id}')
+            tool.set(timeout=True)
+            if mutating:
+                response = {
+                    'success': False,
+                    'order_id': order_id,
+                    'status': 'TIMEOUT_OUTCOME_UNKNOWN',
+                    'message': 'The order service did not respond in time '
+                    'and the request may still complete. Check the order '
+                    'status before trying again.',
+                }
+            else:
+                response = {
+                    'success': False,
+                    'order_id': order_id,
+                    'status': 'TIMEOUT',
+                    'message': 'The order service did not respond in time. '
+                    'Please try again.',
+                }
+        return encode_response(tool_name, response, tool_context)
+
+
+@_declared_as(tools.check_order_status)
+async def check_order_status(
+    order_id: str, tool_context: ToolContext | None = None
+) -> str:
+    """Async variant of `tools.check_order_status`."""
+    return await _run_order_tool(
+        'check_order_status',
+        tools.check_order_status_payload,
+        tool_context,
+        order_id,
+    )
+
+
+@_declared_as(tools.check_orders_status)
+async def check_orders_status(
+    order_ids: list[str], tool_context: ToolContext | None = None
+) -> str:
+    """Async variant of `tools.check_orders_status`."""
+    return await _run_order_tool(
+        'check_orders_status',
+        tools.check_orders_status_payload,
+        tool_context,
+        order_ids,
+    )
+
+
+@_declared_as(tools.cancel_order)
+async def cancel_order(
+    order_id: str, tool_context: ToolContext | None = None
+) -> str:
+    """Async variant of `tools.cancel_order`."""
+    return await _run_order_tool(
+        'cancel_order',
+        tools.cancel_order_payload,
+        tool_context,
+        order_id,
+        mutating=True,
+    )
+
+
+@_declared_as(tools.initiate_return)
+async def initiate_return(
+    order_id: str,
+    reason: str,
+    return_method: str = 'ship',
+    tool_context: ToolContext | None = None,
+) -> str:
+    """Async variant of `tools.initiate_return`."""
+    return await _run_order_tool(
+        'initiate_return',
+        tools.initiate_return_payload,
+        tool_context,
+        order_id,
+        reason,
+        return_method,
+        mutating=True,
+    )
@@ -0,0 +1,364 @@
+"""Two-level cache for summarized resolution instructions."""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+from .embeddings import Embedder, HashingEmbedder
+from .knowledge_base import knowledge_base_version
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_query(intent: str, customer_motivation: str) -> str:
+    """Builds the exact-match cache key for an intent lookup.
+
+    Case, punctuation and whitespace differences are ignored so trivially
+    different phrasings of the same request share one key.
+
+    Args:
+        intent (str): A high level generic title for the user's intent.
+        customer_motivation (str): A brief description of the user's
+            motivation.
+
+    Returns:
+        str: The normalized key.
+    """
+    intent_key = _NON_WORD.sub(' ', intent.lower()).strip()
+    motivation_key = _NON_WORD.sub(' ', customer_motivation.lower()).strip()
+    return f'{intent_key}|{motivation_key}'
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    """A cached value with its bookkeeping."""
+
+    value: str
+    expires_at: float
+    size: int
+    slot: int = -1
+
+
+class _LruTier:
+    """An LRU map with per-entry TTL and a memory ceiling."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float],
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self.bytes_used = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> _CacheEntry | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self.clock():
+            self.pop(key)
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, value: str) -> _CacheEntry:
+        if key in self.entries:
+            self.pop(key)
+        entry = _CacheEntry(
+            value=value,
+            expires_at=self.clock() + self.ttl_seconds,
+            size=sys.getsizeof(key) + sys.getsizeof(value),
+        )
+        self.entries[key] = entry
+        self.bytes_used += entry.size
+        while len(self.entries) > self.max_entries or (
+            self.bytes_used > self.max_bytes and len(self.entries) > 1
+        ):
+            self.pop(next(iter(self.entries)))
+            self.evictions += 1
+        return entry
+
+    def pop(self, key: str) -> _CacheEntry | None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry.size
+        return entry
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.bytes_used = 0
+
+
+class _SemanticTier(_LruTier):
+    """An LRU tier whose keys can also be found by embedding distance.
+
+    Embeddings live in a preallocated matrix with one row per slot, so a
+    lookup is a single matrix-vector product over the live rows. Matches
+    are only considered within the same normalized intent.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float],
+        dimension: int,
+    ):
+        super().__init__(max_entries, max_bytes, ttl_seconds, clock)
+        self.matrix = np.zeros((max_entries, dimension), dtype=np.float32)
+        self.slot_keys: list[str | None] = [None] * max_entries
+        self.slot_intents = np.full(max_entries, -1, dtype=np.int64)
+        self.intent_ids: dict[str, int] = {}
+        self.free_slots = list(range(max_entries - 1, -1, -1))
+
+    def put_vector(
+        self, key: str, intent: str, value: str, vector: np.ndarray
+    ) -> None:
+        # Evict first so the new entry always has a free slot.
+        if key in self.entries:
+            self.pop(key)
+        while len(self.entries) >= self.max_entries:
+            self.pop(next(iter(self.entries)))
+            self.evictions += 1
+        slot = self.free_slots.pop()
+        self.matrix[slot] = vector
+        self.slot_keys[slot] = key
+        self.slot_intents[slot] = self.intent_ids.setdefault(
+            intent, len(self.intent_ids)
+        )
+        self.put(key, value).slot = slot
+
+    def search(
+        self, intent: str, vector: np.ndarray, max_distance: float
+    ) -> _CacheEntry | None:
+        intent_id = self.intent_ids.get(intent)
+        if intent_id is None:
+            return None
+        similarities = self.matrix @ vector
+        similarities[self.slot_intents != intent_id] = -np.inf
+        slot = int(np.argmax(similarities))
+        if 1.0 - similarities[slot] > max_distance:
+            return None
+        key = self.slot_keys[slot]
+        return self.get(key) if key is not None else None
+
+    def pop(self, key: str) -> _CacheEntry | None:
+        entry = super().pop(key)
+        if entry is not None and entry.slot >= 0:
+            self.slot_keys[entry.slot] = None
+            self.slot_intents[entry.slot] = -1
+            self.free_slots.append(entry.slot)
+        return entry
+
+    def clear(self) -> None:
+        for key in list(self.entries):
+            self.pop(key)
+        self.intent_ids.clear()
+
+
+class InstructionCache:
+    """Exact and semantic cache for summarized resolution instructions.
+
+    Lookups first try an exact match on the normalized
+    `(intent, customer_motivation)` key, then fall back to the closest
+    cached query with the same intent whose embedding is within
+    `semantic_distance`. Both tiers evict by LRU order, TTL and a memory
+    ceiling, and everything is dropped when the knowledge base version
+    changes.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder | None = None,
+        dimension: int = 1024,
+        max_entries: int = 1024,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        semantic_distance: float = 0.1,
+        version_provider: Callable[[], str] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes the cache.
+
+        Args:
+            embedder (Embedder | None): Embeds queries for the semantic
+                tier. Defaults to a `HashingEmbedder` of `dimension`.
+            dimension (int): The embedding dimension of `embedder`.
+            max_entries (int): The maximum number of entries per tier.
+            max_bytes (int): The approximate memory ceiling per tier.
+            ttl_seconds (float): How long an entry stays valid.
+            semantic_distance (float): The maximum cosine distance for a
+                semantic hit. A value of 0 or less disables the tier.
+            version_provider (Callable[[], str] | None): Returns the current
+                knowledge base version. Defaults to
+                `knowledge_base_version`.
+            clock (Callable[[], float]): The monotonic time source.
+        """
+        self.embedder = embedder or HashingEmbedder(dimension)
+        self.semantic_distance = semantic_distance
+        self.version_provider = version_provider or knowledge_base_version
+        self._lock = threading.RLock()
+        self._exact = _LruTier(max_entries, max_bytes, ttl_seconds, clock)
+        self._semantic = _SemanticTier(
+            max_entries, max_bytes, ttl_seconds, clock, dimension
+        )
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._version: str | None = None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self) -> None:
+        """Drops every entry if the knowledge base changed."""
+        version = self.version_provider()
+        if version != self._version:
+            if self._version is not None:
+                self.invalidations += 1
+            self._version = version
+            self._exact.clear()
+            self._semantic.clear()
+
+    def _embed(self, key: str) -> np.ndarray:
+        """Embeds a normalized key, reusing recent embeddings."""
+        vector = self._vectors.get(key)
+        if vector is None:
+            vector = self.embedder.embed([key.replace('|', ' ')])[0]
+            self._vectors[key] = vector
+            if len(self._vectors) > 128:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def get(self, intent: str, customer_motivation: str) -> str | None:
+        """Looks up cached instructions for a request.
+
+        Args:
+            intent (str): A high level generic title for the user's intent.
+            customer_motivation (str): A brief description of the user's
+                motivation.
+
+        Returns:
+            str | None: The cached instructions, or None on a miss.
+        """
+        key = normalize_query(intent, customer_motivation)
+        with self._lock:
+            self._check_version()
+            entry = self._exact.get(key)
+            if entry is not None:
+                self.exact_hits += 1
+                return entry.value
+            if self.semantic_distance > 0:
+                entry = self._semantic.search(
+                    key.split('|', 1)[0],
+                    self._embed(key),
+                    self.semantic_distance,
+                )
+                if entry is not None:
+                    self.semantic_hits += 1
+                    return entry.value
+            self.misses += 1
+            return None
+
+    def put(self, intent: str, customer_motivation: str, value: str) -> None:
+        """Stores instructions for a request in both tiers.
+
+        Args:
+            intent (str): A high level generic title for the user's intent.
+            customer_motivation (str): A brief description of the user's
+                motivation.
+            value (str): The summarized instructions.
+        """
+        key = normalize_query(intent, customer_motivation)
+        with self._lock:
+            self._check_version()
+            self._exact.put(key, value)
+            if self.semantic_distance > 0:
+                self._semantic.put_vector(
+                    key, key.split('|', 1)[0], value, self._embed(key)
+                )
+
+    def invalidate(self) -> None:
+        """Drops every cached entry."""
+        with self._lock:
+            self.invalidations += 1
+            self._exact.clear()
+            self._semantic.clear()
+
+    def stats(self) -> dict:
+        """Returns hit, miss and eviction counters for both tiers.
+
+        Returns:
+            dict: The cache counters and current sizes.
+        """
+        with self._lock:
+            return {
+                'kb_version': self._version,
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'exact_entries': len(self._exact.entries),
+                'semantic_entries': len(self._semantic.entries),
+                'exact_bytes': self._exact.bytes_used,
+                'semantic_bytes': self._semantic.bytes_used,
+                'evictions': self._exact.evictions + self._semantic.evictions,
+                'expirations': (
+                    self._exact.expirations + self._semantic.expirations
+                ),
+            }
+
+
+_instruction_cache: InstructionCache | None = None
+_instruction_cache_lock = threading.Lock()
+
+
+def get_instruction_cache() -> InstructionCache | None:
+    """Returns the process-wide instruction cache, building it on first use.
+
+    The cache is configured with the `INSTRUCTION_CACHE_*` environment
+    variables and disabled when `INSTRUCTION_CACHE_ENABLED` is `false`.
+
+    Returns:
+        InstructionCache | None: The cache, or None when disabled.
+    """
+    global _instruction_cache
+    if os.environ.get('INSTRUCTION_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+    if _instruction_cache is None:
+        with _instruction_cache_lock:
+            if _instruction_cache is None:
+                _instruction_cache = InstructionCache(
+                    max_entries=int(
+                        os.environ.get('INSTRUCTION_CACHE_MAX_ENTRIES', 1024)
+                    ),
+                    max_bytes=int(
+                        os.environ.get(
+                            'INSTRUCTION_CACHE_MAX_BYTES', 8 * 1024 * 1024
+                        )
+                    ),
+                    ttl_seconds=float(
+                        os.environ.get('INSTRUCTION_CACHE_TTL_SECONDS', 3600)
+                    ),
+                    semantic_distance=float(
+                        os.environ.get(
+                            'INSTRUCTION_CACHE_SEMANTIC_DISTANCE', 0.1
+                        )
+                    ),
+                )
+    return _instruction_cache
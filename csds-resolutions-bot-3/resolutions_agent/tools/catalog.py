@@ -0,0 +1,493 @@
+"""Indexed product catalog backed by memory-mapped columns.
+
+The catalog source is a CSV file with `sku`, `name`, `price` and `category`
+columns. On first use it is compiled into numpy column files: fixed-width
+SKUs, prices in cents, names as one UTF-8 buffer with offsets, dictionary
+encoded categories, an open-addressing hash table over the SKUs and the
+rows of each category. The columns are memory-mapped, so every process
+shares the same pages through the OS cache and opens the catalog without
+parsing it again. The index is rebuilt whenever the source file changes.
+
+Configuration:
+    PRODUCT_CATALOG_PATH: The catalog CSV file. Defaults to the catalog
+        shipped in `construct_kb/data`.
+    PRODUCT_CATALOG_INDEX_DIR: Where compiled indexes are kept. Defaults
+        to `~/.cache/resolutions_agent/product_catalog`.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+
+from .hashing import fnv1a_64, fnv1a_64_one
+
+DEFAULT_INDEX_DIR = (
+    Path.home() / '.cache' / 'resolutions_agent' / 'product_catalog'
+)
+
+DEFAULT_CATALOG_PATH = (
+    Path(__file__).resolve().parents[2]
+    / 'construct_kb'
+    / 'data'
+    / 'product_catalog.csv'
+)
+
+# Bump when the layout of the compiled columns changes.
+INDEX_VERSION = 1
+
+_COLUMNS = (
+    'skus',
+    'prices',
+    'name_offsets',
+    'names',
+    'category_codes',
+    'category_offsets',
+    'category_rows',
+    'slots',
+)
+
+_MANIFEST = 'manifest.json'
+
+# Names of the per-version index directories written by `open`.
+_GENERATION = re.compile(r'catalog-[0-9a-f]{16}')
+
+
+def catalog_path() -> Path:
+    """Returns the catalog source file (`PRODUCT_CATALOG_PATH`).
+
+    Returns:
+        Path: The location of the catalog CSV file.
+    """
+    return Path(os.environ.get('PRODUCT_CATALOG_PATH', DEFAULT_CATALOG_PATH))
+
+
+def catalog_index_dir() -> Path:
+    """Returns where compiled indexes are kept (`PRODUCT_CATALOG_INDEX_DIR`).
+
+    Returns:
+        Path: The index directory.
+    """
+    return Path(os.environ.get('PRODUCT_CATALOG_INDEX_DIR', DEFAULT_INDEX_DIR))
+
+
+def format_price(cents: int) -> str:
+    """Formats a price in cents like `$149.99`.
+
+    Args:
+        cents (int): The price in cents.
+
+    Returns:
+        str: The formatted price.
+    """
+    return f'${cents // 100}.{cents % 100:02d}'
+
+
+def _parse_price(text: str) -> int:
+    """Parses a price such as `$1,299.99` or `149.99` into cents."""
+    return int(Decimal(text.strip().lstrip('$').replace(',', '')) * 100)
+
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    """One product of the catalog.
+
+    Attributes:
+        sku (str): The stock keeping unit.
+        name (str): The product name.
+        price_cents (int): The price in cents.
+        category (str): The product category.
+    """
+
+    sku: str
+    name: str
+    price_cents: int
+    category: str
+
+    @property
+    def price(self) -> str:
+        """The formatted price, such as `$149.99`."""
+        return format_price(self.price_cents)
+
+    def to_dict(self) -> dict:
+        """Returns the product in the shape reported by the order tools.
+
+        Returns:
+            dict: The name, price, SKU and category of the product.
+        """
+        return {
+            'name': self.name,
+            'price': self.price,
+            'sku': self.sku,
+            'category': self.category,
+        }
+
+
+def _build_slots(hashes: np.ndarray) -> np.ndarray:
+    """Builds a linear-probing hash table of row numbers, at most half full.
+
+    Rows are placed in rounds: each round, every unplaced row whose probe
+    position is free competes for it, the lowest row wins, and the others
+    move on to the next position. A row is therefore always found by
+    probing from its hash past occupied slots only.
+    """
+    capacity = 1 << max(1, (2 * len(hashes) - 1).bit_length())
+    mask = capacity - 1
+    slots = np.full(capacity, -1, dtype=np.int32)
+    rows = np.arange(len(hashes), dtype=np.int64)
+    positions = (hashes & np.uint64(mask)).astype(np.int64)
+    while len(rows):
+        free = np.flatnonzero(slots[positions] == -1)
+        taken, first = np.unique(positions[free], return_index=True)
+        slots[taken] = rows[free[first]]
+        waiting = np.ones(len(rows), dtype=bool)
+        waiting[free[first]] = False
+        rows = rows[waiting]
+        positions = (positions[waiting] + 1) & mask
+    return slots
+
+
+def build_catalog_index(source: Path, index_dir: Path) -> None:
+    """Compiles a catalog CSV file into column files.
+
+    Rows with an SKU seen earlier in the file are skipped.
+
+    Args:
+        source (Path): The catalog CSV file.
+        index_dir (Path): The directory to write; it must not exist yet.
+
+    Raises:
+        ValueError: If the file lacks a required column or a price does
+            not parse.
+    """
+    skus, names, prices, categories = [], [], [], []
+    seen = set()
+    with open(source, encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        missing = {'sku', 'name', 'price', 'category'} - set(
+            reader.fieldnames or ()
+        )
+        if missing:
+            raise ValueError(f'{source} lacks columns {sorted(missing)}')
+        for row in reader:
+            sku = row['sku'].strip()
+            if not sku or sku in seen:
+                continue
+            seen.add(sku)
+            skus.append(sku)
+            names.append(row['name'].strip())
+            prices.append(_parse_price(row['price']))
+            categories.append(row['category'].strip())
+
+    category_names = sorted(set(categories))
+    codes = {category: code for code, category in enumerate(category_names)}
+    category_codes = np.array(
+        [codes[category] for category in categories], dtype=np.int32
+    )
+    encoded_names = [name.encode() for name in names]
+    columns = {
+        'skus': np.array([sku.encode() for sku in skus], dtype=bytes),
+        'prices': np.array(prices, dtype=np.int64),
+        'name_offsets': np.concatenate(
+            ([0], np.cumsum([len(name) for name in encoded_names]))
+        ).astype(np.int64),
+        'names': np.frombuffer(b''.join(encoded_names), dtype=np.uint8),
+        'category_codes': category_codes,
+        'category_offsets': np.concatenate(
+            ([0], np.cumsum(np.bincount(category_codes, minlength=len(codes))))
+        ).astype(np.int64),
+        'category_rows': np.argsort(category_codes, kind='stable').astype(
+            np.int32
+        ),
+        'slots': _build_slots(fnv1a_64(skus)),
+    }
+    index_dir.mkdir(parents=True)
+    for name, column in columns.items():
+        np.save(index_dir / f'{name}.npy', column)
+    (index_dir / _MANIFEST).write_text(
+        json.dumps(
+            {
+                'version': INDEX_VERSION,
+                'source': str(source),
+                'products': len(skus),
+                'categories': category_names,
+            }
+        ),
+        encoding='utf-8',
+    )
+
+
+def _fingerprint(source: Path) -> str:
+    """Identifies a version of the catalog source file."""
+    stat = source.stat()
+    key = (
+        f'{INDEX_VERSION}:{source.resolve()}:{stat.st_size}:{stat.st_mtime_ns}'
+    )
+    return f'catalog-{hashlib.sha256(key.encode()).hexdigest()[:16]}'
+
+
+class ProductCatalog:
+    """Read-only product catalog over memory-mapped columns."""
+
+    def __init__(self, index_dir: str | Path):
+        """Maps a compiled index.
+
+        Args:
+            index_dir (str | Path): A directory written by
+                `build_catalog_index`.
+        """
+        self.index_dir = Path(index_dir)
+        manifest = json.loads(
+            (self.index_dir / _MANIFEST).read_text(encoding='utf-8')
+        )
+        self.category_names: list[str] = manifest['categories']
+        self._category_codes = {
+            category: code for code, category in enumerate(self.category_names)
+        }
+        columns = {
+            name: np.load(self.index_dir / f'{name}.npy', mmap_mode='r')
+            for name in _COLUMNS
+        }
+        self._skus = columns['skus']
+        self._prices = columns['prices']
+        self._name_offsets = columns['name_offsets']
+        self._names = columns['names']
+        self._row_categories = columns['category_codes']
+        self._category_offsets = columns['category_offsets']
+        self._category_rows = columns['category_rows']
+        self._slots = columns['slots']
+        self._mask = len(self._slots) - 1
+
+    @classmethod
+    def open(
+        cls, source: str | Path, index_dir: str | Path
+    ) -> 'ProductCatalog':
+        """Opens a catalog, compiling its source first if it changed.
+
+        Each version of the source is compiled into its own subdirectory,
+        renamed into place when complete, so processes that open the
+        catalog concurrently never see a partial index. Indexes of older
+        versions are removed; nothing else in `index_dir` is touched.
+
+        Args:
+            source (str | Path): The catalog CSV file.
+            index_dir (str | Path): Where compiled indexes are kept.
+
+        Returns:
+            ProductCatalog: The catalog.
+        """
+        source, index_dir = Path(source), Path(index_dir)
+        target = index_dir / _fingerprint(source)
+        if not (target / _MANIFEST).exists():
+            index_dir.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(dir=index_dir, prefix='.build-'))
+            try:
+                build_catalog_index(source, staging / 'index')
+                os.rename(staging / 'index', target)
+            except OSError:
+                if not (target / _MANIFEST).exists():
+                    raise
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+            for old in index_dir.iterdir():
+                if (
+                    old != target
+                    and _GENERATION.fullmatch(old.name)
+                    and (old / _MANIFEST).exists()
+                ):
+                    shutil.rmtree(old, ignore_errors=True)
+        return cls(target)
+
+    def __len__(self) -> int:
+        """Returns the number of products."""
+        return len(self._skus)
+
+    def __contains__(self, sku: object) -> bool:
+        """Returns whether an SKU is in the catalog."""
+        return isinstance(sku, str) and self.row(sku) is not None
+
+    def __getitem__(self, sku: str) -> Product:
+        """Returns the product of an SKU.
+
+        Raises:
+            KeyError: If the SKU is not in the catalog.
+        """
+        row = self.row(sku)
+        if row is None:
+            raise KeyError(sku)
+        return self.product(row)
+
+    def row(self, sku: str) -> int | None:
+        """Finds the row of an SKU in expected constant time.
+
+        Args:
+            sku (str): The SKU.
+
+        Returns:
+            int | None: The row, or None if the SKU is not in the catalog.
+        """
+        key = sku.encode()
+        position = fnv1a_64_one(sku) & self._mask
+        while (row := int(self._slots[position])) >= 0:
+            if self._skus[row] == key:
+                return row
+            position = (position + 1) & self._mask
+        return None
+
+    def get(self, sku: str) -> Product | None:
+        """Returns the product of an SKU.
+
+        Args:
+            sku (str): The SKU.
+
+        Returns:
+            Product | None: The product, or None if the SKU is unknown.
+        """
+        row = self.row(sku)
+        return None if row is None else self.product(row)
+
+    def product(self, row: int) -> Product:
+        """Returns the product in a row.
+
+        Args:
+            row (int): The row.
+
+        Returns:
+            Product: The product.
+        """
+        start, end = self._name_offsets[row], self._name_offsets[row + 1]
+        return Product(
+            sku=self._skus[row].decode(),
+            name=bytes(self._names[start:end]).decode(),
+            price_cents=int(self._prices[row]),
+            category=self.category_names[self._row_categories[row]],
+        )
+
+    def category_rows(self, category: str) -> np.ndarray:
+        """Returns the rows of the products in a category.
+
+        Args:
+            category (str): The category.
+
+        Returns:
+            np.ndarray: The rows, in catalog order; empty for an unknown
+            category.
+        """
+        code = self._category_codes.get(category)
+        if code is None:
+            return self._category_rows[:0]
+        return self._category_rows[
+            self._category_offsets[code] : self._category_offsets[code + 1]
+        ]
+
+    def in_category(
+        self, category: str, limit: int | None = None
+    ) -> list[Product]:
+        """Returns the products of a category.
+
+        Args:
+            category (str): The category.
+            limit (int | None): The most products returned.
+
+        Returns:
+            list[Product]: The products, in catalog order.
+        """
+        return [
+            self.product(int(row))
+            for row in self.category_rows(category)[:limit]
+        ]
+
+    def pick(
+        self, fractions: np.ndarray, categories: Sequence[str] | None = None
+    ) -> np.ndarray:
+        """Maps fractions in [0, 1) to rows, uniformly over the products.
+
+        Args:
+            fractions (np.ndarray): One fraction per row to pick.
+            categories (Sequence[str] | None): The category of each pick,
+                which is then uniform over that category's products.
+                Defaults to the whole catalog.
+
+        Returns:
+            np.ndarray: The picked rows.
+
+        Raises:
+            ValueError: If a category has no products.
+        """
+        if categories is None:
+            return (fractions * len(self)).astype(np.int64)
+        codes = np.array(
+            [self._category_codes.get(category, -1) for category in categories]
+        )
+        if (codes < 0).any():
+            raise ValueError('Cannot pick from a category without products')
+        starts = self._category_offsets[codes]
+        sizes = self._category_offsets[codes + 1] - starts
+        return self._category_rows[
+            starts + (fractions * sizes).astype(np.int64)
+        ].astype(np.int64)
+
+    def skus(self, rows: np.ndarray) -> list[str]:
+        """Returns the SKUs of rows.
+
+        Args:
+            rows (np.ndarray): The rows.
+
+        Returns:
+            list[str]: The SKUs.
+        """
+        return np.char.decode(self._skus[rows]).tolist()
+
+    def prices(self, rows: np.ndarray) -> np.ndarray:
+        """Returns the prices in cents of rows.
+
+        Args:
+            rows (np.ndarray): The rows.
+
+        Returns:
+            np.ndarray: The prices in cents.
+        """
+        return np.asarray(self._prices[rows])
+
+
+_catalog: ProductCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ProductCatalog:
+    """Returns the process-wide catalog, opening it on first use.
+
+    Returns:
+        ProductCatalog: The catalog of `PRODUCT_CATALOG_PATH`, indexed in
+        `PRODUCT_CATALOG_INDEX_DIR`.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ProductCatalog.open(
+                    catalog_path(), catalog_index_dir()
+                )
+    return _catalog
+
+
+def set_catalog(catalog: ProductCatalog | None) -> None:
+    """Replaces the process-wide catalog.
+
+    Args:
+        catalog (ProductCatalog | None): The new catalog, or None to reopen
+            it from the environment on next use.
+    """
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
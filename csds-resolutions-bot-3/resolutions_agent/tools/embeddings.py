@@ -0,0 +1,177 @@
+"""Embedding functions used by the local retriever."""
+
+import hashlib
+import re
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+_STOP_WORDS = frozenset(
+    {
+        'a', 'about', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can',
+        'customer', 'does', 'for', 'from', 'has', 'have', 'her', 'his', 'i',
+        'if', 'in', 'intent', 'is', 'it', 'its', 'motivation', 'my', 'of',
+        'on', 'or', 'such', 'that', 'the', 'their', 'them', 'they', 'this',
+        'to', 'was', 'wants', 'with',
+    }
+)  # fmt: skip
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits a text into lowercase word tokens without stop words.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list[str]: The tokens in order of appearance.
+    """
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOP_WORDS
+    ]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scales each row of a matrix to unit L2 norm.
+
+    Args:
+        matrix (np.ndarray): A 2-D array of embeddings.
+
+    Returns:
+        np.ndarray: A float32 copy of the matrix with unit-norm rows. Rows
+        that are entirely zero are left as zeros.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class Embedder(Protocol):
+    """Turns texts into a matrix of unit-norm embeddings."""
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeds a batch of texts.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A float32 array of shape `(len(texts), dimension)`
+            with unit-norm rows.
+        """
+        ...
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimension: int) -> tuple[int, float]:
+    """Maps a feature to a signed bucket with a process-stable hash."""
+    digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+    value = int.from_bytes(digest, 'little')
+    sign = 1.0 if value >> 63 else -1.0
+    return value % dimension, sign
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-n-grams embedder that runs fully offline.
+
+    Tokens and adjacent token pairs are hashed into a fixed number of
+    signed buckets with BLAKE2b, so the same text always maps to the same
+    vector regardless of process or `PYTHONHASHSEED`.
+    """
+
+    def __init__(self, dimension: int = 1024, use_bigrams: bool = True):
+        """Initializes the embedder.
+
+        Args:
+            dimension (int): The number of hash buckets in each embedding.
+            use_bigrams (bool): Whether adjacent token pairs are features.
+        """
+        self.dimension = dimension
+        self.use_bigrams = use_bigrams
+
+    def _features(self, text: str) -> list[str]:
+        """Splits a text into unigram and bigram features."""
+        tokens = tokenize(text)
+        features = list(tokens)
+        if self.use_bigrams:
+            features.extend(
+                f'{first} {second}'
+                for first, second in zip(tokens, tokens[1:], strict=False)
+            )
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeds a batch of texts.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A float32 array of shape `(len(texts), dimension)`
+            with unit-norm rows.
+        """
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                index, sign = _hash_feature(feature, self.dimension)
+                matrix[row, index] += sign
+        # Dampen repeated terms so long texts are not dominated by them.
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        return normalize_rows(matrix)
+
+
+class VertexTextEmbedder:
+    """Embedder backed by a Vertex AI text embedding model."""
+
+    def __init__(
+        self,
+        model_name: str = 'text-embedding-005',
+        task_type: str = 'SEMANTIC_SIMILARITY',
+        batch_size: int = 250,
+    ):
+        """Initializes the embedder.
+
+        Args:
+            model_name (str): The Vertex AI embedding model to call.
+            task_type (str): The embedding task type sent with each text.
+            batch_size (int): The maximum number of texts per request.
+        """
+        self.model_name = model_name
+        self.task_type = task_type
+        self.batch_size = batch_size
+        self._model = None
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeds a batch of texts.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A float32 array with one unit-norm row per text.
+        """
+        from vertexai.language_models import (
+            TextEmbeddingInput,
+            TextEmbeddingModel,
+        )
+
+        if self._model is None:
+            self._model = TextEmbeddingModel.from_pretrained(self.model_name)
+
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [
+                TextEmbeddingInput(text, self.task_type)
+                for text in texts[start : start + self.batch_size]
+            ]
+            vectors.extend(
+                embedding.values
+                for embedding in self._model.get_embeddings(batch)
+            )
+        return normalize_rows(np.array(vectors, dtype=np.float32))
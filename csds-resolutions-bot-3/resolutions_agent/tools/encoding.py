@@ -0,0 +1,161 @@
+"""Encoding of tool responses sent back to the model."""
+
+import json
+import math
+import os
+import threading
+from collections import defaultdict
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from utils.tracing import annotate
+
+# Session state key listing the SKUs whose full product was already sent.
+MENTIONED_SKUS_KEY = 'mentioned_skus'
+
+# Rough characters per token of JSON text for Gemini tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def response_mode() -> str:
+    """Returns the tool response encoding (`TOOL_RESPONSE_MODE`).
+
+    Returns:
+        str: `pretty` for indented JSON with every field, or `compact` for
+        minified JSON without null fields and with repeated products
+        reduced to their SKU.
+    """
+    return os.environ.get('TOOL_RESPONSE_MODE', 'pretty').lower()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates how many input tokens a response costs the model.
+
+    Args:
+        text (str): The encoded response.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_payload(payload: Any, mentioned_skus: set[str]) -> Any:
+    """Drops null fields and replaces already mentioned products by SKU.
+
+    Args:
+        payload (Any): The response, or a part of it.
+        mentioned_skus (set[str]): SKUs whose full product the model has
+            already seen. Updated with the products sent in full.
+
+    Returns:
+        Any: The compacted copy.
+    """
+    if isinstance(payload, list):
+        return [compact_payload(item, mentioned_skus) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+
+    compacted = {}
+    for key, value in payload.items():
+        if value is None:
+            continue
+        if key == 'product' and isinstance(value, dict) and 'sku' in value:
+            if value['sku'] in mentioned_skus:
+                compacted[key] = {'sku': value['sku']}
+                continue
+            mentioned_skus.add(value['sku'])
+        compacted[key] = compact_payload(value, mentioned_skus)
+    return compacted
+
+
+class ResponseStats:
+    """Thread-safe size counters of the encoded responses of each tool."""
+
+    def __init__(self):
+        """Initializes empty counters."""
+        self._lock = threading.Lock()
+        self._totals: defaultdict[str, dict[str, int]] = defaultdict(
+            lambda: {'calls': 0, 'chars': 0, 'tokens': 0}
+        )
+
+    def record(self, tool_name: str, text: str) -> int:
+        """Records one encoded response.
+
+        Args:
+            tool_name (str): The tool that produced the response.
+            text (str): The encoded response.
+
+        Returns:
+            int: The estimated token count of the response.
+        """
+        tokens = estimate_tokens(text)
+        with self._lock:
+            totals = self._totals[tool_name]
+            totals['calls'] += 1
+            totals['chars'] += len(text)
+            totals['tokens'] += tokens
+        return tokens
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Returns the totals and per-call averages of each tool.
+
+        Returns:
+            dict[str, dict[str, float]]: The counters keyed by tool name.
+        """
+        with self._lock:
+            return {
+                tool_name: {
+                    **totals,
+                    'avg_chars': totals['chars'] / totals['calls'],
+                    'avg_tokens': totals['tokens'] / totals['calls'],
+                }
+                for tool_name, totals in self._totals.items()
+            }
+
+    def reset(self) -> None:
+        """Clears every counter."""
+        with self._lock:
+            self._totals.clear()
+
+
+response_stats = ResponseStats()
+
+
+def encode_response(
+    tool_name: str,
+    payload: dict,
+    tool_context: CallbackContext | None = None,
+) -> str:
+    """Encodes a tool response in the configured mode and records its size.
+
+    In compact mode, products already sent earlier in the session are
+    reduced to their SKU. Mentions are tracked in `tool_context.state`, or
+    only within this response when there is no tool context.
+
+    Args:
+        tool_name (str): The tool that produced the response.
+        payload (dict): The response.
+        tool_context (CallbackContext | None): The context of the tool call,
+            or of the callback encoding a response on a tool's behalf.
+
+    Returns:
+        str: The encoded response.
+    """
+    if response_mode() == 'compact':
+        state = tool_context.state if tool_context is not None else {}
+        mentioned_skus = set(state.get(MENTIONED_SKUS_KEY, ()))
+        known = len(mentioned_skus)
+        text = json.dumps(
+            compact_payload(payload, mentioned_skus),
+            separators=(',', ':'),
+            ensure_ascii=False,
+        )
+        if tool_context is not None and len(mentioned_skus) > known:
+            tool_context.state[MENTIONED_SKUS_KEY] = sorted(mentioned_skus)
+    else:
+        text = json.dumps(payload, indent=2)
+
+    tokens = response_stats.record(tool_name, text)
+    annotate(response_chars=len(text), response_tokens=tokens)
+    return text
@@ -0,0 +1,98 @@
+"""Pre-summarized resolution guides built by `construct_kb`."""
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from .knowledge_base import knowledge_base_version
+from .retrievers import RetrievedContext
+
+DEFAULT_RESOLUTION_GUIDES_PATH = (
+    Path(__file__).resolve().parents[2]
+    / 'construct_kb'
+    / 'data'
+    / 'resolution_guides.json'
+)
+
+
+@lru_cache(maxsize=4)
+def _load_resolution_guides(path: Path, kb_version: str) -> dict[str, str]:
+    """Loads the guides artifact if it matches the knowledge base version."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            artifact = json.load(file)
+    except FileNotFoundError:
+        print(f'Resolution guides not found at {path}.')
+        return {}
+
+    if artifact.get('kb_version') != kb_version:
+        print(
+            f'Ignoring resolution guides built for KB version '
+            f'{artifact.get("kb_version")}; current version is {kb_version}.'
+        )
+        return {}
+    return artifact['guides']
+
+
+def load_resolution_guides() -> dict[str, str]:
+    """Returns the pre-summarized guide of every intent.
+
+    The artifact location can be overridden with the
+    `RESOLUTION_GUIDES_PATH` environment variable. Guides built from a
+    different knowledge base version are ignored.
+
+    Returns:
+        dict[str, str]: The guide text keyed by intent, or an empty dict if
+        no up-to-date artifact is available.
+    """
+    path = Path(
+        os.environ.get(
+            'RESOLUTION_GUIDES_PATH', DEFAULT_RESOLUTION_GUIDES_PATH
+        )
+    )
+    return _load_resolution_guides(path, knowledge_base_version())
+
+
+def match_resolution_guide(
+    contexts: list[RetrievedContext],
+    max_distance: float | None = None,
+    min_margin: float | None = None,
+) -> str | None:
+    """Returns the pre-summarized guide when retrieval is a confident match.
+
+    A match is confident when the closest context belongs to a known intent,
+    is within `max_distance` of the query, and every context of a different
+    intent is at least `min_margin` further away. Anything else is treated
+    as an ambiguous blend that needs live summarization.
+
+    Args:
+        contexts (list[RetrievedContext]): The retrieved contexts, closest
+            first.
+        max_distance (float | None): The maximum distance of the closest
+            context. Defaults to `RESOLUTION_GUIDE_MAX_DISTANCE` or 0.5.
+        min_margin (float | None): The minimum distance gap to other
+            intents. Defaults to `RESOLUTION_GUIDE_MIN_MARGIN` or 0.1.
+
+    Returns:
+        str | None: The guide of the matched intent, or None.
+    """
+    if max_distance is None:
+        max_distance = float(
+            os.environ.get('RESOLUTION_GUIDE_MAX_DISTANCE', 0.5)
+        )
+    if min_margin is None:
+        min_margin = float(os.environ.get('RESOLUTION_GUIDE_MIN_MARGIN', 0.1))
+
+    if not contexts or contexts[0].intent is None:
+        return None
+    top = contexts[0]
+    if top.distance > max_distance:
+        return None
+    for context in contexts[1:]:
+        if (
+            context.intent != top.intent
+            and context.distance - top.distance < min_margin
+        ):
+            return None
+    return load_resolution_guides().get(top.intent)
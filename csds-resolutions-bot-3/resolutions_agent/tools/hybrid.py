@@ -0,0 +1,282 @@
+"""Hybrid BM25 and dense retrieval over the knowledge base."""
+
+import math
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from .embeddings import Embedder, tokenize
+from .knowledge_base import load_knowledge_base
+from .retrievers import LocalVectorRetriever, RetrievedContext
+
+# Term-frequency weight of each knowledge base field in the BM25 index.
+FIELD_WEIGHTS = {'intent': 3.0, 'customer_motivation': 2.0, 'guide': 1.0}
+
+
+def _field_texts(entry: dict) -> dict[str, str]:
+    """Returns the indexed text of each field of an entry."""
+    guide = ' '.join(
+        f'{step["step"]} {" ".join(step["details"])}'
+        for step in entry['resolution_guide']
+    )
+    return {
+        'intent': entry['intent'],
+        'customer_motivation': entry['customer_motivation'],
+        'guide': guide,
+    }
+
+
+class BM25Index:
+    """Precomputed inverted BM25 index over knowledge base fields.
+
+    Each posting stores the final BM25 term weight of one entry, including
+    the field weights and length normalization, so scoring a query is a
+    sum of idf-weighted postings per query term.
+    """
+
+    def __init__(
+        self, entries: Sequence[dict], k1: float = 1.2, b: float = 0.75
+    ):
+        """Builds the index.
+
+        Args:
+            entries (Sequence[dict]): The knowledge base entries to index.
+            k1 (float): The BM25 term-frequency saturation parameter.
+            b (float): The BM25 length normalization parameter.
+        """
+        self.size = len(entries)
+        frequencies = []
+        for entry in entries:
+            counts: Counter[str] = Counter()
+            for field, text in _field_texts(entry).items():
+                for token in tokenize(text):
+                    counts[token] += FIELD_WEIGHTS[field]
+            frequencies.append(counts)
+
+        lengths = np.array([sum(c.values()) for c in frequencies])
+        average_length = float(lengths.mean()) if self.size else 0.0
+
+        postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for doc_id, counts in enumerate(frequencies):
+            norm = k1 * (1 - b + b * lengths[doc_id] / average_length)
+            for token, tf in counts.items():
+                postings[token].append((doc_id, tf * (k1 + 1) / (tf + norm)))
+
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for token, items in postings.items():
+            idf = math.log(
+                1 + (self.size - len(items) + 0.5) / (len(items) + 0.5)
+            )
+            self._postings[token] = (
+                np.array([doc_id for doc_id, _ in items], dtype=np.int32),
+                np.array([w * idf for _, w in items], dtype=np.float32),
+            )
+
+    def scores(self, query: str) -> np.ndarray:
+        """Scores every entry against a query.
+
+        Args:
+            query (str): The text to search for.
+
+        Returns:
+            np.ndarray: The BM25 score of each entry, in entry order.
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        return scores
+
+
+class Reranker(Protocol):
+    """Reorders candidate contexts by scoring them jointly with the query."""
+
+    def rerank(
+        self, query: str, contexts: list[RetrievedContext]
+    ) -> list[RetrievedContext]:
+        """Reorders candidates, best first.
+
+        Args:
+            query (str): The text that was searched for.
+            contexts (list[RetrievedContext]): The candidates.
+
+        Returns:
+            list[RetrievedContext]: The candidates in their new order.
+        """
+        ...
+
+
+class OverlapReranker:
+    """Local reranker scoring query coverage of each entry's key fields.
+
+    A candidate's score is the fraction of the query's tokens, weighted by
+    how rare they are in the knowledge base, that appear in the entry's
+    intent or customer motivation, blended with its dense similarity.
+    """
+
+    def __init__(self, entries: Sequence[dict], dense_weight: float = 0.5):
+        """Initializes the reranker.
+
+        Args:
+            entries (Sequence[dict]): The knowledge base entries.
+            dense_weight (float): The weight of the dense similarity in the
+                blended score.
+        """
+        self.dense_weight = dense_weight
+        self._keys = {
+            entry['intent']: set(
+                tokenize(f'{entry["intent"]} {entry["customer_motivation"]}')
+            )
+            for entry in entries
+        }
+        document_frequency: Counter[str] = Counter()
+        for tokens in self._keys.values():
+            document_frequency.update(tokens)
+        self._idf = {
+            token: math.log(1 + len(entries) / count)
+            for token, count in document_frequency.items()
+        }
+
+    def rerank(
+        self, query: str, contexts: list[RetrievedContext]
+    ) -> list[RetrievedContext]:
+        """Reorders candidates, best first.
+
+        Args:
+            query (str): The text that was searched for.
+            contexts (list[RetrievedContext]): The candidates.
+
+        Returns:
+            list[RetrievedContext]: The candidates in their new order.
+        """
+        query_tokens = set(tokenize(query))
+        default_idf = max(self._idf.values(), default=1.0)
+        total = sum(self._idf.get(t, default_idf) for t in query_tokens)
+
+        def score(context: RetrievedContext) -> float:
+            keys = self._keys.get(context.intent or '', set())
+            covered = sum(
+                self._idf.get(t, default_idf) for t in query_tokens & keys
+            )
+            coverage = covered / total if total else 0.0
+            similarity = 1.0 - context.distance
+            weight = self.dense_weight
+            return (1 - weight) * coverage + weight * similarity
+
+        return sorted(contexts, key=score, reverse=True)
+
+
+class HybridRetriever:
+    """Fuses BM25 and dense rankings of the knowledge base entries.
+
+    Both signals rank every entry; the rankings are combined with
+    reciprocal-rank fusion. An adaptive cutoff then keeps only candidates
+    that are close to the best candidate on at least one signal, so weak
+    near-misses are not passed to the summarizer. An optional reranker
+    reorders the survivors.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[dict],
+        embedder: Embedder | None = None,
+        reranker: Reranker | None = None,
+        rrf_k: int = 60,
+        candidates: int = 10,
+        relative_cutoff: float = 0.8,
+    ):
+        """Initializes the retriever and builds both indexes.
+
+        Args:
+            entries (Sequence[dict]): The knowledge base entries to index.
+            embedder (Embedder | None): The embedding function of the dense
+                index. Defaults to a `HashingEmbedder`.
+            reranker (Reranker | None): Reorders the fused candidates.
+            rrf_k (int): The reciprocal-rank fusion smoothing constant.
+            candidates (int): How many entries of each ranking are fused.
+            relative_cutoff (float): A candidate is kept only if its BM25
+                score or its dense similarity is at least this fraction of
+                the best candidate's.
+        """
+        self.entries = tuple(entries)
+        self.dense = LocalVectorRetriever(self.entries, embedder)
+        self.bm25 = BM25Index(self.entries)
+        self.reranker = reranker
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.relative_cutoff = relative_cutoff
+
+    @classmethod
+    def from_knowledge_base(
+        cls,
+        path: Path | None = None,
+        embedder: Embedder | None = None,
+        rerank: bool = False,
+    ) -> 'HybridRetriever':
+        """Builds a retriever over the knowledge base file.
+
+        Args:
+            path (Path | None): The knowledge base file. Defaults to
+                `knowledge_base_path()`.
+            embedder (Embedder | None): The embedding function.
+            rerank (bool): Whether to add an `OverlapReranker`.
+
+        Returns:
+            HybridRetriever: The retriever.
+        """
+        entries = load_knowledge_base(path)
+        reranker = OverlapReranker(entries) if rerank else None
+        return cls(entries, embedder, reranker)
+
+    def retrieve(self, query: str, top_k: int = 3) -> list[RetrievedContext]:
+        """Retrieves the best entries for a query.
+
+        Args:
+            query (str): The text to search for.
+            top_k (int): The maximum number of contexts to return.
+
+        Returns:
+            list[RetrievedContext]: The contexts, best first. The distance
+            of each context is its dense cosine distance.
+        """
+        if not self.entries or top_k <= 0:
+            return []
+
+        similarities = self.dense.similarities(query)
+        bm25_scores = self.bm25.scores(query)
+        depth = min(self.candidates, len(self.entries))
+
+        fused = np.zeros(len(self.entries), dtype=np.float64)
+        for scores in (similarities, bm25_scores):
+            ranking = np.argsort(-scores, kind='stable')[:depth]
+            fused[ranking] += 1.0 / (self.rrf_k + np.arange(1, depth + 1))
+
+        order = np.argsort(-fused, kind='stable')[:depth]
+        top_similarity = max(float(similarities[order].max()), 0.0)
+        top_bm25 = float(bm25_scores[order].max())
+        keep = [
+            int(index)
+            for rank, index in enumerate(order)
+            if rank == 0
+            or (
+                top_similarity > 0
+                and similarities[index]
+                >= self.relative_cutoff * top_similarity
+            )
+            or (
+                top_bm25 > 0
+                and bm25_scores[index] >= self.relative_cutoff * top_bm25
+            )
+        ]
+
+        contexts = [
+            self.dense.context(index, float(1.0 - similarities[index]))
+            for index in keep
+        ]
+        if self.reranker is not None:
+            contexts = self.reranker.rerank(query, contexts)
+        return contexts[:top_k]
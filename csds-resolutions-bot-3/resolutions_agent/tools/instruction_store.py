@@ -0,0 +1,234 @@
+"""Content-addressed store keeping instruction text out of session state.
+
+The store is process-local. Session state therefore also records the
+intent and customer motivation the instructions were looked up for, so a
+worker that does not hold the text, after a restart, an eviction or when
+another worker served the earlier turn, can look them up again.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from typing import Any
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from .knowledge_base import knowledge_base_version
+
+# Prefix of the references stored in `state['instructions']`. Values without
+# it are instructions written inline by older sessions.
+REF_PREFIX = 'instructions:'
+
+INSTRUCTIONS_KEY = 'instructions'
+KB_VERSION_KEY = 'instructions_kb_version'
+QUERY_KEY = 'instructions_query'
+
+
+def instruction_ref(text: str) -> str:
+    """Returns the content address of an instruction text.
+
+    Args:
+        text (str): The instructions.
+
+    Returns:
+        str: A short reference such as `instructions:3f2a...`.
+    """
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]
+    return f'{REF_PREFIX}{digest}'
+
+
+class InstructionStore:
+    """Thread-safe LRU map from content address to instruction text.
+
+    Identical instructions, which is most of them since lookups are cached
+    per intent, share one entry however many sessions refer to them.
+    """
+
+    def __init__(
+        self, max_entries: int = 4096, max_bytes: int = 32 * 1024 * 1024
+    ):
+        """Initializes an empty store.
+
+        Args:
+            max_entries (int): The maximum number of texts kept.
+            max_bytes (int): The approximate memory ceiling of the texts.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._texts: OrderedDict[str, str] = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, text: str) -> str:
+        """Stores a text under its content address.
+
+        Args:
+            text (str): The instructions.
+
+        Returns:
+            str: The reference to keep in session state.
+        """
+        ref = instruction_ref(text)
+        with self._lock:
+            if ref in self._texts:
+                self._texts.move_to_end(ref)
+                return ref
+            self._texts[ref] = text
+            self.bytes_used += sys.getsizeof(text)
+            while len(self._texts) > self.max_entries or (
+                self.bytes_used > self.max_bytes and len(self._texts) > 1
+            ):
+                _, evicted = self._texts.popitem(last=False)
+                self.bytes_used -= sys.getsizeof(evicted)
+                self.evictions += 1
+        return ref
+
+    def get(self, ref: str) -> str | None:
+        """Looks up a text by reference.
+
+        Args:
+            ref (str): The reference returned by `put`.
+
+        Returns:
+            str | None: The instructions, or None if they were evicted or
+            stored by another process.
+        """
+        with self._lock:
+            text = self._texts.get(ref)
+            if text is None:
+                self.misses += 1
+                return None
+            self._texts.move_to_end(ref)
+            self.hits += 1
+            return text
+
+    def stats(self) -> dict:
+        """Returns hit, miss and eviction counters.
+
+        Returns:
+            dict: The store counters and current size.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._texts),
+                'bytes': self.bytes_used,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+_instruction_store: InstructionStore | None = None
+_instruction_store_lock = threading.Lock()
+
+
+def get_instruction_store() -> InstructionStore:
+    """Returns the process-wide instruction store, building it on first use.
+
+    The store is sized with `INSTRUCTION_STORE_MAX_ENTRIES` and
+    `INSTRUCTION_STORE_MAX_BYTES`.
+
+    Returns:
+        InstructionStore: The store.
+    """
+    global _instruction_store
+    if _instruction_store is None:
+        with _instruction_store_lock:
+            if _instruction_store is None:
+                _instruction_store = InstructionStore(
+                    max_entries=int(
+                        os.environ.get('INSTRUCTION_STORE_MAX_ENTRIES', 4096)
+                    ),
+                    max_bytes=int(
+                        os.environ.get(
+                            'INSTRUCTION_STORE_MAX_BYTES', 32 * 1024 * 1024
+                        )
+                    ),
+                )
+    return _instruction_store
+
+
+def store_instructions(
+    state: MutableMapping[str, Any],
+    text: str,
+    intent: str | None = None,
+    customer_motivation: str | None = None,
+) -> str:
+    """Stores instructions and records only their reference in state.
+
+    Args:
+        state (MutableMapping[str, Any]): The session state.
+        text (str): The instructions.
+        intent (str | None): The intent they were looked up for. Recorded
+            in `state['instructions_query']` when given, so that a worker
+            missing the text can look it up again.
+        customer_motivation (str | None): The customer motivation they
+            were looked up for.
+
+    Returns:
+        str: The reference written to `state['instructions']`.
+    """
+    ref = get_instruction_store().put(text)
+    state[INSTRUCTIONS_KEY] = ref
+    state[KB_VERSION_KEY] = knowledge_base_version()
+    if intent is not None:
+        state[QUERY_KEY] = {
+            'intent': intent,
+            'customer_motivation': customer_motivation or '',
+        }
+    return ref
+
+
+def instructions_query(state: Mapping[str, Any]) -> tuple[str, str] | None:
+    """Returns the lookup that produced the session's instructions.
+
+    Args:
+        state (Mapping[str, Any]): The session state.
+
+    Returns:
+        tuple[str, str] | None: The intent and customer motivation, or None
+        if they were not recorded.
+    """
+    query = state.get(QUERY_KEY)
+    if not query or not query.get('intent'):
+        return None
+    return query['intent'], query.get('customer_motivation', '')
+
+
+def resolve_instructions(state: Mapping[str, Any]) -> str | None:
+    """Returns the instructions referenced by session state.
+
+    Args:
+        state (Mapping[str, Any]): The session state.
+
+    Returns:
+        str | None: The instructions, or None if there are none or they are
+        no longer in the store.
+    """
+    value = state.get(INSTRUCTIONS_KEY)
+    if not value:
+        return None
+    if not isinstance(value, str) or not value.startswith(REF_PREFIX):
+        return str(value)
+    text = get_instruction_store().get(value)
+    if text is None:
+        print(f"Instructions {value} are not in this process's store.")
+    return text
+
+
+def stored_instructions(context: ReadonlyContext) -> str | None:
+    """Instruction steps provider resolving the session's instructions.
+
+    Args:
+        context (ReadonlyContext): The context of the agent run.
+
+    Returns:
+        str | None: The instructions, if any.
+    """
+    return resolve_instructions(context.state)
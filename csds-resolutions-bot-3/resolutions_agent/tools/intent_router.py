@@ -0,0 +1,143 @@
+"""Local intent classifier for routing around the intent-retrieval LLM."""
+
+import os
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .embeddings import Embedder, tokenize
+from .hybrid import BM25Index
+from .knowledge_base import load_knowledge_base
+from .retrievers import LocalVectorRetriever
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    """The most likely knowledge base intent of a customer message.
+
+    Attributes:
+        intent (str): The predicted knowledge base intent.
+        confidence (float): The probability mass of the intent, in [0, 1].
+        runner_up (str | None): The second most likely intent, or None if
+            the knowledge base has a single intent.
+    """
+
+    intent: str
+    confidence: float
+    runner_up: str | None = None
+
+
+class IntentClassifier:
+    """Nearest-intent classifier derived from the knowledge base.
+
+    Each intent is represented by its knowledge base entry. A message is
+    scored against every entry with a blend of dense similarity and
+    normalized BM25, and the scores are turned into a distribution with a
+    temperature softmax, so a message that fits several intents equally
+    well gets a low confidence.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[dict],
+        embedder: Embedder | None = None,
+        dense_weight: float = 0.5,
+        temperature: float = 0.05,
+        min_tokens: int = 3,
+    ):
+        """Initializes the classifier.
+
+        Args:
+            entries (Sequence[dict]): The knowledge base entries.
+            embedder (Embedder | None): The embedding function. Defaults to
+                a `HashingEmbedder`.
+            dense_weight (float): The weight of the dense similarity in the
+                blended score; BM25 gets the rest.
+            temperature (float): The softmax temperature. Lower values make
+                the confidence sharper.
+            min_tokens (int): Messages with fewer content words are too
+                vague to classify, such as a bare "I want to return".
+        """
+        self.entries = tuple(entries)
+        self.dense = LocalVectorRetriever(self.entries, embedder)
+        self.bm25 = BM25Index(self.entries)
+        self.dense_weight = dense_weight
+        self.temperature = temperature
+        self.min_tokens = min_tokens
+
+    @classmethod
+    def from_knowledge_base(
+        cls, path: Path | None = None, embedder: Embedder | None = None
+    ) -> 'IntentClassifier':
+        """Builds a classifier over the knowledge base file.
+
+        Args:
+            path (Path | None): The knowledge base file. Defaults to
+                `knowledge_base_path()`.
+            embedder (Embedder | None): The embedding function.
+
+        Returns:
+            IntentClassifier: The classifier.
+        """
+        return cls(load_knowledge_base(path), embedder)
+
+    def predict(self, message: str) -> IntentPrediction | None:
+        """Predicts the intent of a customer message.
+
+        Args:
+            message (str): The customer's message.
+
+        Returns:
+            IntentPrediction | None: The prediction, or None if the message
+            is too vague or shares nothing with the knowledge base.
+        """
+        if not self.entries or len(tokenize(message)) < self.min_tokens:
+            return None
+        bm25_scores = self.bm25.scores(message)
+        if not bm25_scores.any():
+            return None
+        scores = self.dense_weight * self.dense.similarities(message) + (
+            1 - self.dense_weight
+        ) * (bm25_scores / bm25_scores.max())
+
+        logits = (scores - scores.max()) / self.temperature
+        probabilities = np.exp(logits) / np.exp(logits).sum()
+        ranked = np.argsort(-probabilities, kind='stable')[:2]
+        return IntentPrediction(
+            intent=self.entries[ranked[0]]['intent'],
+            confidence=float(probabilities[ranked[0]]),
+            runner_up=(
+                self.entries[ranked[1]]['intent'] if len(ranked) > 1 else None
+            ),
+        )
+
+
+_classifier: IntentClassifier | None = None
+_classifier_lock = threading.Lock()
+
+
+def router_enabled() -> bool:
+    """Returns whether the fast-path router is on (`INTENT_ROUTER_ENABLED`)."""
+    return os.environ.get('INTENT_ROUTER_ENABLED', 'false').lower() == 'true'
+
+
+def router_threshold() -> float:
+    """Returns the confidence needed to route (`INTENT_ROUTER_THRESHOLD`)."""
+    return float(os.environ.get('INTENT_ROUTER_THRESHOLD', 0.8))
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Returns the process-wide classifier, building it on first use.
+
+    Returns:
+        IntentClassifier: The classifier.
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier.from_knowledge_base()
+    return _classifier
@@ -0,0 +1,195 @@
+"""Local access to the resolutions knowledge base."""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_KNOWLEDGE_BASE_PATH = (
+    Path(__file__).resolve().parents[2]
+    / 'construct_kb'
+    / 'data'
+    / 'llm_full_knowledge_base.json'
+)
+
+DEFAULT_KB_DOCUMENTS_PATH = (
+    Path(__file__).resolve().parents[2]
+    / 'construct_kb'
+    / 'data'
+    / 'kb_documents.json'
+)
+
+
+def knowledge_base_path() -> Path:
+    """Returns the path of the knowledge base JSON file.
+
+    The path can be overridden with the `KNOWLEDGE_BASE_PATH` environment
+    variable; otherwise the file shipped in `construct_kb/data` is used.
+
+    Returns:
+        Path: The location of the knowledge base file.
+    """
+    return Path(
+        os.environ.get('KNOWLEDGE_BASE_PATH', DEFAULT_KNOWLEDGE_BASE_PATH)
+    )
+
+
+@lru_cache(maxsize=4)
+def load_knowledge_base(path: Path | None = None) -> tuple[dict, ...]:
+    """Loads the knowledge base entries once per path.
+
+    Args:
+        path (Path | None): The knowledge base file. Defaults to
+            `knowledge_base_path()`.
+
+    Returns:
+        tuple[dict, ...]: The knowledge base entries in file order.
+    """
+    with open(path or knowledge_base_path(), encoding='utf-8') as file:
+        return tuple(json.load(file))
+
+
+def entry_search_text(entry: dict) -> str:
+    """Returns the text used to match a query against an entry.
+
+    The text mirrors the query built by
+    `get_instructions_for_user_motivation`, so both sides of the similarity
+    comparison share the same shape.
+
+    Args:
+        entry (dict): A knowledge base entry.
+
+    Returns:
+        str: The intent and customer motivation of the entry.
+    """
+    return (
+        f'Intent: {entry["intent"]},\n'
+        f'Customer Motivation: {entry["customer_motivation"]}'
+    )
+
+
+def entry_document_text(entry: dict) -> str:
+    """Returns the text handed to the summarizer for an entry.
+
+    Args:
+        entry (dict): A knowledge base entry.
+
+    Returns:
+        str: The entry's canonical document built by `construct_kb`,
+        matching the content imported into the RAG corpus, or the entry
+        serialized as JSON if no up-to-date document is available.
+    """
+    document = load_kb_documents().get(entry['intent'])
+    if document is not None:
+        return document['text']
+    return json.dumps(entry, ensure_ascii=False)
+
+
+@lru_cache(maxsize=4)
+def _load_kb_documents(path: Path, kb_version: str) -> dict[str, dict]:
+    """Loads the documents artifact if it matches the KB version."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            artifact = json.load(file)
+    except FileNotFoundError:
+        print(f'KB documents not found at {path}.')
+        return {}
+
+    if artifact.get('kb_version') != kb_version:
+        print(
+            f'Ignoring KB documents built for KB version '
+            f'{artifact.get("kb_version")}; current version is {kb_version}.'
+        )
+        return {}
+    return artifact['documents']
+
+
+def _kb_documents_path() -> Path:
+    """Returns the documents artifact path (`KB_DOCUMENTS_PATH`)."""
+    return Path(os.environ.get('KB_DOCUMENTS_PATH', DEFAULT_KB_DOCUMENTS_PATH))
+
+
+def load_kb_documents() -> dict[str, dict]:
+    """Returns the retrieval document of every intent.
+
+    The artifact location can be overridden with the `KB_DOCUMENTS_PATH`
+    environment variable. Documents built from a different knowledge base
+    version are ignored.
+
+    Returns:
+        dict[str, dict]: The `id`, `category`, `version` and `text` of each
+        document keyed by intent, or an empty dict if no up-to-date artifact
+        is available.
+    """
+    return _load_kb_documents(_kb_documents_path(), knowledge_base_version())
+
+
+@lru_cache(maxsize=4)
+def _document_intents(path: Path, kb_version: str) -> dict[str, str]:
+    """Maps the document IDs of an artifact to their intents."""
+    return {
+        document['id']: intent
+        for intent, document in _load_kb_documents(path, kb_version).items()
+    }
+
+
+def intent_of_document(document_id: str) -> str | None:
+    """Returns the intent of a published document.
+
+    Args:
+        document_id (str): The document ID, optionally followed by the
+            `-<hash>` suffix of incrementally synced file names.
+
+    Returns:
+        str | None: The intent, or None if the ID is unknown.
+    """
+    intents = _document_intents(_kb_documents_path(), knowledge_base_version())
+    if document_id in intents:
+        return intents[document_id]
+    return intents.get(document_id.rsplit('-', 1)[0])
+
+
+@lru_cache(maxsize=4)
+def _entries_by_intent(path: Path) -> dict[str, dict]:
+    """Maps the intents of a knowledge base file to their entries."""
+    return {entry['intent']: entry for entry in load_knowledge_base(path)}
+
+
+def knowledge_base_entry(intent: str) -> dict | None:
+    """Returns the knowledge base entry of an intent.
+
+    Args:
+        intent (str): The intent.
+
+    Returns:
+        dict | None: The entry, or None if the intent is unknown.
+    """
+    return _entries_by_intent(knowledge_base_path()).get(intent)
+
+
+_version_cache: dict[Path, tuple[int, int, str]] = {}
+
+
+def knowledge_base_version(path: Path | None = None) -> str:
+    """Returns a short content hash identifying the knowledge base version.
+
+    The hash is recomputed only when the file's size or modification time
+    changes, so calling this on every request costs a single `stat`.
+
+    Args:
+        path (Path | None): The knowledge base file. Defaults to
+            `knowledge_base_path()`.
+
+    Returns:
+        str: The first 16 hex digits of the SHA-256 of the file.
+    """
+    path = path or knowledge_base_path()
+    stat = path.stat()
+    cached = _version_cache.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    version = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    _version_cache[path] = (stat.st_mtime_ns, stat.st_size, version)
+    return version
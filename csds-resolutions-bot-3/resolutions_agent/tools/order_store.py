@@ -0,0 +1,525 @@
+"""Bounded, thread-safe storage for the simulated order records."""
+
+import abc
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Protocol
+
+
+@dataclass(slots=True)
+class OrderRecord:
+    """The stored state of one order.
+
+    Attributes:
+        order_id (str): The order ID.
+        order_timestamp (datetime): When the order was placed.
+        status (str): The order status, such as `PROCESSING`.
+        delivery_date (datetime): The estimated or actual delivery date.
+        payment_method (str): How the order was paid.
+        amount (str): The order total, such as `$149.99`.
+        sku (str): The SKU of the ordered product in the catalog.
+        return_method (str | None): How the customer returns the order.
+    """
+
+    order_id: str
+    order_timestamp: datetime
+    status: str
+    delivery_date: datetime
+    payment_method: str
+    amount: str
+    sku: str
+    return_method: str | None = None
+
+
+_RECORD_FIELDS = tuple(field.name for field in fields(OrderRecord))
+
+
+def _record_size(record: OrderRecord) -> int:
+    """Approximates the memory held by a record."""
+    return sys.getsizeof(record) + sum(
+        sys.getsizeof(getattr(record, name)) for name in _RECORD_FIELDS
+    )
+
+
+def _copy(record: OrderRecord) -> OrderRecord:
+    """Copies a record so callers cannot mutate stored state unlocked."""
+    return OrderRecord(*(getattr(record, name) for name in _RECORD_FIELDS))
+
+
+class OrderStore(Protocol):
+    """Stores order records and serializes status transitions per order."""
+
+    def get(self, order_id: str) -> OrderRecord | None:
+        """Returns a copy of an order record.
+
+        Args:
+            order_id (str): The order ID.
+
+        Returns:
+            OrderRecord | None: The record, or None if it is unknown or
+            expired.
+        """
+        ...
+
+    def put(self, record: OrderRecord) -> None:
+        """Stores an order record, replacing any previous version.
+
+        Args:
+            record (OrderRecord): The record to store.
+        """
+        ...
+
+    def put_many(self, records: Iterable[OrderRecord]) -> int:
+        """Stores a batch of order records in one operation.
+
+        Args:
+            records (Iterable[OrderRecord]): The records to store.
+
+        Returns:
+            int: The number of records stored.
+        """
+        ...
+
+    def get_or_create(
+        self, order_id: str, factory: Callable[[str], OrderRecord]
+    ) -> OrderRecord:
+        """Returns an order record, creating it on first use.
+
+        Args:
+            order_id (str): The order ID.
+            factory (Callable[[str], OrderRecord]): Builds the record of an
+                unknown order.
+
+        Returns:
+            OrderRecord: A copy of the stored record.
+        """
+        ...
+
+    def lock(self, order_id: str) -> threading.RLock:
+        """Returns the lock that serializes transitions of an order.
+
+        The lock only serializes the threads of this process.
+
+        Args:
+            order_id (str): The order ID.
+
+        Returns:
+            threading.RLock: A reentrant lock shared by every order that
+            hashes to the same stripe.
+        """
+        ...
+
+
+class _StripedOrderStore(abc.ABC):
+    """Shared locking of the order store backends.
+
+    Transitions are serialized by a fixed pool of reentrant locks keyed by
+    order ID, so locking memory does not grow with the number of orders
+    seen. Orders that share a stripe also share a lock, which only costs
+    some contention. The locks are per process: they do not serialize
+    transitions made by another process sharing a SQLite database.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks = tuple(threading.RLock() for _ in range(stripes))
+
+    @abc.abstractmethod
+    def get(self, order_id: str) -> OrderRecord | None:
+        """Returns a copy of an order record, or None if unknown."""
+
+    @abc.abstractmethod
+    def put(self, record: OrderRecord) -> None:
+        """Stores an order record, replacing any previous version."""
+
+    @abc.abstractmethod
+    def put_many(self, records: Iterable[OrderRecord]) -> int:
+        """Stores a batch of order records and returns how many."""
+
+    def lock(self, order_id: str) -> threading.RLock:
+        """Returns the lock that serializes transitions of an order.
+
+        Args:
+            order_id (str): The order ID.
+
+        Returns:
+            threading.RLock: The lock of the order's stripe.
+        """
+        return self._locks[hash(order_id) % len(self._locks)]
+
+    def get_or_create(
+        self, order_id: str, factory: Callable[[str], OrderRecord]
+    ) -> OrderRecord:
+        """Returns an order record, creating it on first use.
+
+        Args:
+            order_id (str): The order ID.
+            factory (Callable[[str], OrderRecord]): Builds the record of an
+                unknown order.
+
+        Returns:
+            OrderRecord: A copy of the stored record.
+        """
+        with self.lock(order_id):
+            record = self.get(order_id)
+            if record is None:
+                record = factory(order_id)
+                self.put(record)
+            return record
+
+
+@dataclass(slots=True)
+class _StoredOrder:
+    """An order record with its bookkeeping."""
+
+    record: OrderRecord
+    expires_at: float
+    size: int
+
+
+class InMemoryOrderStore(_StripedOrderStore):
+    """Order store in process memory with LRU, TTL and a memory ceiling."""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 86400.0,
+        clock: Callable[[], float] = time.monotonic,
+        stripes: int = 64,
+    ):
+        """Initializes an empty store.
+
+        Args:
+            max_entries (int): The maximum number of orders kept.
+            max_bytes (int): The approximate memory ceiling.
+            ttl_seconds (float): How long an order is kept after its last
+                update.
+            clock (Callable[[], float]): The monotonic time source.
+            stripes (int): The number of per-order transition locks.
+        """
+        super().__init__(stripes)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._mutex = threading.Lock()
+        self._orders: OrderedDict[str, _StoredOrder] = OrderedDict()
+        self.bytes_used = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _pop(self, order_id: str) -> None:
+        stored = self._orders.pop(order_id, None)
+        if stored is not None:
+            self.bytes_used -= stored.size
+
+    def get(self, order_id: str) -> OrderRecord | None:
+        """Returns a copy of an order record.
+
+        Args:
+            order_id (str): The order ID.
+
+        Returns:
+            OrderRecord | None: The record, or None if it is unknown or
+            expired.
+        """
+        with self._mutex:
+            stored = self._orders.get(order_id)
+            if stored is None:
+                return None
+            if stored.expires_at <= self.clock():
+                self._pop(order_id)
+                self.expirations += 1
+                return None
+            self._orders.move_to_end(order_id)
+            return _copy(stored.record)
+
+    def put(self, record: OrderRecord) -> None:
+        """Stores an order record, replacing any previous version.
+
+        Args:
+            record (OrderRecord): The record to store.
+        """
+        self.put_many((record,))
+
+    def put_many(self, records: Iterable[OrderRecord]) -> int:
+        """Stores a batch of order records under one lock acquisition.
+
+        Args:
+            records (Iterable[OrderRecord]): The records to store.
+
+        Returns:
+            int: The number of records stored.
+        """
+        expires_at = self.clock() + self.ttl_seconds
+        stored_orders = [
+            _StoredOrder(
+                record=_copy(record),
+                expires_at=expires_at,
+                size=_record_size(record),
+            )
+            for record in records
+        ]
+        with self._mutex:
+            for stored in stored_orders:
+                order_id = stored.record.order_id
+                self._pop(order_id)
+                self._orders[order_id] = stored
+                self.bytes_used += stored.size
+            while len(self._orders) > self.max_entries or (
+                self.bytes_used > self.max_bytes and len(self._orders) > 1
+            ):
+                self._pop(next(iter(self._orders)))
+                self.evictions += 1
+        return len(stored_orders)
+
+    def stats(self) -> dict:
+        """Returns the size and eviction counters of the store.
+
+        Returns:
+            dict: The store counters.
+        """
+        with self._mutex:
+            return {
+                'orders': len(self._orders),
+                'bytes': self.bytes_used,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class SQLiteOrderStore(_StripedOrderStore):
+    """Order store in a SQLite database in write-ahead-log mode.
+
+    Each thread gets its own connection. Every `maintenance_interval` rows
+    written by this process, expired orders are purged and, if the table
+    holds more than `max_entries` orders, the least recently updated ones
+    are evicted, so the database stays bounded like the in-memory store
+    without scanning the table on every write. Between passes it may
+    exceed `max_entries` by up to the interval per writing process.
+
+    Several processes can share the database, but the transition locks of
+    `lock` are per process. A cancellation and a return of the same order
+    racing in two processes can both pass their status check, so route the
+    transitions of an order to one process.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int = 100000,
+        ttl_seconds: float = 86400.0,
+        clock: Callable[[], float] = time.time,
+        stripes: int = 64,
+        maintenance_interval: int = 1000,
+    ):
+        """Opens or creates the database.
+
+        Args:
+            path (str | Path): The database file.
+            max_entries (int): The maximum number of orders kept.
+            ttl_seconds (float): How long an order is kept after its last
+                update.
+            clock (Callable[[], float]): The wall-clock time source, which
+                must agree across restarts.
+            stripes (int): The number of per-order transition locks.
+            maintenance_interval (int): The rows written between purge and
+                eviction passes.
+        """
+        super().__init__(stripes)
+        self.path = str(path)
+        self.maintenance_interval = maintenance_interval
+        self._writes_lock = threading.Lock()
+        self._writes_since_maintenance = 0
+        self.evictions = 0
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS orders (
+                    order_id TEXT PRIMARY KEY,
+                    order_timestamp TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    delivery_date TEXT NOT NULL,
+                    payment_method TEXT NOT NULL,
+                    amount TEXT NOT NULL,
+                    sku TEXT NOT NULL,
+                    return_method TEXT,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS orders_updated_at '
+                'ON orders (updated_at)'
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the connection of the calling thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, order_id: str) -> OrderRecord | None:
+        """Returns an order record.
+
+        Args:
+            order_id (str): The order ID.
+
+        Returns:
+            OrderRecord | None: The record, or None if it is unknown or
+            expired.
+        """
+        row = (
+            self._connection()
+            .execute(
+                f'SELECT {", ".join(_RECORD_FIELDS)} FROM orders '
+                'WHERE order_id = ? AND updated_at > ?',
+                (order_id, self.clock() - self.ttl_seconds),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        values = dict(zip(_RECORD_FIELDS, row, strict=True))
+        values['order_timestamp'] = datetime.fromisoformat(
+            values['order_timestamp']
+        )
+        values['delivery_date'] = datetime.fromisoformat(
+            values['delivery_date']
+        )
+        return OrderRecord(**values)
+
+    def put(self, record: OrderRecord) -> None:
+        """Stores an order record, replacing any previous version.
+
+        Args:
+            record (OrderRecord): The record to store.
+        """
+        self.put_many((record,))
+
+    def put_many(self, records: Iterable[OrderRecord]) -> int:
+        """Stores a batch of order records in one transaction.
+
+        Args:
+            records (Iterable[OrderRecord]): The records to store.
+
+        Returns:
+            int: The number of records stored.
+        """
+        now = self.clock()
+        rows = []
+        for record in records:
+            values = [getattr(record, name) for name in _RECORD_FIELDS]
+            values[1] = record.order_timestamp.isoformat()
+            values[3] = record.delivery_date.isoformat()
+            rows.append((*values, now))
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO orders '
+                f'({", ".join(_RECORD_FIELDS)}, updated_at) '
+                f'VALUES ({", ".join("?" * (len(_RECORD_FIELDS) + 1))})',
+                rows,
+            )
+        with self._writes_lock:
+            self._writes_since_maintenance += len(rows)
+            due = self._writes_since_maintenance >= self.maintenance_interval
+            if due:
+                self._writes_since_maintenance = 0
+        if due:
+            self.maintain()
+        return len(rows)
+
+    def maintain(self) -> None:
+        """Purges expired orders and evicts the oldest beyond capacity.
+
+        Both deletes walk the `updated_at` index from the oldest row, so a
+        pass costs the rows it removes plus one count.
+        """
+        with self._connection() as connection:
+            connection.execute(
+                'DELETE FROM orders WHERE updated_at <= ?',
+                (self.clock() - self.ttl_seconds,),
+            )
+            (count,) = connection.execute(
+                'SELECT COUNT(*) FROM orders'
+            ).fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    'DELETE FROM orders WHERE order_id IN ('
+                    'SELECT order_id FROM orders ORDER BY updated_at '
+                    'LIMIT ?)',
+                    (excess,),
+                )
+                with self._writes_lock:
+                    self.evictions += excess
+
+
+_order_store: OrderStore | None = None
+_order_store_lock = threading.Lock()
+
+
+def get_order_store() -> OrderStore:
+    """Returns the process-wide order store, building it on first use.
+
+    `ORDER_STORE_BACKEND` selects `memory` (default) or `sqlite`, stored at
+    `ORDER_STORE_PATH`. Capacity and lifetime come from
+    `ORDER_STORE_MAX_ENTRIES`, `ORDER_STORE_MAX_BYTES` and
+    `ORDER_STORE_TTL_SECONDS`.
+
+    Returns:
+        OrderStore: The store.
+    """
+    global _order_store
+    if _order_store is None:
+        with _order_store_lock:
+            if _order_store is None:
+                _order_store = _build_order_store()
+    return _order_store
+
+
+def _build_order_store() -> OrderStore:
+    """Builds the order store selected by the environment."""
+    backend = os.environ.get('ORDER_STORE_BACKEND', 'memory').lower()
+    ttl_seconds = float(os.environ.get('ORDER_STORE_TTL_SECONDS', 86400))
+    if backend == 'sqlite':
+        return SQLiteOrderStore(
+            os.environ.get('ORDER_STORE_PATH', 'orders.sqlite3'),
+            max_entries=int(os.environ.get('ORDER_STORE_MAX_ENTRIES', 100000)),
+            ttl_seconds=ttl_seconds,
+        )
+    if backend == 'memory':
+        return InMemoryOrderStore(
+            max_entries=int(os.environ.get('ORDER_STORE_MAX_ENTRIES', 10000)),
+            max_bytes=int(
+                os.environ.get('ORDER_STORE_MAX_BYTES', 16 * 1024 * 1024)
+            ),
+            ttl_seconds=ttl_seconds,
+        )
+    raise ValueError(f'Unknown ORDER_STORE_BACKEND: {backend}')
+
+
+def set_order_store(store: OrderStore | None) -> None:
+    """Replaces the process-wide order store.
+
+    Args:
+        store (OrderStore | None): The new store, or None to rebuild it
+            from the environment on next use.
+    """
+    global _order_store
+    with _order_store_lock:
+        _order_store = store
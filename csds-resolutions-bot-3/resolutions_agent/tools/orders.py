@@ -0,0 +1,186 @@
+"""Typed order lookups shared by the order tools."""
+
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from .catalog import Product, get_catalog
+from .order_store import OrderRecord, get_order_store
+from .synthetic_orders import OrderProfile, SyntheticOrderGenerator
+
+REMORSE_PERIOD = timedelta(minutes=45)
+
+
+@dataclass(frozen=True, slots=True)
+class OrderStatus:
+    """An order together with everything derived from its record.
+
+    Attributes:
+        record (OrderRecord): The stored order.
+        product (Product | None): The ordered product, looked up by SKU, or
+            None if the SKU is no longer in the catalog.
+        in_remorse_period (bool): Whether the order was placed within the
+            remorse period.
+        remorse_minutes_left (int): Whole minutes left in the remorse
+            period.
+    """
+
+    record: OrderRecord
+    product: Product | None
+    in_remorse_period: bool
+    remorse_minutes_left: int
+
+    @property
+    def product_name(self) -> str:
+        """The product name, or the SKU if it left the catalog."""
+        if self.product is None:
+            return f'item {self.record.sku}'
+        return self.product.name
+
+    def product_dict(self) -> dict:
+        """Returns the product in the shape reported by the order tools.
+
+        Returns:
+            dict: The product, or only its SKU if it left the catalog.
+        """
+        if self.product is None:
+            return {'sku': self.record.sku}
+        return self.product.to_dict()
+
+    @property
+    def can_cancel(self) -> bool:
+        """Whether the order is still processing and in its remorse period."""
+        return self.in_remorse_period and self.record.status == 'PROCESSING'
+
+    @property
+    def can_return(self) -> bool:
+        """Whether the order has shipped or been delivered."""
+        return self.record.status in ['SHIPPED', 'DELIVERED']
+
+    def to_dict(self) -> dict:
+        """Returns the status in the shape reported by `check_order_status`.
+
+        Returns:
+            dict: The order status information.
+        """
+        record = self.record
+        delivered = record.status == 'DELIVERED'
+        delivery_date = record.delivery_date.strftime('%Y-%m-%d')
+        return {
+            'order_id': record.order_id,
+            'order_timestamp': record.order_timestamp.strftime(
+                '%Y-%m-%d %H:%M:%S'
+            ),
+            'status': record.status,
+            'payment_method': record.payment_method,
+            'total_amount': record.amount,
+            'product': self.product_dict(),
+            'estimated_delivery': None if delivered else delivery_date,
+            'delivery_date': delivery_date if delivered else None,
+            'remorse_period': {
+                'in_remorse_period': self.in_remorse_period,
+                'minutes_left': self.remorse_minutes_left,
+                'can_self_cancel': self.in_remorse_period,
+            },
+            'can_cancel': self.can_cancel,
+            'can_return': self.can_return,
+        }
+
+
+_order_generator: SyntheticOrderGenerator | None = None
+_order_generator_lock = threading.Lock()
+
+
+def get_order_generator() -> SyntheticOrderGenerator:
+    """Returns the process-wide order generator, building it on first use.
+
+    Returns:
+        SyntheticOrderGenerator: The generator over the product catalog
+        configured by the `SYNTHETIC_ORDER_*` environment variables.
+    """
+    global _order_generator
+    if _order_generator is None:
+        with _order_generator_lock:
+            if _order_generator is None:
+                _order_generator = SyntheticOrderGenerator(
+                    get_catalog(), OrderProfile.from_env()
+                )
+    return _order_generator
+
+
+def set_order_generator(generator: SyntheticOrderGenerator | None) -> None:
+    """Replaces the process-wide order generator.
+
+    Args:
+        generator (SyntheticOrderGenerator | None): The new generator, or
+            None to rebuild it from the environment on next use.
+    """
+    global _order_generator
+    with _order_generator_lock:
+        _order_generator = generator
+
+
+def _new_order(order_id: str) -> OrderRecord:
+    """Generates the simulated record of an order seen for the first time."""
+    return get_order_generator().generate(order_id)
+
+
+def lookup_order(order_id: str, now: datetime | None = None) -> OrderStatus:
+    """Looks up an order, generating it the first time it is seen.
+
+    Args:
+        order_id (str): The order ID.
+        now (datetime | None): The time the remorse period is measured
+            against. Defaults to the current time.
+
+    Returns:
+        OrderStatus: The order and its derived status. Its product is None
+        if the stored SKU is not in the current catalog, as with a store
+        filled before the catalog changed.
+    """
+    now = now or datetime.now()
+    record = get_order_store().get_or_create(order_id, _new_order)
+    remorse_end_time = record.order_timestamp + REMORSE_PERIOD
+    return OrderStatus(
+        record=record,
+        product=get_catalog().get(record.sku),
+        in_remorse_period=now < remorse_end_time,
+        remorse_minutes_left=max(
+            0, int((remorse_end_time - now).total_seconds() / 60)
+        ),
+    )
+
+
+def lookup_orders(order_ids: Iterable[str]) -> list[OrderStatus]:
+    """Looks up several orders against the same point in time.
+
+    Args:
+        order_ids (Iterable[str]): The order IDs. Repeated IDs are looked
+            up once.
+
+    Returns:
+        list[OrderStatus]: The orders in the order first given.
+    """
+    now = datetime.now()
+    return [
+        lookup_order(order_id, now) for order_id in dict.fromkeys(order_ids)
+    ]
+
+
+def update_order(order_id: str, **changes: str) -> None:
+    """Applies field changes to a stored order.
+
+    Callers making a status transition should hold the order's lock from
+    `OrderStore.lock` across the check and the update.
+
+    Args:
+        order_id (str): The order ID.
+        **changes (str): The `OrderRecord` fields to set.
+    """
+    store = get_order_store()
+    record = store.get(order_id)
+    if record is not None:
+        for name, value in changes.items():
+            setattr(record, name, value)
+        store.put(record)
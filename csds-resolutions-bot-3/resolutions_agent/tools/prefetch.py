@@ -0,0 +1,176 @@
+"""Speculative order lookups that overlap with instruction retrieval.
+
+The pipeline retrieves instructions before the order agent starts, and the
+order agent's first step is usually to check the order the customer
+already mentioned. When the opening message contains order IDs, their
+lookup starts right away on the tool executor and runs alongside the
+intent and RAG work. The order agent then finds the status in its prompt
+instead of spending a model turn on `check_order_status`.
+
+Configuration:
+    ORDER_PREFETCH_ENABLED: `true` (default) or `false`.
+    ORDER_PREFETCH_PATTERN: The regular expression matching order IDs.
+        Defaults to any of `ORDER_ID_PREFIXES` followed by four or more
+        digits.
+    ORDER_PREFETCH_MAX_ORDERS: The most orders looked up per message.
+    ORDER_PREFETCH_WAIT_SECONDS: How long the order agent waits for a
+        lookup still in flight before falling back to the tool.
+"""
+
+import asyncio
+import os
+import re
+from collections import OrderedDict
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from utils.tracing import annotate, span
+
+from . import tools
+from .async_tools import _timeout, run_blocking
+from .encoding import encode_response
+from .synthetic_orders import ORDER_ID_PREFIXES
+
+PREFETCH_STATE_KEY = 'prefetched_orders'
+
+PREFETCHED_ORDERS_HEADER = '\n\n### Prefetched Order Status ###\n'
+
+DEFAULT_ORDER_ID_PATTERN = rf'\b(?:{"|".join(ORDER_ID_PREFIXES)})[0-9]{{4,}}\b'
+
+_MAX_PENDING = 1024
+
+_pending: OrderedDict[str, asyncio.Task] = OrderedDict()
+
+
+def prefetch_enabled() -> bool:
+    """Returns whether order prefetching is on (`ORDER_PREFETCH_ENABLED`)."""
+    return os.environ.get('ORDER_PREFETCH_ENABLED', 'true').lower() == 'true'
+
+
+def extract_order_ids(text: str) -> list[str]:
+    """Finds the order IDs mentioned in a message.
+
+    Args:
+        text (str): The customer's message.
+
+    Returns:
+        list[str]: The upper-cased order IDs in order of first mention, at
+        most `ORDER_PREFETCH_MAX_ORDERS` of them.
+    """
+    pattern = os.environ.get(
+        'ORDER_PREFETCH_PATTERN', DEFAULT_ORDER_ID_PATTERN
+    )
+    order_ids = dict.fromkeys(
+        match.upper() for match in re.findall(pattern, text, re.IGNORECASE)
+    )
+    max_orders = int(os.environ.get('ORDER_PREFETCH_MAX_ORDERS', 5))
+    return list(order_ids)[:max_orders]
+
+
+async def _lookup(
+    order_ids: list[str], invocation_id: str
+) -> tuple[str, dict]:
+    """Looks up orders with the payload of the tool the model would call."""
+    with span('prefetch.orders', invocation_id, orders=len(order_ids)):
+        if len(order_ids) == 1:
+            payload = await run_blocking(
+                tools.check_order_status_payload,
+                order_ids[0],
+                timeout=_timeout('TOOL_TIMEOUT_SECONDS', 10),
+            )
+            return 'check_order_status', payload
+        payload = await run_blocking(
+            tools.check_orders_status_payload,
+            order_ids,
+            timeout=_timeout('TOOL_TIMEOUT_SECONDS', 10),
+        )
+        return 'check_orders_status', payload
+
+
+def start_order_prefetch(callback_context: CallbackContext) -> None:
+    """Starts looking up the orders mentioned in the customer's message.
+
+    Usable as the first `before_agent_callback` of the first agent of the
+    pipeline, so it runs even when that agent is skipped. It never skips the
+    agent itself.
+
+    Args:
+        callback_context (CallbackContext): The context of the agent run.
+    """
+    if not prefetch_enabled() or not callback_context.user_content:
+        return None
+    invocation_id = callback_context.invocation_id
+    if invocation_id in _pending:
+        return None
+    message = ' '.join(
+        part.text
+        for part in callback_context.user_content.parts or []
+        if part.text
+    )
+    order_ids = extract_order_ids(message)
+    if not order_ids:
+        return None
+
+    _pending[invocation_id] = asyncio.get_running_loop().create_task(
+        _lookup(order_ids, invocation_id)
+    )
+    while len(_pending) > _MAX_PENDING:
+        _, stale = _pending.popitem(last=False)
+        stale.cancel()
+    return None
+
+
+async def apply_order_prefetch(callback_context: CallbackContext) -> None:
+    """Records the prefetched order status of this turn in session state.
+
+    Usable as a `before_agent_callback` of the order agent. A lookup that
+    is still running gets `ORDER_PREFETCH_WAIT_SECONDS` to finish; after
+    that, or if it failed, the agent checks the order with its tools as
+    usual. It never skips the agent.
+
+    Args:
+        callback_context (CallbackContext): The context of the agent run.
+    """
+    task = _pending.pop(callback_context.invocation_id, None)
+    if task is None:
+        return None
+    try:
+        tool_name, payload = await asyncio.wait_for(
+            task, _timeout('ORDER_PREFETCH_WAIT_SECONDS', 2)
+        )
+    except Exception as e:
+        print(f'Order prefetch not used: {type(e).__name__} {e}')
+        annotate(prefetch_used=False)
+        return None
+
+    # Encoded without the callback context: the prefetched status is only
+    # shown for this turn, so its products must not count as mentioned in
+    # later tool responses.
+    callback_context.state[PREFETCH_STATE_KEY] = {
+        'invocation_id': callback_context.invocation_id,
+        'tool': tool_name,
+        'response': encode_response(tool_name, payload),
+    }
+    annotate(prefetch_used=True)
+    return None
+
+
+def prefetched_orders(context: ReadonlyContext) -> str | None:
+    """Instruction appendix with the order status prefetched this turn.
+
+    Args:
+        context (ReadonlyContext): The context of the agent run.
+
+    Returns:
+        str | None: The prefetched status under its heading, or None if
+        nothing was prefetched for the current turn.
+    """
+    prefetched = context.state.get(PREFETCH_STATE_KEY)
+    if not prefetched or prefetched['invocation_id'] != context.invocation_id:
+        return None
+    return (
+        f'{PREFETCHED_ORDERS_HEADER}'
+        f'Result of `{prefetched["tool"]}` for the orders in the '
+        "customer's message, fetched at the start of this turn:\n"
+        f'{prefetched["response"]}'
+    )
@@ -0,0 +1,420 @@
+"""Retriever backends for looking up knowledge base contexts."""
+
+import json
+import os
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Protocol
+
+import numpy as np
+from utils.resilience import resilient_call
+from utils.tracing import annotate
+
+from .embeddings import Embedder, HashingEmbedder, VertexTextEmbedder
+from .knowledge_base import (
+    entry_document_text,
+    entry_search_text,
+    intent_of_document,
+    knowledge_base_entry,
+    load_knowledge_base,
+)
+
+
+@dataclass(frozen=True)
+class RetrievedContext:
+    """A single context returned by a retriever.
+
+    Attributes:
+        text (str): The retrieved text.
+        distance (float): The vector distance to the query; lower is closer.
+        source_uri (str): Where the context came from.
+        intent (str | None): The knowledge base intent of the context, when
+            the backend can tell.
+    """
+
+    text: str
+    distance: float
+    source_uri: str = ''
+    intent: str | None = None
+
+
+class Retriever(Protocol):
+    """Looks up the knowledge base contexts closest to a query."""
+
+    def retrieve(self, query: str, top_k: int = 3) -> list[RetrievedContext]:
+        """Retrieves the closest contexts to a query.
+
+        Args:
+            query (str): The text to search for.
+            top_k (int): The maximum number of contexts to return.
+
+        Returns:
+            list[RetrievedContext]: The contexts, closest first.
+        """
+        ...
+
+
+_INTENT_HEADER = 'Intent: '
+
+rag_call = resilient_call('rag')
+
+if TYPE_CHECKING:
+    from google.cloud import aiplatform_v1
+
+
+def _intent_of(text: str, source_uri: str = '') -> str | None:
+    """Returns the knowledge base intent a retrieved context belongs to.
+
+    Whole-entry JSON and the header of a per-intent document name the
+    intent directly. Any other chunk of a per-intent document is traced back
+    through the document ID in its file name.
+    """
+    if text.startswith(_INTENT_HEADER):
+        return text[len(_INTENT_HEADER) :].split('\n', 1)[0].strip()
+    try:
+        entry = json.loads(text)
+    except ValueError:
+        entry = None
+    if isinstance(entry, dict) and entry.get('intent'):
+        return entry['intent']
+    if source_uri:
+        return intent_of_document(PurePosixPath(source_uri).stem)
+    return None
+
+
+def whole_entry_contexts(
+    contexts: list[RetrievedContext],
+) -> list[RetrievedContext]:
+    """Replaces chunks of known intents by their whole document.
+
+    The closest chunk of each intent keeps its place and distance; further
+    chunks of the same intent are dropped, so the summarizer sees every
+    intent once and never a step cut in half.
+
+    Args:
+        contexts (list[RetrievedContext]): The retrieved contexts, closest
+            first.
+
+    Returns:
+        list[RetrievedContext]: The contexts, one per intent.
+    """
+    whole = []
+    seen = set()
+    for context in contexts:
+        if context.intent is None:
+            whole.append(context)
+            continue
+        if context.intent in seen:
+            continue
+        seen.add(context.intent)
+        entry = knowledge_base_entry(context.intent)
+        if entry is not None:
+            context = replace(context, text=entry_document_text(entry))
+        whole.append(context)
+    return whole
+
+
+def contexts_from_rag_response(
+    retrieval_response: 'aiplatform_v1.RetrieveContextsResponse',
+) -> list[RetrievedContext]:
+    """Converts a Vertex AI RAG response into retrieved contexts.
+
+    Args:
+        retrieval_response (aiplatform_v1.RetrieveContextsResponse): The
+            response object obtained from a rag.retrieval_query call.
+
+    Returns:
+        list[RetrievedContext]: One context per retrieved intent, or per
+        snippet that cannot be traced to an intent.
+    """
+    if not retrieval_response:
+        return []
+    return whole_entry_contexts(
+        [
+            RetrievedContext(
+                text=context.text,
+                distance=context.score,
+                source_uri=context.source_uri,
+                intent=_intent_of(context.text, context.source_uri),
+            )
+            for context in retrieval_response.contexts.contexts
+        ]
+    )
+
+
+class VertexRagRetriever:
+    """Retriever backed by a Vertex AI RAG Engine corpus.
+
+    Queries are retried, hedged and circuit broken by `rag_call`. When the
+    engine still fails, or its circuit is open, the fallback retriever
+    answers instead.
+    """
+
+    def __init__(
+        self,
+        rag_corpus: str | None = None,
+        vector_distance_threshold: float | None = None,
+        fallback: Retriever | None = None,
+    ):
+        """Initializes the retriever.
+
+        Args:
+            rag_corpus (str | None): The corpus resource name. Defaults to
+                the `RAG_CORPUS` environment variable.
+            vector_distance_threshold (float | None): Contexts further than
+                this distance are dropped by the RAG engine.
+            fallback (Retriever | None): The retriever used when the RAG
+                engine is unavailable. Without one, its errors are raised.
+        """
+        self.rag_corpus = rag_corpus or os.environ.get('RAG_CORPUS')
+        self.vector_distance_threshold = vector_distance_threshold
+        self.fallback = fallback
+
+    def query(
+        self, query: str, top_k: int = 3
+    ) -> 'aiplatform_v1.RetrieveContextsResponse':
+        """Sends one retrieval query to the RAG engine.
+
+        Args:
+            query (str): The text to search for.
+            top_k (int): The maximum number of contexts to return.
+
+        Returns:
+            aiplatform_v1.RetrieveContextsResponse: The raw response.
+        """
+        # The RAG client is only imported once the Vertex backend is used.
+        from vertexai import rag
+
+        rag_filter = None
+        if self.vector_distance_threshold is not None:
+            rag_filter = rag.Filter(
+                vector_distance_threshold=self.vector_distance_threshold
+            )
+
+        return rag.retrieval_query(
+            rag_resources=[rag.RagResource(rag_corpus=self.rag_corpus)],
+            text=query,
+            rag_retrieval_config=rag.RagRetrievalConfig(
+                top_k=top_k, filter=rag_filter
+            ),
+        )
+
+    def retrieve(self, query: str, top_k: int = 3) -> list[RetrievedContext]:
+        """Retrieves the closest contexts to a query from the corpus.
+
+        Args:
+            query (str): The text to search for.
+            top_k (int): The maximum number of contexts to return.
+
+        Returns:
+            list[RetrievedContext]: The contexts, closest first.
+        """
+        try:
+            response = rag_call.call(
+                self.query,
+                query,
+                top_k,
+                # Shorter than `RAG_TIMEOUT_SECONDS`, which bounds the
+                # whole lookup, so the fallback still has time to answer.
+                timeout=float(os.environ.get('RAG_ENGINE_TIMEOUT_SECONDS', 8)),
+            )
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            print(
+                f'RAG engine unavailable ({type(e).__name__}); '
+                'using the fallback retriever.'
+            )
+            annotate(rag_fallback=True)
+            return self.fallback.retrieve(query, top_k)
+        return contexts_from_rag_response(response)
+
+
+class LocalVectorRetriever:
+    """In-process retriever over the knowledge base entries.
+
+    Entry embeddings are computed once and kept in a contiguous float32
+    matrix, so a query costs one embedding plus one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[dict],
+        embedder: Embedder | None = None,
+        vector_distance_threshold: float | None = None,
+    ):
+        """Initializes the retriever and embeds every entry.
+
+        Args:
+            entries (Sequence[dict]): The knowledge base entries to index.
+            embedder (Embedder | None): The embedding function. Defaults to
+                a `HashingEmbedder`.
+            vector_distance_threshold (float | None): Contexts further than
+                this cosine distance are dropped.
+        """
+        self.entries = tuple(entries)
+        self.embedder = embedder or HashingEmbedder()
+        self.vector_distance_threshold = vector_distance_threshold
+        self._documents = [entry_document_text(e) for e in self.entries]
+        self._matrix = np.ascontiguousarray(
+            self.embedder.embed([entry_search_text(e) for e in self.entries]),
+            dtype=np.float32,
+        )
+
+    @classmethod
+    def from_knowledge_base(
+        cls,
+        path: Path | None = None,
+        embedder: Embedder | None = None,
+        vector_distance_threshold: float | None = None,
+    ) -> 'LocalVectorRetriever':
+        """Builds a retriever over the knowledge base file.
+
+        Args:
+            path (Path | None): The knowledge base file. Defaults to
+                `knowledge_base_path()`.
+            embedder (Embedder | None): The embedding function.
+            vector_distance_threshold (float | None): Contexts further than
+                this cosine distance are dropped.
+
+        Returns:
+            LocalVectorRetriever: The retriever.
+        """
+        return cls(
+            load_knowledge_base(path), embedder, vector_distance_threshold
+        )
+
+    def similarities(self, query: str) -> np.ndarray:
+        """Scores every entry against a query.
+
+        Args:
+            query (str): The text to search for.
+
+        Returns:
+            np.ndarray: The cosine similarity of each entry, in entry order.
+        """
+        return self._matrix @ self.embedder.embed([query])[0]
+
+    def context(self, index: int, distance: float) -> RetrievedContext:
+        """Builds the retrieved context of an entry.
+
+        Args:
+            index (int): The position of the entry.
+            distance (float): The distance of the entry to the query.
+
+        Returns:
+            RetrievedContext: The context holding the whole entry.
+        """
+        return RetrievedContext(
+            text=self._documents[index],
+            distance=distance,
+            source_uri=f'kb://entries/{index}',
+            intent=self.entries[index]['intent'],
+        )
+
+    def retrieve(self, query: str, top_k: int = 3) -> list[RetrievedContext]:
+        """Retrieves the closest entries to a query.
+
+        Args:
+            query (str): The text to search for.
+            top_k (int): The maximum number of contexts to return.
+
+        Returns:
+            list[RetrievedContext]: The contexts, closest first.
+        """
+        top_k = min(top_k, len(self.entries))
+        if top_k <= 0:
+            return []
+
+        similarities = self.similarities(query)
+        top = np.argpartition(-similarities, top_k - 1)[:top_k]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+
+        contexts = []
+        for index in top:
+            distance = float(1.0 - similarities[index])
+            if (
+                self.vector_distance_threshold is not None
+                and distance > self.vector_distance_threshold
+            ):
+                break
+            contexts.append(self.context(index, distance))
+        return contexts
+
+
+_retriever: Retriever | None = None
+_retriever_lock = threading.Lock()
+
+
+def _build_embedder() -> Embedder:
+    """Builds the embedding function selected by `RAG_EMBEDDER`."""
+    embedder_name = os.environ.get('RAG_EMBEDDER', 'hashing').lower()
+    if embedder_name == 'vertex':
+        return VertexTextEmbedder()
+    if embedder_name == 'hashing':
+        return HashingEmbedder()
+    raise ValueError(f'Unknown RAG_EMBEDDER: {embedder_name}')
+
+
+def _build_retriever() -> Retriever:
+    """Builds the retriever selected by the environment.
+
+    `RAG_RETRIEVER` picks the backend (`vertex`, `local` or `hybrid`),
+    `RAG_EMBEDDER` picks the embedding function of the in-process backends
+    (`hashing` or `vertex`), `RAG_VECTOR_DISTANCE_THRESHOLD` drops distant
+    contexts for the vector backends, `RAG_RERANK` enables the local
+    reranker of the hybrid backend, and `RAG_FALLBACK` (`local` or `none`)
+    picks what answers when the RAG engine is unavailable.
+    """
+    backend = os.environ.get('RAG_RETRIEVER', 'vertex').lower()
+    threshold = os.environ.get('RAG_VECTOR_DISTANCE_THRESHOLD')
+    threshold = float(threshold) if threshold else None
+    if backend == 'vertex':
+        fallback = None
+        if os.environ.get('RAG_FALLBACK', 'local').lower() == 'local':
+            # The fallback must not depend on Vertex AI, so it always uses
+            # the offline embedder.
+            fallback = LocalVectorRetriever.from_knowledge_base()
+        return VertexRagRetriever(
+            vector_distance_threshold=threshold, fallback=fallback
+        )
+    if backend == 'local':
+        return LocalVectorRetriever.from_knowledge_base(
+            embedder=_build_embedder(), vector_distance_threshold=threshold
+        )
+    if backend == 'hybrid':
+        from .hybrid import HybridRetriever
+
+        return HybridRetriever.from_knowledge_base(
+            embedder=_build_embedder(),
+            rerank=os.environ.get('RAG_RERANK', 'false').lower() == 'true',
+        )
+    raise ValueError(f'Unknown RAG_RETRIEVER: {backend}')
+
+
+def get_retriever() -> Retriever:
+    """Returns the process-wide retriever, building it on first use.
+
+    Returns:
+        Retriever: The configured retriever.
+    """
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = _build_retriever()
+    return _retriever
+
+
+def set_retriever(retriever: Retriever | None) -> None:
+    """Replaces the process-wide retriever.
+
+    Args:
+        retriever (Retriever | None): The retriever to use, or None to
+            rebuild it from the environment on next use.
+    """
+    global _retriever
+    with _retriever_lock:
+        _retriever = retriever
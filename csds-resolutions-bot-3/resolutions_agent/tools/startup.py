@@ -0,0 +1,113 @@
+"""Optional warm-up of the lazily built clients and indexes.
+
+Models, the retriever, the knowledge base artifacts and the prompts are all
+built on first use, which keeps imports cheap but makes the first
+conversation of a worker pay for them. Warming up builds them ahead of the
+first request instead.
+
+Configuration:
+    STARTUP_WARM_UP: `none` (default), `background` to warm up in a daemon
+        thread while the server starts, or `blocking` to warm up before the
+        agent module finishes importing.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from google.adk.agents import BaseAgent
+from utils.prompts import prompt_registry
+
+from . import tools
+from .cache import get_instruction_cache
+from .catalog import get_catalog
+from .guides import load_resolution_guides
+from .intent_router import get_intent_classifier, router_enabled
+from .knowledge_base import load_kb_documents
+from .order_store import get_order_store
+from .retrievers import get_retriever
+
+
+def _agents(agent: BaseAgent) -> list[BaseAgent]:
+    """Returns an agent and all of its sub-agents."""
+    agents = [agent]
+    for sub_agent in agent.sub_agents:
+        agents.extend(_agents(sub_agent))
+    return agents
+
+
+def warm_up_steps(root_agent: BaseAgent) -> list[tuple[str, Callable]]:
+    """Lists the warm-up steps of an agent tree.
+
+    Args:
+        root_agent (BaseAgent): The root of the agent tree.
+
+    Returns:
+        list[tuple[str, Callable]]: The name and function of each step.
+    """
+    steps = [
+        (
+            'prompts',
+            lambda: [t.text for t in prompt_registry.templates()],
+        ),
+        ('kb_documents', load_kb_documents),
+        ('resolution_guides', load_resolution_guides),
+        ('retriever', get_retriever),
+        ('instruction_cache', get_instruction_cache),
+        ('order_store', get_order_store),
+        ('product_catalog', get_catalog),
+    ]
+    if router_enabled():
+        steps.append(('intent_router', get_intent_classifier))
+    warm_up_summary = getattr(tools.summary_model, 'warm_up', None)
+    if warm_up_summary is not None:
+        steps.append(('model.summarizer', warm_up_summary))
+    for agent in _agents(root_agent):
+        warm_up_model = getattr(getattr(agent, 'model', None), 'warm_up', None)
+        if warm_up_model is not None:
+            steps.append((f'model.{agent.name}', warm_up_model))
+    return steps
+
+
+def warm_up(root_agent: BaseAgent) -> dict[str, float]:
+    """Builds everything the first conversation would otherwise build.
+
+    A failing step is logged and skipped; it is retried on first use.
+
+    Args:
+        root_agent (BaseAgent): The root of the agent tree.
+
+    Returns:
+        dict[str, float]: The seconds each step took, keyed by step.
+    """
+    timings = {}
+    for name, step in warm_up_steps(root_agent):
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f'Warm-up step {name} failed: {type(e).__name__} {e}')
+        timings[name] = time.perf_counter() - start
+    print(
+        f'Warmed up in {sum(timings.values()):.2f}s: '
+        + ', '.join(f'{name} {t * 1000:.0f}ms' for name, t in timings.items())
+    )
+    return timings
+
+
+def start_warm_up(root_agent: BaseAgent) -> None:
+    """Warms up as configured by `STARTUP_WARM_UP`.
+
+    Args:
+        root_agent (BaseAgent): The root of the agent tree.
+    """
+    mode = os.environ.get('STARTUP_WARM_UP', 'none').lower()
+    if mode == 'blocking':
+        warm_up(root_agent)
+    elif mode == 'background':
+        threading.Thread(
+            target=warm_up, args=(root_agent,), name='warm-up', daemon=True
+        ).start()
+    elif mode != 'none':
+        raise ValueError(f'Unknown STARTUP_WARM_UP: {mode}')
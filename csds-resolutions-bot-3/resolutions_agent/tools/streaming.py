@@ -0,0 +1,155 @@
+"""Streaming summary generation for resolution instructions."""
+
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+_MAX_STREAMS = 1024
+
+
+def streaming_enabled() -> bool:
+    """Returns whether summaries are streamed (`INSTRUCTIONS_STREAMING`)."""
+    return os.environ.get('INSTRUCTIONS_STREAMING', 'false').lower() == 'true'
+
+
+def usable_prefix(text: str, min_chars: int) -> str | None:
+    """Returns the longest prefix made of complete lines, if long enough.
+
+    Args:
+        text (str): The text generated so far.
+        min_chars (int): The minimum length of a usable prefix.
+
+    Returns:
+        str | None: The text up to its last line break, or None if that is
+        shorter than `min_chars`.
+    """
+    prefix = text[: text.rfind('\n') + 1].strip()
+    return prefix if prefix and len(prefix) >= min_chars else None
+
+
+class InstructionStream:
+    """Instructions that are still being generated by the summary model.
+
+    Consumers can wait for a usable prefix or read the text generated so
+    far.
+    """
+
+    def __init__(self, stream_id: str):
+        """Initializes an empty stream.
+
+        Args:
+            stream_id (str): The identifier stored in session state.
+        """
+        self.stream_id = stream_id
+        self.done = False
+        self.error: str | None = None
+        self.task: asyncio.Task | None = None
+        self._parts: list[str] = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def text(self) -> str:
+        """The instructions generated so far."""
+        return ''.join(self._parts).strip()
+
+    async def append(self, part: str) -> None:
+        """Adds generated text and wakes up waiting consumers.
+
+        Args:
+            part (str): The new text.
+        """
+        async with self._changed:
+            self._parts.append(part)
+            self._changed.notify_all()
+
+    async def finish(self, error: str | None = None) -> None:
+        """Marks the stream as complete.
+
+        Args:
+            error (str | None): The error that ended the stream, if any.
+        """
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def wait_for_prefix(self, min_chars: int, timeout: float) -> str:
+        """Waits until a usable prefix exists or the stream ends.
+
+        Args:
+            min_chars (int): The minimum length of a usable prefix.
+            timeout (float): Seconds to wait before raising `TimeoutError`.
+
+        Returns:
+            str: The usable prefix, or the full text if the stream ended
+            first.
+        """
+        async with self._changed:
+            await asyncio.wait_for(
+                self._changed.wait_for(
+                    lambda: self.done or usable_prefix(self.text, min_chars)
+                ),
+                timeout,
+            )
+        if self.error and not self.text:
+            raise RuntimeError(self.error)
+        return usable_prefix(self.text, min_chars) or self.text
+
+
+_streams: OrderedDict[str, InstructionStream] = OrderedDict()
+
+
+def get_instruction_stream(stream_id: str | None) -> InstructionStream | None:
+    """Returns a stream started in this process.
+
+    Args:
+        stream_id (str | None): The identifier stored in session state.
+
+    Returns:
+        InstructionStream | None: The stream, or None if it is unknown.
+    """
+    return _streams.get(stream_id) if stream_id else None
+
+
+def start_instruction_stream(
+    model: Any,
+    prompt: str,
+    on_complete: Callable[[str], None] | None = None,
+) -> InstructionStream:
+    """Starts streaming a summary in the background.
+
+    Args:
+        model (Any): A `GenerativeModel` with `generate_content_async`.
+        prompt (str): The summary prompt.
+        on_complete (Callable[[str], None] | None): Called with the full
+            text once the stream ends without error.
+
+    Returns:
+        InstructionStream: The stream being filled.
+    """
+    stream = InstructionStream(uuid.uuid4().hex)
+
+    async def consume() -> None:
+        try:
+            chunks = await model.generate_content_async(prompt, stream=True)
+            async for chunk in chunks:
+                await stream.append(chunk.text)
+        except asyncio.CancelledError:
+            await stream.finish(error='cancelled')
+            raise
+        except Exception as e:
+            print(f'Error during streaming summarization: {e}')
+            await stream.finish(error=str(e))
+            return
+        await stream.finish()
+        if on_complete and stream.text:
+            on_complete(stream.text)
+
+    stream.task = asyncio.get_running_loop().create_task(consume())
+    _streams[stream.stream_id] = stream
+    while len(_streams) > _MAX_STREAMS:
+        _streams.popitem(last=False)
+    return stream
@@ -0,0 +1,368 @@
+"""Deterministic synthetic orders for the simulated order tools.
+
+Every order is derived from a hash of its ID and a seed, so the same ID
+always yields the same status, age and product, in any process and whether
+it is generated on first lookup or pre-generated in bulk. Hashing and the
+draws are vectorized with numpy, which lets a load test fill the order
+store with millions of orders in batches.
+
+Orders whose ID starts with a status prefix (`WN` processing, `WG`
+shipped) get that status; the others draw theirs from the configured
+weights. Ages are drawn uniformly from a per-status range of minutes.
+Products are drawn from the catalog, uniformly or from category weights and
+then uniformly within the category, and orders reference them by SKU.
+
+Configuration:
+    SYNTHETIC_ORDER_SEED: The seed mixed into every order hash.
+    SYNTHETIC_ORDER_STATUS_WEIGHTS: The status weights of IDs without a
+        status prefix, such as `DELIVERED=7,SHIPPED=2,PROCESSING=1`.
+    SYNTHETIC_ORDER_AGE_MINUTES: Per-status age ranges overriding the
+        defaults, such as `SHIPPED=1440-4320`.
+    SYNTHETIC_ORDER_CATEGORY_WEIGHTS: The product category weights, such
+        as `Power Tools=3,Lighting=1`. Categories not listed are never
+        ordered; defaults to uniform over all products.
+"""
+
+import os
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .catalog import ProductCatalog, format_price
+from .hashing import fnv1a_64, splitmix64
+from .order_store import OrderRecord, OrderStore
+
+# The delivery date relative to generation time and the payment method of
+# each status.
+STATUS_DETAILS = {
+    'PROCESSING': (timedelta(days=5), 'Credit Card'),
+    'SHIPPED': (timedelta(days=2), 'Debit Card'),
+    'DELIVERED': (timedelta(days=-1), 'PayPal'),
+}
+
+DEFAULT_PREFIX_STATUSES = {'WN': 'PROCESSING', 'WG': 'SHIPPED'}
+
+# The prefixes of the order IDs the order tools are given.
+ORDER_ID_PREFIXES = ('WN', 'WG', 'HD')
+
+DEFAULT_AGE_MINUTES = {
+    'PROCESSING': (0, 45),
+    'SHIPPED': (1 * 1440, 3 * 1440),
+    'DELIVERED': (4 * 1440, 10 * 1440),
+}
+
+# Independent draws per order: status, age, product or category, and the
+# product within the category.
+_STATUS_DRAW, _AGE_DRAW, _PRODUCT_DRAW, _CATEGORY_PRODUCT_DRAW = range(4)
+
+
+def hash_order_ids(order_ids: Sequence[str], seed: int = 0) -> np.ndarray:
+    """Hashes order IDs with 64-bit FNV-1a mixed with a seed.
+
+    Args:
+        order_ids (Sequence[str]): The order IDs.
+        seed (int): The seed.
+
+    Returns:
+        np.ndarray: One uint64 hash per ID.
+    """
+    seed_hash = splitmix64(np.full(1, seed % 2**64, dtype=np.uint64), 0)
+    return fnv1a_64(order_ids) ^ seed_hash
+
+
+def _uniform(hashes: np.ndarray, stream: int) -> np.ndarray:
+    """Returns one uniform float in [0, 1) per hash for a draw."""
+    return (splitmix64(hashes, stream) >> np.uint64(11)) * 2.0**-53
+
+
+def _parse_mapping(value: str) -> dict[str, str]:
+    """Parses `KEY=VALUE,...` into a dict."""
+    pairs = (item.split('=', 1) for item in value.split(',') if item.strip())
+    return {key.strip(): setting.strip() for key, setting in pairs}
+
+
+@dataclass(frozen=True)
+class OrderProfile:
+    """The distributions synthetic orders are drawn from.
+
+    Attributes:
+        seed (int): The seed mixed into every order hash.
+        status_weights (dict[str, float]): The status weights of IDs
+            without a status prefix.
+        prefix_statuses (dict[str, str]): The status of IDs starting with
+            each prefix.
+        age_minutes (dict[str, tuple[int, int]]): The inclusive range of
+            the age in minutes of each status; statuses not listed keep
+            `DEFAULT_AGE_MINUTES`.
+        category_weights (dict[str, float] | None): The product category
+            weights, or None for uniform over all products.
+    """
+
+    seed: int = 0
+    status_weights: dict[str, float] = field(
+        default_factory=lambda: {'DELIVERED': 1.0}
+    )
+    prefix_statuses: dict[str, str] = field(
+        default_factory=lambda: dict(DEFAULT_PREFIX_STATUSES)
+    )
+    age_minutes: dict[str, tuple[int, int]] = field(
+        default_factory=lambda: dict(DEFAULT_AGE_MINUTES)
+    )
+    category_weights: dict[str, float] | None = None
+
+    @classmethod
+    def from_env(cls) -> 'OrderProfile':
+        """Builds the profile configured by the `SYNTHETIC_ORDER_*` vars.
+
+        Returns:
+            OrderProfile: The profile.
+        """
+        options = {'seed': int(os.environ.get('SYNTHETIC_ORDER_SEED', 0))}
+        status_weights = os.environ.get('SYNTHETIC_ORDER_STATUS_WEIGHTS')
+        if status_weights:
+            options['status_weights'] = {
+                status: float(weight)
+                for status, weight in _parse_mapping(status_weights).items()
+            }
+        age_minutes = os.environ.get('SYNTHETIC_ORDER_AGE_MINUTES')
+        if age_minutes:
+            options['age_minutes'] = dict(DEFAULT_AGE_MINUTES)
+            for status, bounds in _parse_mapping(age_minutes).items():
+                low, high = bounds.split('-')
+                options['age_minutes'][status] = (int(low), int(high))
+        category_weights = os.environ.get('SYNTHETIC_ORDER_CATEGORY_WEIGHTS')
+        if category_weights:
+            options['category_weights'] = {
+                category: float(weight)
+                for category, weight in _parse_mapping(
+                    category_weights
+                ).items()
+            }
+        return cls(**options)
+
+
+def _cumulative(weights: Mapping[str, float]) -> tuple[list[str], np.ndarray]:
+    """Returns the keys and normalized cumulative weights of a mapping."""
+    keys = [key for key, weight in weights.items() if weight > 0]
+    if not keys:
+        raise ValueError(f'No positive weights in {dict(weights)}')
+    cumulative = np.cumsum([weights[key] for key in keys], dtype=np.float64)
+    return keys, cumulative / cumulative[-1]
+
+
+class SyntheticOrderGenerator:
+    """Generates the orders of an `OrderProfile` from their IDs."""
+
+    def __init__(
+        self, catalog: ProductCatalog, profile: OrderProfile | None = None
+    ):
+        """Validates the profile and precomputes its distributions.
+
+        Args:
+            catalog (ProductCatalog): The orderable products.
+            profile (OrderProfile | None): The distributions. Defaults to
+                `OrderProfile()`.
+
+        Raises:
+            ValueError: If the profile names an unknown status or a
+                category without products, or has no positive weight.
+        """
+        self.profile = profile or OrderProfile()
+        self.catalog = catalog
+        statuses = (
+            set(self.profile.status_weights)
+            | set(self.profile.prefix_statuses.values())
+            | set(self.profile.age_minutes)
+        )
+        unknown = statuses - set(STATUS_DETAILS)
+        if unknown:
+            raise ValueError(f'Unknown order statuses: {sorted(unknown)}')
+        if not len(catalog):
+            raise ValueError('The product catalog is empty')
+        category_weights = self.profile.category_weights
+        if category_weights is not None:
+            unknown = {
+                category
+                for category, weight in category_weights.items()
+                if weight > 0 and not len(catalog.category_rows(category))
+            }
+            if unknown:
+                raise ValueError(
+                    f'Categories without products: {sorted(unknown)}'
+                )
+
+        self._status_names, self._status_cdf = _cumulative(
+            self.profile.status_weights
+        )
+        self._categories, self._category_cdf = (
+            _cumulative(category_weights)
+            if category_weights is not None
+            else (None, None)
+        )
+        self._statuses = list(STATUS_DETAILS)
+        age_minutes = {**DEFAULT_AGE_MINUTES, **self.profile.age_minutes}
+        self._age_bounds = np.array(
+            [age_minutes[status] for status in self._statuses],
+            dtype=np.int64,
+        )
+
+    def records(
+        self, order_ids: Sequence[str], now: datetime | None = None
+    ) -> list[OrderRecord]:
+        """Generates the records of a batch of orders.
+
+        Args:
+            order_ids (Sequence[str]): The order IDs.
+            now (datetime | None): The time ages and delivery dates are
+                relative to. Defaults to the current time.
+
+        Returns:
+            list[OrderRecord]: One record per ID, in the same order.
+        """
+        if not order_ids:
+            return []
+        now = now or datetime.now()
+        hashes = hash_order_ids(order_ids, self.profile.seed)
+
+        # Index into self._statuses, from the prefix or else the weights.
+        drawn = np.searchsorted(
+            self._status_cdf, _uniform(hashes, _STATUS_DRAW), side='right'
+        )
+        status_index = np.array(
+            [self._statuses.index(name) for name in self._status_names]
+        )[drawn]
+        ids = np.array(order_ids)
+        for prefix, status in self.profile.prefix_statuses.items():
+            status_index[np.char.startswith(ids, prefix)] = (
+                self._statuses.index(status)
+            )
+
+        low, high = self._age_bounds[status_index].T
+        age_minutes = low + (
+            _uniform(hashes, _AGE_DRAW) * (high - low + 1)
+        ).astype(np.int64)
+        timestamps = np.datetime64(now, 'us') - age_minutes.astype(
+            'timedelta64[m]'
+        )
+        product_draws = _uniform(hashes, _PRODUCT_DRAW)
+        if self._categories is None:
+            rows = self.catalog.pick(product_draws)
+        else:
+            category_index = np.searchsorted(
+                self._category_cdf, product_draws, side='right'
+            )
+            rows = self.catalog.pick(
+                _uniform(hashes, _CATEGORY_PRODUCT_DRAW),
+                [self._categories[index] for index in category_index],
+            )
+
+        details = [
+            (
+                status,
+                now + STATUS_DETAILS[status][0],
+                STATUS_DETAILS[status][1],
+            )
+            for status in self._statuses
+        ]
+        records = []
+        for order_id, order_timestamp, status, sku, price in zip(
+            order_ids,
+            timestamps.tolist(),
+            status_index.tolist(),
+            self.catalog.skus(rows),
+            self.catalog.prices(rows).tolist(),
+            strict=True,
+        ):
+            status, delivery_date, payment_method = details[status]
+            records.append(
+                OrderRecord(
+                    order_id=order_id,
+                    order_timestamp=order_timestamp,
+                    status=status,
+                    delivery_date=delivery_date,
+                    payment_method=payment_method,
+                    amount=format_price(price),
+                    sku=sku,
+                )
+            )
+        return records
+
+    def generate(
+        self, order_id: str, now: datetime | None = None
+    ) -> OrderRecord:
+        """Generates the record of one order.
+
+        Args:
+            order_id (str): The order ID.
+            now (datetime | None): The time ages and delivery dates are
+                relative to. Defaults to the current time.
+
+        Returns:
+            OrderRecord: The record.
+        """
+        return self.records([order_id], now)[0]
+
+    def batches(
+        self,
+        count: int,
+        prefixes: Sequence[str] = ORDER_ID_PREFIXES,
+        batch_size: int = 100000,
+        start: int = 0,
+        digits: int = 8,
+        now: datetime | None = None,
+    ) -> Iterator[list[OrderRecord]]:
+        """Generates orders with sequential IDs in batches.
+
+        IDs cycle through the prefixes, so `prefixes` also sets the share
+        of each prefixed status; for example `WN00000000`, `WG00000001`,
+        `HD00000002`.
+
+        Args:
+            count (int): The number of orders.
+            prefixes (Sequence[str]): The ID prefixes, used in turn.
+            batch_size (int): The orders per batch.
+            start (int): The number of the first order.
+            digits (int): The zero-padded digits of the order number.
+            now (datetime | None): The time ages and delivery dates are
+                relative to. Defaults to the current time.
+
+        Yields:
+            list[OrderRecord]: The records of each batch.
+        """
+        now = now or datetime.now()
+        prefix_array = np.array(prefixes)
+        for offset in range(start, start + count, batch_size):
+            numbers = np.arange(
+                offset, min(offset + batch_size, start + count)
+            )
+            order_ids = np.char.add(
+                prefix_array[numbers % len(prefixes)],
+                np.char.zfill(numbers.astype(str), digits),
+            )
+            yield self.records(order_ids.tolist(), now)
+
+
+def preload_orders(
+    store: OrderStore,
+    generator: SyntheticOrderGenerator,
+    count: int,
+    **batch_options,
+) -> int:
+    """Fills an order store with synthetic orders in batches.
+
+    Args:
+        store (OrderStore): The store to fill. A bounded store keeps only
+            its most recent orders.
+        generator (SyntheticOrderGenerator): The generator.
+        count (int): The number of orders.
+        **batch_options: The options of `SyntheticOrderGenerator.batches`.
+
+    Returns:
+        int: The number of orders stored.
+    """
+    return sum(
+        store.put_many(batch)
+        for batch in generator.batches(count, **batch_options)
+    )
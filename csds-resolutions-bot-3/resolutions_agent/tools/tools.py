@@ -2,22 +2,193 @@
 
 # ruff: noqa: E501
 
-import json
+import functools
 import os
-import random
 import uuid
+from collections.abc import Callable
 from datetime import datetime, timedelta
+from typing import Any
+
+from google.adk.tools.tool_context import ToolContext
+from utils.models import SUMMARIZER, tiered_generative_model
+from utils.resilience import resilient_call
+from utils.tracing import annotate, span
+
+from utils import (  # type: ignore
+    assemble_contexts,
+    assembly_stats,
+    concatenate_rag_contexts,
+    context_budget,
+)
+
+from .cache import get_instruction_cache
+from .encoding import encode_response
+from .guides import load_resolution_guides, match_resolution_guide
+from .order_store import get_order_store
+from .orders import lookup_order, lookup_orders, update_order
+from .retrievers import RetrievedContext, get_retriever
 
-from vertexai import rag
-from vertexai.generative_models import GenerativeModel
+summary_model = tiered_generative_model(SUMMARIZER)
 
-from utils import extract_and_concatenate_rag_content  # type: ignore
+# Summaries are expensive, so slow ones are retried rather than hedged.
+summary_call = resilient_call('summary', hedge=False)
 
-summary_model = GenerativeModel(
-    model_name=os.environ.get('GOOGLE_CLOUD_LLM_NAME', '')
+CLARIFICATION_RESPONSE = (
+    'I am struggling to understand. Please provide more details '
+    'about your reason for contacting The Home Depot so I can assist you '
+    'better.'
 )
 
 
+def build_intent_query(intent: str, customer_motivation: str) -> str:
+    """Builds the retrieval query for an intent and customer motivation."""
+    return f"""Intent: {intent},
+        Customer Motivation: {customer_motivation}"""
+
+
+def retrieve_contexts(text: str) -> list[RetrievedContext]:
+    """Retrieves the knowledge base contexts closest to a query."""
+    return get_retriever().retrieve(text, top_k=3)
+
+
+def build_summary_prompt(text: str, contexts: list[RetrievedContext]) -> str:
+    """Builds the prompt asking the summary model to condense contexts.
+
+    The contexts are deduplicated and trimmed to `SUMMARY_CONTEXT_MAX_TOKENS`
+    first; what was left out is added to the current span. They keep the
+    retriever's order, closest first, since the distances of the hybrid
+    retriever do not follow its fused ranking.
+    """
+    assembled = assemble_contexts(
+        [context.text for context in contexts], max_tokens=context_budget()
+    )
+    assembly_stats.record(assembled)
+    annotate(
+        context_tokens=assembled.output_tokens,
+        context_trimmed_tokens=assembled.trimmed_tokens,
+        context_duplicates=assembled.duplicates,
+        context_dropped=assembled.dropped,
+        context_truncated=assembled.truncated,
+    )
+    response = concatenate_rag_contexts(assembled.texts)
+
+    return f"""Given the following intent and customer motivation,
+            {text}
+            and the following step-by-step instructions retrieved from the
+            RAG engine,
+            {response}
+            Please summarize the likely step-by-step instructions an agent
+            would need to follow to resolve the given intent and customer
+            motivation.
+            """
+
+
+def fallback_instructions(contexts: list[RetrievedContext]) -> str:
+    """Returns instructions that need no summary model.
+
+    Served when the summary model fails or its circuit is open: the
+    pre-summarized guide of the closest intent, or else the closest context
+    itself.
+
+    Args:
+        contexts (list[RetrievedContext]): The retrieved contexts, closest
+            first.
+
+    Returns:
+        str: The instructions, or a request for clarification if nothing
+        was retrieved.
+    """
+    if not contexts:
+        return CLARIFICATION_RESPONSE
+    closest = contexts[0]
+    guide = load_resolution_guides().get(closest.intent or '')
+    return guide or closest.text
+
+
+def cached_instructions(intent: str, customer_motivation: str) -> str | None:
+    """Returns the cached instructions of an intent and motivation.
+
+    Whether the cache was hit is added to the current span.
+
+    Args:
+        intent (str): The knowledge base intent.
+        customer_motivation (str): The customer's motivation.
+
+    Returns:
+        str | None: The instructions, or None on a miss or without a cache.
+    """
+    cache = get_instruction_cache()
+    cached_response = cache.get(intent, customer_motivation) if cache else None
+    annotate(cache_hit=cached_response is not None)
+    return cached_response
+
+
+def cache_instructions(
+    intent: str, customer_motivation: str, instructions: str
+) -> None:
+    """Caches the instructions of an intent and motivation, if caching is on.
+
+    Args:
+        intent (str): The knowledge base intent.
+        customer_motivation (str): The customer's motivation.
+        instructions (str): The summarized instructions.
+    """
+    cache = get_instruction_cache()
+    if cache:
+        cache.put(intent, customer_motivation, instructions)
+
+
+def guide_instructions(contexts: list[RetrievedContext]) -> str | None:
+    """Returns the pre-summarized guide matching the contexts, if any.
+
+    Whether a guide matched is added to the current span.
+
+    Args:
+        contexts (list[RetrievedContext]): The retrieved contexts, closest
+            first.
+
+    Returns:
+        str | None: The guide, or None if the contexts need a summary.
+    """
+    guide = match_resolution_guide(contexts)
+    annotate(guide=guide is not None)
+    return guide
+
+
+def retrieval_failed(error: Exception) -> str:
+    """Logs a failed retrieval and returns the response to serve instead.
+
+    Args:
+        error (Exception): The retrieval error.
+
+    Returns:
+        str: A request for clarification.
+    """
+    if isinstance(error, TimeoutError):
+        print('Timed out during RAG retrieval.')
+    else:
+        print(f'Error during RAG retrieval: {error}')
+    return CLARIFICATION_RESPONSE
+
+
+def summary_failed(error: Exception, contexts: list[RetrievedContext]) -> str:
+    """Logs a failed summary and returns the instructions to serve instead.
+
+    Degraded instructions are served but never cached.
+
+    Args:
+        error (Exception): The summary error.
+        contexts (list[RetrievedContext]): The retrieved contexts, closest
+            first.
+
+    Returns:
+        str: The fallback instructions.
+    """
+    print(f'Error during summarization: {type(error).__name__} {error}')
+    annotate(fallback=True)
+    return fallback_instructions(contexts)
+
+
 def get_instructions_for_user_motivation(
     intent: str, customer_motivation: str
 ) -> str:
@@ -42,98 +213,81 @@ def get_instructions_for_user_motivation(
                     appearing, unauthorized access attempts, or
                     difficulty linking purchases to their account."
     """
-    print('\n\n\n\n\nClassifying intent...........')
-    response = (
-        'I am struggling to understand. Please provide more details '
-        'about your reason for contacting The Home Depot so I can assist you '
-        'better.'
-    )
+    with span(
+        'tool.get_instructions_for_user_motivation', intent=intent
+    ) as tool:
+        response = _lookup_instructions(intent, customer_motivation)
+        tool.set(response_chars=len(response))
+    return response
 
-    if intent:
-        text = f"""Intent: {intent},
-        Customer Motivation: {customer_motivation}"""
 
-        # Direct context retrieval
-        rag_retrieval_config = rag.RagRetrievalConfig(
-            top_k=3,
-        )
+def _lookup_instructions(intent: str, customer_motivation: str) -> str:
+    """Runs the cache, retrieval and summary steps of an instruction lookup.
 
+    The blocking counterpart of `async_tools._lookup_instructions`; both
+    are built from the same steps.
+    """
+    if not intent:
+        return CLARIFICATION_RESPONSE
+    cached_response = cached_instructions(intent, customer_motivation)
+    if cached_response is not None:
+        return cached_response
+
+    text = build_intent_query(intent, customer_motivation)
+    try:
+        with span('rag.retrieve', query_chars=len(text)) as retrieval:
+            contexts = retrieve_contexts(text)
+            retrieval.set(contexts=len(contexts))
+    except Exception as e:
+        return retrieval_failed(e)
+
+    response = guide_instructions(contexts)
+    if response is None:
+        prompt = build_summary_prompt(text, contexts)
         try:
-            response = rag.retrieval_query(
-                rag_resources=[
-                    rag.RagResource(
-                        rag_corpus=os.environ.get('RAG_CORPUS'),
-                    )
-                ],
-                text=text,
-                rag_retrieval_config=rag_retrieval_config,
-            )
-
-            response = extract_and_concatenate_rag_content(response)
-
-            prompt = f"""Given the following intent and customer motivation,
-            {text}
-            and the following step-by-step instructions retrieved from the
-            RAG engine,
-            {response}
-            Please summarize the likely step-by-step instructions an agent
-            would need to follow to resolve the given intent and customer
-            motivation.
-            """
+            with span('llm.summarize', prompt_chars=len(prompt)) as llm:
+                response = summary_call.call(
+                    summary_model.generate_content,
+                    prompt,
+                    timeout=float(
+                        os.environ.get('SUMMARY_TIMEOUT_SECONDS', 30)
+                    ),
+                ).text.strip()
+                llm.set(response_chars=len(response))
+        except Exception as e:
+            return summary_failed(e, contexts)
 
-            response = summary_model.generate_content(prompt)
-            response = response.text.strip()
+    cache_instructions(intent, customer_motivation, response)
+    return response
+
+
+def _serialized_per_order(tool: Callable[..., dict]) -> Callable[..., dict]:
+    """Holds the order's transition lock while a tool checks and updates it.
+
+    Concurrent calls for the same order would otherwise both pass the
+    status check before either records its transition. The lock covers the
+    calls of this process only.
+    """
+
+    @functools.wraps(tool)
+    def wrapper(order_id: str, *args: Any, **kwargs: Any) -> dict:
+        with get_order_store().lock(order_id):
+            return tool(order_id, *args, **kwargs)
+
+    return wrapper
 
-        except Exception as e:
-            print(f'Error during RAG retrieval: {e}')
-
-    print(f'RESPONSE: {response}')
-    print('Returning response...\n\n\n\n\n\n\n\n\n')
-    return response  # type: ignore
-
-
-ORDER_CACHE = {}
-
-PRODUCTS = {
-    'DRILL': {
-        'name': 'DeWalt 20V MAX Cordless Drill/Driver Kit',
-        'price': '$149.99',
-        'sku': 'DCD778C2',
-        'category': 'Power Tools',
-    },
-    'DOOR': {
-        'name': '36 in. x 80 in. Craftsman 6-Lite Prefinished Mahogany Front Door',
-        'price': '$499.99',
-        'sku': 'HDPFD6MH36',
-        'category': 'Doors & Windows',
-    },
-    'PLANT': {
-        'name': '10 in. Monstera Deliciosa Indoor Plant in Decorative Planter',
-        'price': '$49.99',
-        'sku': 'MONSPLNT10',
-        'category': 'Garden Center',
-    },
-    'SAW': {
-        'name': 'RYOBI 10 in. 15 Amp Table Saw',
-        'price': '$299.99',
-        'sku': 'RTS12',
-        'category': 'Power Tools',
-    },
-    'LIGHT': {
-        'name': 'Hampton Bay 52 in. LED Indoor Brushed Nickel Ceiling Fan with Light',
-        'price': '$129.99',
-        'sku': 'CF52BN',
-        'category': 'Lighting',
-    },
-}
-
-# Create a persistent store for order details
-ORDER_CACHE = {}
 
 # ==== TOOLS ====
 
 
-def check_order_status(order_id: str) -> str:
+def check_order_status_payload(order_id: str) -> dict:
+    """Builds the `check_order_status` response."""
+    return lookup_order(order_id).to_dict()
+
+
+def check_order_status(  # noqa: D417 - tool_context is injected by ADK
+    order_id: str, tool_context: ToolContext | None = None
+) -> str:
     """Check the current status of an order including remorse period information.
 
     Args:
@@ -142,129 +296,69 @@ def check_order_status(order_id: str) -> str:
     Returns:
         Order status information in JSON format
     """
-    print(f'TOOL USED: check_order_status for {order_id}')
-    now = datetime.now()
-
-    if order_id not in ORDER_CACHE:
-        # First time seeing this order ID, generate and store data
-        # Select a random product
-        product_key = random.choice(list(PRODUCTS.keys()))
-        product = PRODUCTS[product_key]
-
-        # Status based on order prefix
-        if order_id.startswith('WN'):
-            # Processing randomization
-            minutes_ago = random.randint(0, 45)
-            order_timestamp = now - timedelta(minutes=minutes_ago)
-            status = 'PROCESSING'
-            delivery_date = now + timedelta(days=5)
-            payment_method = 'Credit Card'
-            amount = product['price']
-        elif order_id.startswith('WG'):
-            # Shipped orders from 1-3 days ago
-            days_ago = random.randint(1, 3)
-            order_timestamp = now - timedelta(days=days_ago)
-            status = 'SHIPPED'
-            delivery_date = now + timedelta(days=2)
-            payment_method = 'Debit Card'
-            amount = product['price']
-        else:
-            # Delivered orders from 4-10 days ago
-            days_ago = random.randint(4, 10)
-            order_timestamp = now - timedelta(days=days_ago)
-            status = 'DELIVERED'
-            delivery_date = now - timedelta(days=1)
-            payment_method = 'PayPal'
-            amount = product['price']
-
-        # Store data in cache
-        ORDER_CACHE[order_id] = {
-            'order_timestamp': order_timestamp,
-            'status': status,
-            'delivery_date': delivery_date,
-            'payment_method': payment_method,
-            'amount': amount,
-            'product': product,
-        }
+    with span('tool.check_order_status'):
+        return encode_response(
+            'check_order_status',
+            check_order_status_payload(order_id),
+            tool_context,
+        )
 
-    # Use cached data for consistency
-    cached_order = ORDER_CACHE[order_id]
-    order_timestamp = cached_order['order_timestamp']
 
-    # Calculate remorse using cache
-    remorse_end_time = order_timestamp + timedelta(minutes=45)
-    in_remorse_period = now < remorse_end_time
-    remorse_minutes_left = max(
-        0, int((remorse_end_time - now).total_seconds() / 60)
-    )
-
-    response = {
-        'order_id': order_id,
-        'order_timestamp': order_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-        'status': cached_order['status'],
-        'payment_method': cached_order['payment_method'],
-        'total_amount': cached_order['amount'],
-        'product': cached_order['product'],
-        'estimated_delivery': cached_order['delivery_date'].strftime(
-            '%Y-%m-%d'
-        )
-        if cached_order['status'] != 'DELIVERED'
-        else None,
-        'delivery_date': cached_order['delivery_date'].strftime('%Y-%m-%d')
-        if cached_order['status'] == 'DELIVERED'
-        else None,
-        'remorse_period': {
-            'in_remorse_period': in_remorse_period,
-            'minutes_left': remorse_minutes_left,
-            'can_self_cancel': in_remorse_period,
-        },
-        'can_cancel': in_remorse_period,
-        'can_return': cached_order['status'] in ['SHIPPED', 'DELIVERED'],
-    }
+def check_orders_status_payload(order_ids: list[str]) -> dict:
+    """Builds the `check_orders_status` response."""
+    return {'orders': [order.to_dict() for order in lookup_orders(order_ids)]}
 
-    return json.dumps(response, indent=2)
 
+def check_orders_status(  # noqa: D417 - tool_context is injected by ADK
+    order_ids: list[str], tool_context: ToolContext | None = None
+) -> str:
+    """Check the current status of several orders at once, including remorse period information.
 
-def cancel_order(order_id: str) -> str:
-    """Cancel an order if it's still in processing status.
+    Use this instead of repeated check_order_status calls when the customer has more than one order.
 
     Args:
-        order_id: The order ID to cancel
+        order_ids: The order IDs to check
 
     Returns:
-        Cancellation status in JSON format
+        Status information for each order in JSON format
     """
-    print(f'TOOL USED: cancel_order for {order_id}')
+    with span('tool.check_orders_status'):
+        return encode_response(
+            'check_orders_status',
+            check_orders_status_payload(order_ids),
+            tool_context,
+        )
 
+
+@_serialized_per_order
+def cancel_order_payload(order_id: str) -> dict:
+    """Cancels an order if possible and builds the `cancel_order` response."""
     # First check order status
-    status_info = json.loads(check_order_status(order_id))
+    order = lookup_order(order_id)
 
     # Determine if order can be cancelled based on status and remorse period
-    success = status_info['can_cancel']
-    easy_cancel = status_info.get('remorse_period', {}).get(
-        'in_remorse_period', False
-    )
+    success = order.can_cancel
+    easy_cancel = order.in_remorse_period
 
     if success:
         cancellation_id = f'CAN-{uuid.uuid4().hex[:8].upper()}'
         refund_id = f'REF-{uuid.uuid4().hex[:8].upper()}'
         refund_status = 'PROCESSING'
-        refund_amount = status_info['total_amount']
+        refund_amount = order.record.amount
         estimated_refund_date = (datetime.now() + timedelta(days=3)).strftime(
             '%Y-%m-%d'
         )
-        payment_method = status_info['payment_method']
+        payment_method = order.record.payment_method
 
         if easy_cancel:
-            message = f"Your order for {status_info['product']['name']} has been instantly cancelled as it's within the 45-minute remorse period. Your refund of {refund_amount} is being processed."
+            message = f"Your order for {order.product_name} has been instantly cancelled as it's within the 45-minute remorse period. Your refund of {refund_amount} is being processed."
             refund_speed = '1-2 business days'
         else:
-            message = f'Your order for {status_info["product"]["name"]} has been cancelled. Your refund of {refund_amount} is being processed.'
+            message = f'Your order for {order.product_name} has been cancelled. Your refund of {refund_amount} is being processed.'
             refund_speed = '3-5 business days'
 
-        # Update cache to reflect cancelled status
-        if order_id in ORDER_CACHE:
-            ORDER_CACHE[order_id]['status'] = 'CANCELLED'
+        # Update the store to reflect cancelled status
+        update_order(order_id, status='CANCELLED')
     else:
         cancellation_id = None
         refund_id = None
@@ -273,12 +367,12 @@ def cancel_order(order_id: str) -> str:
         estimated_refund_date = None
         payment_method = None
         refund_speed = None
-        message = f'Unable to cancel this order for {status_info["product"]["name"]} - it may already be shipped or delivered, or outside the remorse period'
+        message = f'Unable to cancel this order for {order.product_name} - it may already be shipped or delivered, or outside the remorse period'
 
     response = {
         'success': success,
         'order_id': order_id,
-        'product': status_info['product'],
+        'product': order.product_dict(),
         'status': 'CANCELLED' if success else 'CANCELLATION_FAILED',
         'cancellation_id': cancellation_id,
         'refund_id': refund_id,
@@ -291,53 +385,52 @@ def cancel_order(order_id: str) -> str:
         'message': message,
     }
 
-    return json.dumps(response, indent=2)
+    return response
 
 
-def initiate_return(
-    order_id: str, reason: str, return_method: str = 'ship'
+def cancel_order(  # noqa: D417 - tool_context is injected by ADK
+    order_id: str, tool_context: ToolContext | None = None
 ) -> str:
-    """Initiate a return for a shipped or delivered order with flexible return options.
+    """Cancel an order if it's still in processing status.
 
     Args:
-        order_id: The order ID
-        reason: Reason for the return (e.g., "damaged", "not needed")
-        return_method: How the customer wants to return the item:
-                     "ship" - Get a return shipping label to print at home
-                     "store" - Return at a nearby Home Depot store
-                     "postal" - Drop off at a nearby postal office
+        order_id: The order ID to cancel
 
     Returns:
-        Return request information in JSON format
+        Cancellation status in JSON format
     """
-    print(
-        f'TOOL USED: initiate_return for order {order_id}, reason: {reason}, method: {return_method}'
-    )
+    with span('tool.cancel_order'):
+        return encode_response(
+            'cancel_order', cancel_order_payload(order_id), tool_context
+        )
 
+
+@_serialized_per_order
+def initiate_return_payload(
+    order_id: str, reason: str, return_method: str = 'ship'
+) -> dict:
+    """Initiates a return if possible and builds the `initiate_return` response."""
     # Validate return method
     valid_methods = ['ship', 'store', 'postal']
     if return_method not in valid_methods:
-        return json.dumps(
-            {
-                'success': False,
-                'message': f'Invalid return method. Please choose from: {", ".join(valid_methods)}',
-                'status': 'INVALID_RETURN_METHOD',
-            },
-            indent=2,
-        )
+        return {
+            'success': False,
+            'message': f'Invalid return method. Please choose from: {", ".join(valid_methods)}',
+            'status': 'INVALID_RETURN_METHOD',
+        }
 
     # First check the order status
-    status_info = json.loads(check_order_status(order_id))
+    order = lookup_order(order_id)
 
     # Check if order can be returned (WG or other orders, not WN or must be outside remorse period)
-    success = status_info['status'] in ['SHIPPED', 'DELIVERED']
+    success = order.can_return
 
     if success:
         return_id = f'RET-{uuid.uuid4().hex[:8].upper()}'
         refund_id = f'REF-{uuid.uuid4().hex[:8].upper()}'
 
-        product_name = status_info['product']['name']
-        refund_amount = status_info['total_amount']
+        product_name = order.product_name
+        refund_amount = order.record.amount
 
         # Handle different return methods
         if return_method == 'ship':
@@ -351,7 +444,7 @@ def initiate_return(
             instructions = f"We'll email you a prepaid return label. Take the packaged {product_name} with the attached label to any USPS, UPS, or FedEx location."
 
         # Fix the logical inconsistency with SHIPPED items
-        if status_info['status'] == 'SHIPPED':
+        if order.record.status == 'SHIPPED':
             # Only use this logic if the item isn't reported as damaged/broken
             status = 'RETURN_INITIATED_FOR_SHIPPED_ITEM'
             next_steps = f'Please keep the {product_name} when it arrives and return it {return_location}. {instructions}'
@@ -364,10 +457,10 @@ def initiate_return(
             f'Return initiated successfully for {product_name}. {next_steps}'
         )
 
-        # Update cache to reflect return status
-        if order_id in ORDER_CACHE:
-            ORDER_CACHE[order_id]['status'] = 'RETURN_INITIATED'
-            ORDER_CACHE[order_id]['return_method'] = return_method
+        # Update the store to reflect return status
+        update_order(
+            order_id, status='RETURN_INITIATED', return_method=return_method
+        )
     else:
         return_id = None
         refund_id = None
@@ -375,12 +468,12 @@ def initiate_return(
         return_location = None
         instructions = None
         refund_amount = None
-        message = f'Unable to process return for {status_info["product"]["name"]} - the order is still being processed. Please try cancelling instead.'
+        message = f'Unable to process return for {order.product_name} - the order is still being processed. Please try cancelling instead.'
 
     response = {
         'success': success,
         'order_id': order_id,
-        'product': status_info['product'],
+        'product': order.product_dict(),
         'return_id': return_id,
         'refund_id': refund_id if success else None,
         'status': status,
@@ -396,4 +489,31 @@ def initiate_return(
         'message': message,
     }
 
-    return json.dumps(response, indent=2)
+    return response
+
+
+def initiate_return(  # noqa: D417 - tool_context is injected by ADK
+    order_id: str,
+    reason: str,
+    return_method: str = 'ship',
+    tool_context: ToolContext | None = None,
+) -> str:
+    """Initiate a return for a shipped or delivered order with flexible return options.
+
+    Args:
+        order_id: The order ID
+        reason: Reason for the return (e.g., "damaged", "not needed")
+        return_method: How the customer wants to return the item:
+                     "ship" - Get a return shipping label to print at home
+                     "store" - Return at a nearby Home Depot store
+                     "postal" - Drop off at a nearby postal office
+
+    Returns:
+        Return request information in JSON format
+    """
+    with span('tool.initiate_return'):
+        return encode_response(
+            'initiate_return',
+            initiate_return_payload(order_id, reason, return_method),
+            tool_context,
+        )
@@ -1,26 +1,28 @@
 """Utility functions for the resolutions agent."""
 
 from google.cloud import aiplatform_v1
-from google.protobuf.json_format import MessageToDict
 
-
-def read_instructions_from_file(filepath):
-    """Reads the content of a file and returns it as a string."""
-    with open(filepath, encoding='utf-8') as file:
-        return file.read()
+from .context_assembly import assemble_contexts, assembly_stats, context_budget
 
 
 def extract_and_concatenate_rag_content(
     retrieval_response: aiplatform_v1.RetrieveContextsResponse,
     separator: str = '\n\n',
+    max_tokens: int | None = None,
 ) -> str:
-    """Extracts and concatenates the text.
+    """Extracts and concatenates the text within a token budget.
+
+    Contexts are read straight from the response message, ordered by score
+    (a distance; lower is closer), and deduplicated and trimmed by
+    `assemble_contexts`.
 
     Args:
         retrieval_response (rag.RetrievalResponse): The response object
             obtained from a rag.retrieval_query call.
         separator (str): The string to use to join the retrieved text snippets.
                          Defaults to two newlines.
+        max_tokens (int | None): The token budget of the contexts. Defaults
+            to `SUMMARY_CONTEXT_MAX_TOKENS`.
 
     Returns:
         str: A single string containing all extracted text snippets,
@@ -30,20 +32,37 @@ def extract_and_concatenate_rag_content(
     if not retrieval_response:
         return ''
 
-    retrieval_response_dict = (
-        MessageToDict(retrieval_response._pb)
-        .get('contexts', {})
-        .get('contexts', [])
+    contexts = retrieval_response.contexts.contexts
+    assembled = assemble_contexts(
+        [context.text for context in contexts],
+        [context.score for context in contexts],
+        max_tokens=context_budget() if max_tokens is None else max_tokens,
     )
+    assembly_stats.record(assembled)
+    return concatenate_rag_contexts(assembled.texts, separator)
 
+
+def concatenate_rag_contexts(
+    contexts: list[str],
+    separator: str = '\n\n',
+) -> str:
+    """Labels and concatenates retrieved context texts.
+
+    Args:
+        contexts (list[str]): The retrieved text snippets, closest first.
+        separator (str): The string to use to join the retrieved text snippets.
+                         Defaults to two newlines.
+
+    Returns:
+        str: A single string containing all labelled text snippets,
+             concatenated with the specified separator.
+    """
     retrieved_texts = []
-    for i, context in enumerate(retrieval_response_dict):
+    for i, context in enumerate(contexts):
         retrieved_texts.append(
             f"""Intent, Customer Motivation, Resolution Goals and
             Resolution Guide (step-by-step instructions) Example {i + 1}:
-            {context.get('text', '')}\n\n"""
+            {context}\n\n"""
         )
 
-    retrieved_texts = separator.join(retrieved_texts)
-
-    return retrieved_texts
+    return separator.join(retrieved_texts)
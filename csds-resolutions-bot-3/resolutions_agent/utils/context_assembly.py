@@ -0,0 +1,216 @@
+"""Token-budgeted assembly of retrieved contexts for the summary prompt."""
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+# Rough characters per token of English text for Gemini tokenizers.
+CHARS_PER_TOKEN = 4
+
+# Words per shingle when comparing chunks for overlap.
+_SHINGLE_WORDS = 5
+
+# A context cut to less than this many tokens is dropped instead.
+_MIN_TRUNCATED_TOKENS = 64
+
+_WORD = re.compile(r'\w+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the input tokens of a text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_budget() -> int | None:
+    """Returns the token budget of the contexts (`SUMMARY_CONTEXT_MAX_TOKENS`).
+
+    Returns:
+        int | None: The budget, or None if it is 0 (unbounded).
+    """
+    budget = int(os.environ.get('SUMMARY_CONTEXT_MAX_TOKENS', 3072))
+    return budget if budget > 0 else None
+
+
+def _shingles(text: str) -> set[int]:
+    """Returns the hashed word shingles of a text."""
+    words = _WORD.findall(text.lower())
+    if len(words) < _SHINGLE_WORDS:
+        return {hash(' '.join(words))}
+    return {
+        hash(' '.join(words[i : i + _SHINGLE_WORDS]))
+        for i in range(len(words) - _SHINGLE_WORDS + 1)
+    }
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cuts a text to a token budget at the last line break that fits."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind('\n', 0, max_chars)
+    return text[: cut if cut > 0 else max_chars].rstrip()
+
+
+@dataclass
+class AssembledContexts:
+    """Contexts selected for a prompt, and what was left out.
+
+    Attributes:
+        texts (list[str]): The selected contexts, closest first.
+        input_tokens (int): The estimated tokens of every retrieved context.
+        output_tokens (int): The estimated tokens of the selected contexts.
+        duplicates (int): Contexts dropped as duplicates of, or mostly
+            contained in, a closer context.
+        dropped (int): Contexts dropped for lack of budget.
+        truncated (int): Contexts cut to fit the budget.
+    """
+
+    texts: list[str]
+    input_tokens: int = 0
+    output_tokens: int = 0
+    duplicates: int = 0
+    dropped: int = 0
+    truncated: int = 0
+
+    @property
+    def trimmed_tokens(self) -> int:
+        """The estimated tokens left out of the prompt."""
+        return self.input_tokens - self.output_tokens
+
+
+def assemble_contexts(
+    texts: Sequence[str],
+    distances: Sequence[float] | None = None,
+    max_tokens: int | None = None,
+    max_overlap: float = 0.8,
+) -> AssembledContexts:
+    """Selects the contexts of a prompt within a token budget.
+
+    Contexts are ordered closest first. A context whose text is a duplicate
+    of a closer one, or whose word shingles are at least `max_overlap`
+    contained in a closer one, is dropped. The rest are kept whole while
+    they fit the budget; the first one that does not is cut at a line
+    break, unless too little budget is left, and the others are dropped.
+
+    Args:
+        texts (Sequence[str]): The retrieved contexts.
+        distances (Sequence[float] | None): The distance of each context to
+            the query; lower is closer. Without them the order is kept.
+        max_tokens (int | None): The token budget of the selected contexts.
+            None means unbounded.
+        max_overlap (float): The shingle containment, in [0, 1], above
+            which a context counts as overlapping a closer one.
+
+    Returns:
+        AssembledContexts: The selected contexts and what was left out.
+    """
+    order = range(len(texts))
+    if distances is not None:
+        order = sorted(order, key=lambda index: distances[index])
+
+    assembled = AssembledContexts(texts=[])
+    seen_digests = set()
+    kept_shingles: list[set[int]] = []
+    remaining = max_tokens
+    for index in order:
+        text = texts[index].strip()
+        tokens = estimate_tokens(text)
+        assembled.input_tokens += tokens
+        if not text:
+            continue
+
+        digest = hashlib.sha256(' '.join(text.split()).encode()).digest()
+        shingles = _shingles(text)
+        if digest in seen_digests or any(
+            len(shingles & kept) >= max_overlap * len(shingles)
+            for kept in kept_shingles
+        ):
+            assembled.duplicates += 1
+            continue
+        seen_digests.add(digest)
+
+        if remaining is not None and tokens > remaining:
+            if remaining < _MIN_TRUNCATED_TOKENS:
+                assembled.dropped += 1
+                continue
+            text = _truncate(text, remaining)
+            tokens = estimate_tokens(text)
+            assembled.truncated += 1
+
+        kept_shingles.append(shingles)
+        assembled.texts.append(text)
+        assembled.output_tokens += tokens
+        if remaining is not None:
+            remaining -= tokens
+    return assembled
+
+
+class AssemblyStats:
+    """Thread-safe totals of the tokens kept and trimmed by assembly."""
+
+    def __init__(self):
+        """Initializes empty counters."""
+        self._lock = threading.Lock()
+        self._totals = self._empty()
+
+    @staticmethod
+    def _empty() -> dict[str, int]:
+        """Returns zeroed counters."""
+        return {
+            'calls': 0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'duplicates': 0,
+            'dropped': 0,
+            'truncated': 0,
+        }
+
+    def record(self, assembled: AssembledContexts) -> None:
+        """Adds one assembly to the totals.
+
+        Args:
+            assembled (AssembledContexts): The result of the assembly.
+        """
+        with self._lock:
+            self._totals['calls'] += 1
+            self._totals['input_tokens'] += assembled.input_tokens
+            self._totals['output_tokens'] += assembled.output_tokens
+            self._totals['duplicates'] += assembled.duplicates
+            self._totals['dropped'] += assembled.dropped
+            self._totals['truncated'] += assembled.truncated
+
+    def snapshot(self) -> dict[str, float]:
+        """Returns the totals and the share of tokens trimmed.
+
+        Returns:
+            dict[str, float]: The counters.
+        """
+        with self._lock:
+            totals = dict(self._totals)
+        trimmed = totals['input_tokens'] - totals['output_tokens']
+        return {
+            **totals,
+            'trimmed_tokens': trimmed,
+            'trimmed_ratio': (
+                trimmed / totals['input_tokens']
+                if totals['input_tokens']
+                else 0.0
+            ),
+        }
+
+    def reset(self) -> None:
+        """Clears every counter."""
+        with self._lock:
+            self._totals = self._empty()
+
+
+assembly_stats = AssemblyStats()
@@ -0,0 +1,561 @@
+"""Model-side caching of the static prefix of the agents' system prompts.
+
+Every turn sends the agent's whole instruction file, although only what
+follows it (retrieved steps, prefetched orders, the agent identity) changes.
+With a context cache, the instruction file and the tool declarations are
+stored once per model as cached content, and each request refers to the
+handle and carries only the dynamic tail, moved to the start of the
+conversation since a request using cached content cannot set a system
+instruction.
+
+A handle is keyed by the hash of the model, prompt text and tools, so a
+reloaded prompt file gets a new handle and the previous one is deleted.
+Handles are recreated shortly before their TTL runs out.
+
+Configuration:
+    CONTEXT_CACHE_BACKEND: `none` (default), `gemini`, or `local` for the
+        in-process stand-in.
+    CONTEXT_CACHE_TTL_SECONDS: The lifetime of a handle.
+    CONTEXT_CACHE_REFRESH_SECONDS: How long before expiry a handle is
+        recreated.
+    CONTEXT_CACHE_MIN_TOKENS: The smallest prefix worth caching; the model
+        rejects prefixes below its minimum.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+from utils.prompts import PromptTemplate, prompt_registry
+
+# Rough characters per token of English text for Gemini tokenizers.
+_CHARS_PER_TOKEN = 4
+
+
+class ContextCacheBackend(Protocol):
+    """Creates and deletes cached content handles."""
+
+    async def create(
+        self,
+        model: str,
+        system_instruction: str,
+        tools: list[types.Tool] | None,
+        tool_config: types.ToolConfig | None,
+        ttl_seconds: float,
+    ) -> str:
+        """Caches a prompt prefix for a model.
+
+        Args:
+            model (str): The model the handle is used with.
+            system_instruction (str): The static system instruction.
+            tools (list[types.Tool] | None): The tool declarations.
+            tool_config (types.ToolConfig | None): The tool configuration.
+            ttl_seconds (float): The lifetime of the handle.
+
+        Returns:
+            str: The handle to set as `cached_content`.
+        """
+        ...
+
+    async def delete(self, name: str) -> None:
+        """Deletes a handle, ignoring handles that no longer exist.
+
+        Args:
+            name (str): The handle.
+        """
+        ...
+
+
+class GeminiContextCacheBackend:
+    """Cached content of the Gemini API, through `google.genai`."""
+
+    def __init__(self, client: Any = None):
+        """Initializes the backend.
+
+        Args:
+            client (Any): A `google.genai.Client`. Defaults to one
+                configured from the environment, created on first use.
+        """
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        """The `google.genai` client."""
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client()
+        return self._client
+
+    async def create(
+        self,
+        model: str,
+        system_instruction: str,
+        tools: list[types.Tool] | None,
+        tool_config: types.ToolConfig | None,
+        ttl_seconds: float,
+    ) -> str:
+        """Creates cached content holding the prompt prefix.
+
+        Args:
+            model (str): The model the handle is used with.
+            system_instruction (str): The static system instruction.
+            tools (list[types.Tool] | None): The tool declarations.
+            tool_config (types.ToolConfig | None): The tool configuration.
+            ttl_seconds (float): The lifetime of the handle.
+
+        Returns:
+            str: The resource name of the cached content.
+        """
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_instruction,
+                tools=tools,
+                tool_config=tool_config,
+                ttl=f'{int(ttl_seconds)}s',
+            ),
+        )
+        return cached.name
+
+    async def delete(self, name: str) -> None:
+        """Deletes cached content.
+
+        Args:
+            name (str): The resource name of the cached content.
+        """
+        try:
+            await self.client.aio.caches.delete(name=name)
+        except Exception as e:
+            print(f'Could not delete cached content {name}: {e}')
+
+
+@dataclass(frozen=True)
+class CachedPrefix:
+    """A prompt prefix held by the local stand-in.
+
+    Attributes:
+        model (str): The model the handle is used with.
+        system_instruction (str): The static system instruction.
+        tools (list[types.Tool] | None): The tool declarations.
+        tool_config (types.ToolConfig | None): The tool configuration.
+        expires_at (float): When the handle expires, in `time.monotonic`
+            seconds.
+    """
+
+    model: str
+    system_instruction: str
+    tools: list[types.Tool] | None
+    tool_config: types.ToolConfig | None
+    expires_at: float
+
+
+class LocalContextCacheBackend:
+    """In-process stand-in for the Gemini cache with the same interface.
+
+    A local model, or a test, can `get` the prefix of a handle to rebuild
+    the full prompt.
+    """
+
+    def __init__(self):
+        """Initializes an empty cache."""
+        self._lock = threading.Lock()
+        self._prefixes: dict[str, CachedPrefix] = {}
+
+    async def create(
+        self,
+        model: str,
+        system_instruction: str,
+        tools: list[types.Tool] | None,
+        tool_config: types.ToolConfig | None,
+        ttl_seconds: float,
+    ) -> str:
+        """Stores the prompt prefix.
+
+        Args:
+            model (str): The model the handle is used with.
+            system_instruction (str): The static system instruction.
+            tools (list[types.Tool] | None): The tool declarations.
+            tool_config (types.ToolConfig | None): The tool configuration.
+            ttl_seconds (float): The lifetime of the handle.
+
+        Returns:
+            str: The handle.
+        """
+        name = f'localCachedContents/{uuid.uuid4().hex}'
+        with self._lock:
+            self._prefixes[name] = CachedPrefix(
+                model,
+                system_instruction,
+                tools,
+                tool_config,
+                time.monotonic() + ttl_seconds,
+            )
+        return name
+
+    async def delete(self, name: str) -> None:
+        """Drops a handle.
+
+        Args:
+            name (str): The handle.
+        """
+        with self._lock:
+            self._prefixes.pop(name, None)
+
+    def get(self, name: str) -> CachedPrefix | None:
+        """Returns the prefix of a handle.
+
+        Args:
+            name (str): The handle.
+
+        Returns:
+            CachedPrefix | None: The prefix, or None if the handle does not
+            exist or expired.
+        """
+        with self._lock:
+            prefix = self._prefixes.get(name)
+        if prefix is None or time.monotonic() >= prefix.expires_at:
+            return None
+        return prefix
+
+
+class ContextCacheStats:
+    """Thread-safe counters of cached versus billed input tokens per slot."""
+
+    def __init__(self):
+        """Initializes empty counters."""
+        self._lock = threading.Lock()
+        self._counters: defaultdict[str, dict[str, int]] = defaultdict(
+            lambda: {
+                'requests': 0,
+                'cached_requests': 0,
+                'handles_created': 0,
+                'handles_deleted': 0,
+                'prompt_tokens': 0,
+                'cached_tokens': 0,
+            }
+        )
+
+    def add(self, slot: str, **counts: int) -> None:
+        """Adds to the counters of a slot.
+
+        Args:
+            slot (str): The agent role the request was made for.
+            **counts (int): The amounts to add, by counter.
+        """
+        with self._lock:
+            counters = self._counters[slot]
+            for name, count in counts.items():
+                counters[name] += count
+
+    def record_usage(
+        self, slot: str, usage: types.GenerateContentResponseUsageMetadata
+    ) -> None:
+        """Records the input tokens of a response.
+
+        Args:
+            slot (str): The agent role the request was made for.
+            usage (types.GenerateContentResponseUsageMetadata): The usage
+                metadata of the response.
+        """
+        self.add(
+            slot,
+            requests=1,
+            prompt_tokens=usage.prompt_token_count or 0,
+            cached_tokens=usage.cached_content_token_count or 0,
+        )
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Returns the counters of each slot.
+
+        Returns:
+            dict[str, dict[str, float]]: The counters, with the input tokens
+            billed at the full rate and the cached share of input tokens,
+            keyed by slot.
+        """
+        with self._lock:
+            snapshot = {}
+            for slot, counters in self._counters.items():
+                prompt_tokens = counters['prompt_tokens']
+                snapshot[slot] = {
+                    **counters,
+                    'billed_tokens': prompt_tokens - counters['cached_tokens'],
+                    'cached_ratio': (
+                        counters['cached_tokens'] / prompt_tokens
+                        if prompt_tokens
+                        else 0.0
+                    ),
+                }
+            return snapshot
+
+    def reset(self) -> None:
+        """Clears every counter."""
+        with self._lock:
+            self._counters.clear()
+
+
+context_cache_stats = ContextCacheStats()
+
+
+@dataclass(frozen=True)
+class _Handle:
+    """The current handle of a slot and model."""
+
+    key: str
+    name: str
+    expires_at: float
+
+
+class ContextCache:
+    """Keeps one live handle per slot and model for the current prompt."""
+
+    def __init__(
+        self,
+        backend: ContextCacheBackend,
+        ttl_seconds: float = 3600,
+        refresh_seconds: float = 300,
+        min_tokens: int = 1024,
+    ):
+        """Initializes the cache.
+
+        Args:
+            backend (ContextCacheBackend): Creates and deletes handles.
+            ttl_seconds (float): The lifetime of a handle.
+            refresh_seconds (float): How long before expiry a handle is
+                recreated.
+            min_tokens (int): The smallest prefix worth caching.
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = refresh_seconds
+        self.min_tokens = min_tokens
+        self._lock = threading.Lock()
+        self._handles: dict[tuple[str, str], _Handle] = {}
+        self._slot_locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    def _slot_lock(self, slot: tuple[str, str]) -> asyncio.Lock:
+        """Returns the lock serializing handle creation for a slot."""
+        with self._lock:
+            return self._slot_locks.setdefault(slot, asyncio.Lock())
+
+    def _current(self, slot: tuple[str, str], key: str) -> str | None:
+        """Returns the slot's handle if it matches the key and is fresh."""
+        with self._lock:
+            handle = self._handles.get(slot)
+        if (
+            handle is None
+            or handle.key != key
+            or time.monotonic() >= handle.expires_at - self.refresh_seconds
+        ):
+            return None
+        return handle.name
+
+    async def handle(
+        self,
+        slot: str,
+        model: str,
+        system_instruction: str,
+        tools: list[types.Tool] | None = None,
+        tool_config: types.ToolConfig | None = None,
+    ) -> str | None:
+        """Returns a live handle for a prompt prefix, creating it if needed.
+
+        Args:
+            slot (str): The agent role the prefix belongs to.
+            model (str): The model the handle is used with.
+            system_instruction (str): The static system instruction.
+            tools (list[types.Tool] | None): The tool declarations.
+            tool_config (types.ToolConfig | None): The tool configuration.
+
+        Returns:
+            str | None: The handle, or None if the prefix is too small to
+            cache.
+        """
+        declarations = json.dumps(
+            [tool.model_dump(mode='json') for tool in tools or []]
+            + [tool_config.model_dump(mode='json') if tool_config else None],
+            sort_keys=True,
+        )
+        if (
+            len(system_instruction) + len(declarations)
+        ) // _CHARS_PER_TOKEN < self.min_tokens:
+            return None
+
+        key = hashlib.sha256(
+            f'{model}\0{system_instruction}\0{declarations}'.encode()
+        ).hexdigest()
+        slot_key = (slot, model)
+        name = self._current(slot_key, key)
+        if name is not None:
+            return name
+
+        async with self._slot_lock(slot_key):
+            name = self._current(slot_key, key)
+            if name is not None:
+                return name
+            name = await self.backend.create(
+                model, system_instruction, tools, tool_config, self.ttl_seconds
+            )
+            with self._lock:
+                previous = self._handles.get(slot_key)
+                self._handles[slot_key] = _Handle(
+                    key, name, time.monotonic() + self.ttl_seconds
+                )
+            context_cache_stats.add(slot, handles_created=1)
+            if previous is not None:
+                await self.backend.delete(previous.name)
+                context_cache_stats.add(slot, handles_deleted=1)
+        return name
+
+    async def apply(
+        self, llm_request: LlmRequest, prompt: PromptTemplate, slot: str
+    ) -> LlmRequest:
+        """Rewrites a request to use the cached prefix of its prompt.
+
+        The system instruction up to the end of the prompt text, and the
+        tools, are replaced by a handle. The rest of the system instruction
+        moves to a first user message.
+
+        Args:
+            llm_request (LlmRequest): The request, for a single model.
+            prompt (PromptTemplate): The agent's instruction file.
+            slot (str): The agent role the request is made for.
+
+        Returns:
+            LlmRequest: A rewritten copy, or the request itself if its
+            prefix cannot be cached.
+        """
+        config = llm_request.config
+        system_instruction = config.system_instruction
+        if not isinstance(system_instruction, str) or config.cached_content:
+            return llm_request
+        text = prompt.text
+        start = system_instruction.find(text)
+        if not text or start < 0:
+            return llm_request
+        end = start + len(text)
+
+        name = await self.handle(
+            slot,
+            llm_request.model or '',
+            system_instruction[:end],
+            config.tools,
+            config.tool_config,
+        )
+        if name is None:
+            return llm_request
+
+        contents = list(llm_request.contents)
+        tail = system_instruction[end:].strip()
+        if tail:
+            contents.insert(
+                0, types.Content(role='user', parts=[types.Part(text=tail)])
+            )
+        context_cache_stats.add(slot, cached_requests=1)
+        return llm_request.model_copy(
+            update={
+                'contents': contents,
+                'config': config.model_copy(
+                    update={
+                        'cached_content': name,
+                        'system_instruction': None,
+                        'tools': None,
+                        'tool_config': None,
+                    }
+                ),
+            }
+        )
+
+    async def clear(self) -> None:
+        """Deletes every handle, for example on shutdown."""
+        with self._lock:
+            handles = list(self._handles.items())
+            self._handles.clear()
+        for (slot, _), handle in handles:
+            await self.backend.delete(handle.name)
+            context_cache_stats.add(slot, handles_deleted=1)
+
+
+_context_cache: ContextCache | None = None
+_context_cache_lock = threading.Lock()
+
+
+def _build_context_cache() -> ContextCache | None:
+    """Builds the context cache selected by the environment."""
+    backend_name = os.environ.get('CONTEXT_CACHE_BACKEND', 'none').lower()
+    if backend_name == 'none':
+        return None
+    if backend_name == 'gemini':
+        backend = GeminiContextCacheBackend()
+    elif backend_name == 'local':
+        backend = LocalContextCacheBackend()
+    else:
+        raise ValueError(f'Unknown CONTEXT_CACHE_BACKEND: {backend_name}')
+    return ContextCache(
+        backend,
+        ttl_seconds=float(os.environ.get('CONTEXT_CACHE_TTL_SECONDS', 3600)),
+        refresh_seconds=float(
+            os.environ.get('CONTEXT_CACHE_REFRESH_SECONDS', 300)
+        ),
+        min_tokens=int(os.environ.get('CONTEXT_CACHE_MIN_TOKENS', 1024)),
+    )
+
+
+def get_context_cache() -> ContextCache | None:
+    """Returns the process-wide context cache, building it on first use.
+
+    Returns:
+        ContextCache | None: The cache, or None when disabled.
+    """
+    global _context_cache
+    if _context_cache is None:
+        with _context_cache_lock:
+            if _context_cache is None:
+                _context_cache = _build_context_cache()
+    return _context_cache
+
+
+def set_context_cache(cache: ContextCache | None) -> None:
+    """Replaces the process-wide context cache.
+
+    Args:
+        cache (ContextCache | None): The cache to use, or None to rebuild
+            it from the environment on next use.
+    """
+    global _context_cache
+    with _context_cache_lock:
+        _context_cache = cache
+
+
+async def apply_context_cache(
+    llm_request: LlmRequest, prompt_name: str, slot: str
+) -> LlmRequest:
+    """Rewrites a request to use the cached prefix of a registered prompt.
+
+    Args:
+        llm_request (LlmRequest): The request, for a single model.
+        prompt_name (str): The agent's instruction file in the registry.
+        slot (str): The agent role the request is made for.
+
+    Returns:
+        LlmRequest: The request to send.
+    """
+    cache = get_context_cache()
+    if cache is None:
+        return llm_request
+    try:
+        return await cache.apply(
+            llm_request, prompt_registry.get(prompt_name), slot
+        )
+    except Exception as e:
+        print(f'Context cache not used: {type(e).__name__} {e}')
+        return llm_request
@@ -0,0 +1,399 @@
+"""Per-role model tiers with latency budgets and automatic fallback.
+
+Each role lists its models from preferred to fastest. A call that fails, or
+that has not produced its first response within the role's latency budget,
+is retried on the next tier; the last tier has no budget.
+
+Configuration, for each role (`ROUTER`, `SUMMARIZER`, `CONVERSATION`):
+    MODEL_<ROLE>: Comma-separated model names, preferred first. Defaults to
+        `GOOGLE_CLOUD_LLM_NAME`.
+    MODEL_<ROLE>_BUDGET_SECONDS: The latency budget of every tier but the
+        last. Empty or 0 disables the budget.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from typing import Any
+
+import numpy as np
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from pydantic import PrivateAttr
+from utils.context_cache import apply_context_cache, context_cache_stats
+from utils.tracing import annotate
+
+ROUTER = 'router'
+SUMMARIZER = 'summarizer'
+CONVERSATION = 'conversation'
+
+_LATENCY_SAMPLES = 1024
+
+
+def model_tiers(role: str) -> list[str]:
+    """Returns the models of a role, preferred first (`MODEL_<ROLE>`).
+
+    Args:
+        role (str): The role, such as `summarizer`.
+
+    Returns:
+        list[str]: The model names.
+    """
+    names = os.environ.get(f'MODEL_{role.upper()}', '')
+    tiers = [name.strip() for name in names.split(',') if name.strip()]
+    return tiers or [os.environ.get('GOOGLE_CLOUD_LLM_NAME', '')]
+
+
+def latency_budget(role: str) -> float | None:
+    """Returns the latency budget of a role (`MODEL_<ROLE>_BUDGET_SECONDS`).
+
+    Args:
+        role (str): The role, such as `summarizer`.
+
+    Returns:
+        float | None: The budget in seconds, or None if there is none.
+    """
+    budget = os.environ.get(f'MODEL_{role.upper()}_BUDGET_SECONDS')
+    return float(budget) if budget and float(budget) > 0 else None
+
+
+class ModelStats:
+    """Thread-safe latency and error counters of each role and model."""
+
+    def __init__(self):
+        """Initializes empty counters."""
+        self._lock = threading.Lock()
+        self._calls: defaultdict[tuple[str, str], dict[str, int]] = (
+            defaultdict(lambda: {'calls': 0, 'errors': 0, 'fallbacks': 0})
+        )
+        self._latencies: defaultdict[tuple[str, str], deque[float]] = (
+            defaultdict(lambda: deque(maxlen=_LATENCY_SAMPLES))
+        )
+
+    def record(
+        self,
+        role: str,
+        model: str,
+        seconds: float,
+        error: str | None = None,
+        fell_back: bool = False,
+    ) -> None:
+        """Records one call.
+
+        Args:
+            role (str): The role the call was made for.
+            model (str): The model that served, or failed, the call.
+            seconds (float): The latency of the call.
+            error (str | None): The error that ended the call, if any.
+            fell_back (bool): Whether the next tier was tried after it.
+        """
+        with self._lock:
+            counters = self._calls[role, model]
+            counters['calls'] += 1
+            counters['errors'] += error is not None
+            counters['fallbacks'] += fell_back
+            if error is None:
+                self._latencies[role, model].append(seconds * 1000)
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Returns the counters and latency percentiles of each model.
+
+        Returns:
+            dict[str, dict[str, dict[str, float]]]: The counters, with
+            `p50_ms` and `p95_ms` of the successful calls, keyed by role
+            and model.
+        """
+        with self._lock:
+            snapshot: dict[str, dict[str, dict[str, float]]] = {}
+            for (role, model), counters in self._calls.items():
+                latencies = self._latencies[role, model]
+                p50, p95 = (
+                    np.percentile(latencies, [50, 95])
+                    if latencies
+                    else (float('nan'), float('nan'))
+                )
+                snapshot.setdefault(role, {})[model] = {
+                    **counters,
+                    'p50_ms': float(p50),
+                    'p95_ms': float(p95),
+                }
+            return snapshot
+
+    def reset(self) -> None:
+        """Clears every counter."""
+        with self._lock:
+            self._calls.clear()
+            self._latencies.clear()
+
+
+model_stats = ModelStats()
+
+
+def _budget_for(tiers: list[str], index: int, budget: float | None):
+    """Returns the budget of a tier; the last tier waits as long as needed."""
+    return None if index == len(tiers) - 1 else budget
+
+
+def _fall_back(role: str, model: str, error: BaseException) -> None:
+    """Logs a fallback to the next tier."""
+    reason = 'over budget' if isinstance(error, TimeoutError) else repr(error)
+    print(f'Model {model} failed for {role} ({reason}); trying next tier.')
+
+
+class TieredLlm(BaseLlm):
+    """ADK model that serves a role from its tiers with fallback.
+
+    Models are resolved through the ADK registry on first use, so any name
+    an `LlmAgent` accepts can be a tier. With a `cached_prompt`, each tier
+    sends the static prefix of that instruction file as cached content when
+    a context cache is configured.
+    """
+
+    role: str
+    tiers: list[str]
+    budget_seconds: float | None = None
+    cached_prompt: str | None = None
+    _llms: dict[str, BaseLlm] = PrivateAttr(default_factory=dict)
+
+    def _llm(self, name: str) -> BaseLlm:
+        """Returns the model of a tier, creating it on first use."""
+        llm = self._llms.get(name)
+        if llm is None:
+            llm = self._llms[name] = LLMRegistry.new_llm(name)
+        return llm
+
+    def warm_up(self) -> None:
+        """Creates the model of every tier and its API client ahead of use."""
+        for name in self.tiers:
+            # Gemini creates its client, and loads credentials, on first
+            # access.
+            getattr(self._llm(name), 'api_client', None)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Generates content with the first tier that answers in budget.
+
+        Args:
+            llm_request (LlmRequest): The request built by the agent.
+            stream (bool): Whether to stream the response.
+
+        Yields:
+            LlmResponse: The responses of the tier that served the call.
+        """
+        for index, name in enumerate(self.tiers):
+            budget = _budget_for(self.tiers, index, self.budget_seconds)
+            request = llm_request.model_copy(update={'model': name})
+            if self.cached_prompt:
+                # Cached content belongs to one model, so each tier gets
+                # its own handle.
+                request = await apply_context_cache(
+                    request, self.cached_prompt, self.role
+                )
+            responses = self._llm(name).generate_content_async(request, stream)
+            start = time.perf_counter()
+            try:
+                first = await asyncio.wait_for(anext(responses), budget)
+            except Exception as e:
+                await responses.aclose()
+                last = index == len(self.tiers) - 1
+                model_stats.record(
+                    self.role,
+                    name,
+                    time.perf_counter() - start,
+                    error=type(e).__name__,
+                    fell_back=not last,
+                )
+                if last:
+                    raise
+                _fall_back(self.role, name, e)
+                continue
+
+            annotate(model=name, model_tier=index)
+            usage = first.usage_metadata
+            yield first
+            async for response in responses:
+                usage = response.usage_metadata or usage
+                yield response
+            model_stats.record(self.role, name, time.perf_counter() - start)
+            if usage is not None:
+                context_cache_stats.record_usage(self.role, usage)
+            return
+
+
+def tiered_llm(role: str, cached_prompt: str | None = None) -> TieredLlm:
+    """Builds the ADK model of a role from the environment.
+
+    Args:
+        role (str): The role, such as `conversation`.
+        cached_prompt (str | None): The agent's instruction file in the
+            prompt registry, whose static prefix may be cached.
+
+    Returns:
+        TieredLlm: The model to pass to an `LlmAgent`.
+    """
+    tiers = model_tiers(role)
+    return TieredLlm(
+        model=tiers[0],
+        role=role,
+        tiers=tiers,
+        budget_seconds=latency_budget(role),
+        cached_prompt=cached_prompt,
+    )
+
+
+class TieredGenerativeModel:
+    """Vertex AI `GenerativeModel` stand-in serving a role from its tiers.
+
+    The async methods enforce the latency budget on the complete response,
+    or on the first chunk when streaming. The sync method cannot interrupt
+    a call, so it only falls back on errors.
+    """
+
+    def __init__(
+        self,
+        role: str,
+        tiers: list[str],
+        budget_seconds: float | None = None,
+        factory: Callable[[str], Any] | None = None,
+    ):
+        """Initializes the model.
+
+        Args:
+            role (str): The role the model serves.
+            tiers (list[str]): The model names, preferred first.
+            budget_seconds (float | None): The latency budget of every tier
+                but the last.
+            factory (Callable[[str], Any] | None): Builds the model of a
+                tier. Defaults to `vertexai.generative_models.GenerativeModel`.
+        """
+        self.role = role
+        self.tiers = tiers
+        self.budget_seconds = budget_seconds
+        self.factory = factory
+        self._models: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, name: str) -> Any:
+        """Returns the model of a tier, creating it on first use."""
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    factory = self.factory
+                    if factory is None:
+                        from vertexai.generative_models import GenerativeModel
+
+                        factory = GenerativeModel
+                    model = self._models[name] = factory(name)
+        return model
+
+    def warm_up(self) -> None:
+        """Creates the model of every tier ahead of use."""
+        for name in self.tiers:
+            self._model(name)
+
+    def _failed(
+        self, index: int, name: str, start: float, error: Exception
+    ) -> None:
+        """Records a failed tier and re-raises on the last one."""
+        last = index == len(self.tiers) - 1
+        model_stats.record(
+            self.role,
+            name,
+            time.perf_counter() - start,
+            error=type(error).__name__,
+            fell_back=not last,
+        )
+        if last:
+            raise error
+        _fall_back(self.role, name, error)
+
+    def generate_content(self, prompt: str) -> Any:
+        """Generates content, falling back to the next tier on errors.
+
+        Args:
+            prompt (str): The prompt.
+
+        Returns:
+            Any: The `GenerationResponse` of the tier that served the call.
+        """
+        for index, name in enumerate(self.tiers):
+            start = time.perf_counter()
+            try:
+                response = self._model(name).generate_content(prompt)
+            except Exception as e:
+                self._failed(index, name, start, e)
+                continue
+            model_stats.record(self.role, name, time.perf_counter() - start)
+            annotate(model=name, model_tier=index)
+            return response
+
+    async def generate_content_async(
+        self, prompt: str, stream: bool = False
+    ) -> Any:
+        """Generates content with the first tier that answers in budget.
+
+        Args:
+            prompt (str): The prompt.
+            stream (bool): Whether to return an iterator over the chunks.
+
+        Returns:
+            Any: The `GenerationResponse` of the tier that served the call,
+            or an async iterator over its chunks.
+        """
+        for index, name in enumerate(self.tiers):
+            budget = _budget_for(self.tiers, index, self.budget_seconds)
+            model = self._model(name)
+            start = time.perf_counter()
+            try:
+                if stream:
+                    chunks, first = await asyncio.wait_for(
+                        self._start_stream(model, prompt), budget
+                    )
+                else:
+                    response = await asyncio.wait_for(
+                        model.generate_content_async(prompt), budget
+                    )
+            except Exception as e:
+                self._failed(index, name, start, e)
+                continue
+
+            annotate(model=name, model_tier=index)
+            if stream:
+                return self._rest_of_stream(name, start, first, chunks)
+            model_stats.record(self.role, name, time.perf_counter() - start)
+            return response
+
+    @staticmethod
+    async def _start_stream(model: Any, prompt: str) -> tuple[Any, Any]:
+        """Starts a streamed call and waits for its first chunk."""
+        chunks = await model.generate_content_async(prompt, stream=True)
+        return chunks, await anext(chunks)
+
+    async def _rest_of_stream(
+        self, name: str, start: float, first: Any, chunks: AsyncIterator
+    ) -> AsyncIterator[Any]:
+        """Yields a started stream and records its latency at the end."""
+        yield first
+        async for chunk in chunks:
+            yield chunk
+        model_stats.record(self.role, name, time.perf_counter() - start)
+
+
+def tiered_generative_model(role: str) -> TieredGenerativeModel:
+    """Builds the Vertex AI model of a role from the environment.
+
+    Args:
+        role (str): The role, such as `summarizer`.
+
+    Returns:
+        TieredGenerativeModel: The model.
+    """
+    return TieredGenerativeModel(role, model_tiers(role), latency_budget(role))
@@ -0,0 +1,190 @@
+"""Registry of the agents' instruction prompts."""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+# Instruction files are looked up relative to the agent packages, not the
+# working directory the server was started from.
+PROMPTS_ROOT = Path(__file__).resolve().parents[1]
+
+PROVEN_STEPS_HEADER = '\n\n### Historically Proven Steps ###\n'
+
+
+class PromptTemplate:
+    """An instruction file that is read once and reloaded when it changes.
+
+    The file's modification time is checked at most once per
+    `reload_interval` seconds, so serving the prompt on every turn costs no
+    file I/O in between.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        reload_interval: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes the template; the file is read on first use.
+
+        Args:
+            path (Path): The instruction file.
+            reload_interval (float): Seconds between modification checks.
+                A negative value disables reloading.
+            clock (Callable[[], float]): The monotonic time source.
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._mtime_ns = -1
+        self._checked_at = 0.0
+        self._text = ''
+        self._with_steps_prefix = ''
+        self.reloads = 0
+
+    def _reload(self, mtime_ns: int) -> None:
+        """Reads the file and precompiles the proven-steps prefix."""
+        text = self.path.read_text(encoding='utf-8')
+        self._text = text
+        self._with_steps_prefix = f'{text}{PROVEN_STEPS_HEADER}'
+        self._mtime_ns = mtime_ns
+        self.reloads += 1
+
+    def _refresh(self) -> None:
+        """Reads the file on first use, then reloads it if it changed."""
+        if self._mtime_ns < 0:
+            with self._lock:
+                if self._mtime_ns < 0:
+                    self._reload(self.path.stat().st_mtime_ns)
+                    self._checked_at = self.clock()
+            return
+        if self.reload_interval < 0:
+            return
+        now = self.clock()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime_ns = self.path.stat().st_mtime_ns
+            except OSError as e:
+                print(f'Keeping cached prompt {self.path}: {e}')
+                return
+            if mtime_ns != self._mtime_ns:
+                print(f'Reloading prompt {self.path}')
+                self._reload(mtime_ns)
+
+    @property
+    def text(self) -> str:
+        """The current instruction text."""
+        self._refresh()
+        return self._text
+
+    def with_proven_steps(self, steps: str | None) -> str:
+        """Appends retrieved resolution steps to the instruction text.
+
+        Args:
+            steps (str | None): The historically proven steps for the
+                customer's issue.
+
+        Returns:
+            str: The instruction text, followed by the steps under a
+            `Historically Proven Steps` heading if there are any.
+        """
+        self._refresh()
+        if not steps:
+            return self._text
+        return f'{self._with_steps_prefix}{steps}'
+
+
+class PromptRegistry:
+    """Loads each instruction file once and shares it across agents."""
+
+    def __init__(
+        self, root: Path = PROMPTS_ROOT, reload_interval: float = 2.0
+    ):
+        """Initializes an empty registry.
+
+        Args:
+            root (Path): The directory prompt names are relative to.
+            reload_interval (float): Seconds between modification checks of
+                each file. A negative value disables reloading.
+        """
+        self.root = root
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._templates: dict[str, PromptTemplate] = {}
+
+    def get(self, name: str) -> PromptTemplate:
+        """Returns a prompt template, creating it on first use.
+
+        Args:
+            name (str): The instruction file, relative to the registry root,
+                such as `order_resolution/instructions.md`.
+
+        Returns:
+            PromptTemplate: The template.
+        """
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = PromptTemplate(
+                        self.root / name, self.reload_interval
+                    )
+                    self._templates[name] = template
+        return template
+
+    def templates(self) -> list[PromptTemplate]:
+        """Returns every template created so far.
+
+        Returns:
+            list[PromptTemplate]: The templates.
+        """
+        with self._lock:
+            return list(self._templates.values())
+
+
+prompt_registry = PromptRegistry(
+    reload_interval=float(os.environ.get('PROMPT_RELOAD_INTERVAL_SECONDS', 2))
+)
+
+
+def instruction_provider(
+    name: str,
+    steps: Callable[[ReadonlyContext], str | None] | None = None,
+    appendix: Callable[[ReadonlyContext], str | None] | None = None,
+) -> Callable[[ReadonlyContext], str]:
+    """Builds an ADK instruction provider serving a registered prompt.
+
+    Args:
+        name (str): The instruction file, relative to the registry root.
+        steps (Callable[[ReadonlyContext], str | None] | None): Returns the
+            historically proven steps to append to the prompt, if any.
+        appendix (Callable[[ReadonlyContext], str | None] | None): Returns
+            text to append after the steps, including its own heading.
+
+    Returns:
+        Callable[[ReadonlyContext], str]: The provider to pass as an
+        `LlmAgent` instruction.
+    """
+    template = prompt_registry.get(name)
+
+    def provide(context: ReadonlyContext) -> str:
+        if steps is None:
+            text = template.text
+        else:
+            text = template.with_proven_steps(steps(context))
+        if appendix is not None:
+            text += appendix(context) or ''
+        return text
+
+    return provide
@@ -0,0 +1,489 @@
+"""Retries, hedged requests and circuit breaking for remote calls.
+
+A `ResilientCall` guards one remote dependency, such as the RAG Engine or
+the summary model:
+
+- Each attempt that fails with a transient error is retried after an
+  exponential backoff with full jitter, as long as the retry can still
+  start before the caller's deadline.
+- An attempt still running after the dependency's p95 latency gets one
+  duplicate request; the first successful response wins.
+- After consecutive transient failures the circuit opens and calls fail
+  fast with `CircuitOpenError` until a trial call succeeds, so callers can
+  serve a cached or precomputed fallback instead of waiting on a stalled
+  service.
+
+Configuration, for each dependency (`RAG`, `SUMMARY`):
+    <NAME>_MAX_ATTEMPTS: Attempts per call, including the first.
+    <NAME>_RETRY_BASE_SECONDS: The backoff of the first retry.
+    <NAME>_HEDGE: `true` or `false`; whether slow attempts are duplicated.
+    <NAME>_BREAKER_FAILURES: Consecutive transient failures that open the
+        circuit.
+    <NAME>_BREAKER_RESET_SECONDS: How long the circuit stays open before a
+        trial call.
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent import futures
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from google.api_core import exceptions as api_exceptions
+from utils.tracing import annotate
+
+# Samples needed before the p95 latency is trusted as the hedge delay.
+_MIN_HEDGE_SAMPLES = 20
+
+_hedge_executor = futures.ThreadPoolExecutor(
+    max_workers=int(os.environ.get('HEDGE_EXECUTOR_WORKERS', 16)),
+    thread_name_prefix='hedge',
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Returns whether a failed call is worth retrying.
+
+    Client errors such as invalid arguments fail the same way every time,
+    except for rate limiting. Everything else, including timeouts, server
+    errors and connection failures, is assumed to be transient.
+
+    Args:
+        error (BaseException): The error raised by the call.
+
+    Returns:
+        bool: Whether to retry.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, api_exceptions.ClientError):
+        return isinstance(error, api_exceptions.TooManyRequests)
+    return True
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Backoff of the retries of a call.
+
+    Attributes:
+        max_attempts (int): Attempts per call, including the first.
+        base_delay (float): The backoff of the first retry, in seconds.
+        max_delay (float): The cap of the backoff, in seconds.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+
+    def backoff(self, attempt: int) -> float:
+        """Returns the jittered delay before a retry.
+
+        Args:
+            attempt (int): The number of attempts made so far, from 1.
+
+        Returns:
+            float: A delay drawn uniformly below the exponential backoff.
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class LatencyTracker:
+    """Thread-safe window of recent successful call latencies."""
+
+    def __init__(self, window: int = 256):
+        """Initializes an empty window.
+
+        Args:
+            window (int): The number of latencies kept.
+        """
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Adds the latency of a successful call.
+
+        Args:
+            seconds (float): The latency.
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Returns a latency percentile of the window.
+
+        Args:
+            q (float): The percentile, in [0, 100].
+
+        Returns:
+            float | None: The latency in seconds, or None until enough
+            calls were recorded.
+        """
+        with self._lock:
+            if len(self._latencies) < _MIN_HEDGE_SAMPLES:
+                return None
+            return float(np.percentile(self._latencies, q))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    The circuit is closed while calls succeed. It opens after
+    `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, after which one trial call is let through: its
+    success closes the circuit and its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """Initializes a closed circuit.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the
+                circuit.
+            reset_timeout (float): Seconds before a trial call.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        """The state of the circuit; open turns half open once it expires."""
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Returns whether a call may go through.
+
+        Once the circuit has been open for `reset_timeout`, the first caller
+        gets the trial call and the others are still rejected.
+
+        Returns:
+            bool: Whether to make the call.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial_running:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        """Closes the circuit."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Counts a failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ResilientCall:
+    """Retry, hedging and circuit breaking policy of one dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        hedge: bool = True,
+        hedge_percentile: float = 95,
+        min_hedge_delay: float = 0.05,
+    ):
+        """Initializes the policy.
+
+        Args:
+            name (str): The dependency, used in logs and span attributes.
+            retry (RetryPolicy | None): The retry policy. Defaults to
+                `RetryPolicy()`.
+            breaker (CircuitBreaker | None): The circuit breaker. Defaults
+                to `CircuitBreaker()`.
+            hedge (bool): Whether slow attempts are duplicated.
+            hedge_percentile (float): The latency percentile after which an
+                attempt is duplicated.
+            min_hedge_delay (float): The shortest hedge delay, in seconds.
+        """
+        self.name = name
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.latencies = LatencyTracker()
+
+    def hedge_delay(self) -> float | None:
+        """Returns how long an attempt runs before it is duplicated.
+
+        Returns:
+            float | None: The delay in seconds, or None if attempts are not
+            hedged yet.
+        """
+        if not self.hedge:
+            return None
+        delay = self.latencies.percentile(self.hedge_percentile)
+        return None if delay is None else max(delay, self.min_hedge_delay)
+
+    def _before_attempt(self) -> None:
+        """Fails fast when the circuit is open."""
+        if not self.breaker.allow():
+            annotate(**{f'{self.name}_circuit': 'open'})
+            raise CircuitOpenError(f'The {self.name} circuit is open.')
+
+    def _after_failure(
+        self, error: BaseException, attempt: int, deadline: float | None
+    ) -> float:
+        """Records a failed attempt and returns the backoff before the next.
+
+        Raises the error when it is not transient, when the attempts are
+        exhausted, or when the retry could not start before the deadline.
+        Only transient errors count against the circuit; any other error
+        means the dependency answered, which also settles a trial call.
+        """
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        backoff = self.retry.backoff(attempt)
+        if (
+            not is_transient(error)
+            or attempt >= self.retry.max_attempts
+            or (
+                deadline is not None and time.monotonic() + backoff >= deadline
+            )
+        ):
+            annotate(**{f'{self.name}_attempts': attempt})
+            raise error
+        print(
+            f'Retrying {self.name} after {type(error).__name__} '
+            f'(attempt {attempt} of {self.retry.max_attempts}).'
+        )
+        return backoff
+
+    def _after_success(self, start: float, attempt: int, hedged: bool) -> None:
+        """Records a successful attempt."""
+        self.breaker.record_success()
+        self.latencies.record(time.monotonic() - start)
+        annotate(
+            **{f'{self.name}_attempts': attempt, f'{self.name}_hedged': hedged}
+        )
+
+    def call(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: float | None = None,
+    ) -> Any:
+        """Calls a blocking function under the policy.
+
+        Attempts run on a shared hedge executor so a slow one can be
+        duplicated; the calling thread only waits. Like `run_blocking`,
+        an attempt that outlives the deadline keeps its worker thread
+        until it returns, and its result is discarded.
+
+        Args:
+            func (Callable[..., Any]): The remote call.
+            *args (Any): Positional arguments for `func`.
+            timeout (float | None): Seconds before the whole call, retries
+                included, raises `TimeoutError`.
+
+        Returns:
+            Any: The return value of the first successful attempt.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            start = time.monotonic()
+            try:
+                result, hedged = self._attempt(func, args, deadline)
+            except Exception as e:
+                time.sleep(self._after_failure(e, attempt, deadline))
+                continue
+            self._after_success(start, attempt, hedged)
+            return result
+
+    def _attempt(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        deadline: float | None,
+    ) -> tuple[Any, bool]:
+        """Runs one attempt, hedging it once it is slower than usual."""
+
+        def submit() -> futures.Future:
+            # Each request runs in its own copy of the caller's context so
+            # spans nest under the caller's span.
+            context = contextvars.copy_context()
+            return _hedge_executor.submit(context.run, func, *args)
+
+        pending = {submit()}
+        hedge_delay = self.hedge_delay()
+        hedged = False
+        error: BaseException | None = None
+        while pending:
+            remaining = _remaining(deadline)
+            wait = remaining
+            if not hedged and hedge_delay is not None:
+                wait = hedge_delay if wait is None else min(wait, hedge_delay)
+            done, pending = futures.wait(
+                pending, wait, return_when=futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), hedged
+                error = future.exception()
+            if not done:
+                if remaining is not None and wait >= remaining:
+                    raise TimeoutError(f'The {self.name} call timed out.')
+                hedged = True
+                pending.add(submit())
+        raise error  # type: ignore[misc]
+
+    async def call_async(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        timeout: float | None = None,
+    ) -> Any:
+        """Awaits a coroutine function under the policy.
+
+        Args:
+            func (Callable[..., Awaitable[Any]]): The remote call.
+            *args (Any): Positional arguments for `func`.
+            timeout (float | None): Seconds before the whole call, retries
+                included, raises `TimeoutError`.
+
+        Returns:
+            Any: The return value of the first successful attempt.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            start = time.monotonic()
+            try:
+                result, hedged = await self._attempt_async(
+                    func, args, deadline
+                )
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(e, attempt, deadline))
+                continue
+            self._after_success(start, attempt, hedged)
+            return result
+
+    async def _attempt_async(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        args: tuple,
+        deadline: float | None,
+    ) -> tuple[Any, bool]:
+        """Runs one attempt, hedging it once it is slower than usual."""
+        pending = {asyncio.ensure_future(func(*args))}
+        hedge_delay = self.hedge_delay()
+        hedged = False
+        error: BaseException | None = None
+        try:
+            while pending:
+                remaining = _remaining(deadline)
+                wait = remaining
+                if not hedged and hedge_delay is not None:
+                    wait = (
+                        hedge_delay if wait is None else min(wait, hedge_delay)
+                    )
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), hedged
+                    error = task.exception()
+                if not done:
+                    if remaining is not None and wait >= remaining:
+                        raise TimeoutError(f'The {self.name} call timed out.')
+                    hedged = True
+                    pending.add(asyncio.ensure_future(func(*args)))
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _remaining(deadline: float | None) -> float | None:
+    """Returns the seconds left before a deadline, or None without one."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def resilient_call(name: str, hedge: bool = True) -> ResilientCall:
+    """Builds the policy of a dependency from the environment.
+
+    Args:
+        name (str): The dependency, such as `rag`. Its upper-cased name
+            prefixes the environment variables.
+        hedge (bool): Whether slow attempts are duplicated unless
+            `<NAME>_HEDGE` says otherwise.
+
+    Returns:
+        ResilientCall: The policy.
+    """
+    prefix = name.upper()
+    hedge_setting = os.environ.get(f'{prefix}_HEDGE', str(hedge))
+    return ResilientCall(
+        name,
+        retry=RetryPolicy(
+            max_attempts=int(os.environ.get(f'{prefix}_MAX_ATTEMPTS', 3)),
+            base_delay=float(
+                os.environ.get(f'{prefix}_RETRY_BASE_SECONDS', 0.1)
+            ),
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=int(
+                os.environ.get(f'{prefix}_BREAKER_FAILURES', 5)
+            ),
+            reset_timeout=float(
+                os.environ.get(f'{prefix}_BREAKER_RESET_SECONDS', 30)
+            ),
+        ),
+        hedge=hedge_setting.lower() == 'true',
+    )
@@ -0,0 +1,441 @@
+"""Lightweight tracing of the agents' hot paths.
+
+Spans nest through a context variable, so a span opened inside another one
+(including across `await` and `run_blocking`) records it as its parent.
+Whether an invocation is traced is decided once, from its invocation ID,
+so either all of its spans are exported or none are.
+
+Configuration:
+    TRACE_EXPORTER: `none` (default), `file`, `memory` or `otel`.
+    TRACE_FILE: The JSON lines file of the `file` exporter.
+    TRACE_SAMPLE_RATE: The fraction of invocations traced, in [0, 1].
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Protocol
+
+from google.adk.agents.callback_context import CallbackContext
+
+_MAX_OPEN_AGENT_SPANS = 4096
+
+
+class Span:
+    """A timed operation with attributes.
+
+    Attributes:
+        name (str): The operation, such as `rag.retrieve`.
+        trace_id (str): The invocation the span belongs to.
+        span_id (str): The identifier of the span.
+        parent_id (str | None): The identifier of the enclosing span.
+        sampled (bool): Whether the span is exported.
+        attributes (dict[str, Any]): Sizes, counts and other details.
+    """
+
+    __slots__ = (
+        'name',
+        'trace_id',
+        'span_id',
+        'parent_id',
+        'sampled',
+        'attributes',
+        'start_time',
+        'end_time',
+        '_start_ns',
+        'duration_ms',
+        '_otel_span',
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        sampled: bool,
+        attributes: dict[str, Any],
+    ):
+        """Starts the span.
+
+        Args:
+            name (str): The operation.
+            trace_id (str): The invocation the span belongs to.
+            parent_id (str | None): The identifier of the enclosing span.
+            sampled (bool): Whether the span is exported.
+            attributes (dict[str, Any]): The initial attributes.
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.end_time: float | None = None
+        self._start_ns = time.perf_counter_ns()
+        self.duration_ms: float | None = None
+        self._otel_span: Any = None
+
+    def set(self, **attributes: Any) -> None:
+        """Adds attributes to the span.
+
+        Args:
+            **attributes (Any): The attributes to add.
+        """
+        if self.sampled:
+            self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        """Ends the span and hands it to the exporter."""
+        if self.duration_ms is not None:
+            return
+        self.end_time = time.time()
+        self.duration_ms = (time.perf_counter_ns() - self._start_ns) / 1e6
+        if self.sampled:
+            _exporter().export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the span as a JSON-serializable dict.
+
+        Returns:
+            dict[str, Any]: The span fields.
+        """
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+        }
+
+
+class SpanExporter(Protocol):
+    """Receives every finished, sampled span."""
+
+    def start(self, span: Span, parent: Span | None) -> None:
+        """Called when a sampled span starts.
+
+        Args:
+            span (Span): The new span.
+            parent (Span | None): The enclosing span.
+        """
+        ...
+
+    def export(self, span: Span) -> None:
+        """Called when a sampled span ends.
+
+        Args:
+            span (Span): The finished span.
+        """
+        ...
+
+
+class NoopSpanExporter:
+    """Drops every span."""
+
+    def start(self, span: Span, parent: Span | None) -> None:
+        """Ignores the span."""
+
+    def export(self, span: Span) -> None:
+        """Ignores the span."""
+
+
+class FileSpanExporter:
+    """Appends finished spans to a JSON lines file."""
+
+    def __init__(self, path: str):
+        """Opens the file for appending.
+
+        Args:
+            path (str): The JSON lines file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)  # noqa: SIM115
+
+    def start(self, span: Span, parent: Span | None) -> None:
+        """Ignores the start of a span."""
+
+    def export(self, span: Span) -> None:
+        """Writes the span as one JSON line.
+
+        Args:
+            span (Span): The finished span.
+        """
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+
+class MemorySpanExporter:
+    """Keeps the most recent finished spans in memory."""
+
+    def __init__(self, max_spans: int = 100000):
+        """Initializes an empty buffer.
+
+        Args:
+            max_spans (int): The number of spans kept.
+        """
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+
+    def start(self, span: Span, parent: Span | None) -> None:
+        """Ignores the start of a span."""
+
+    def export(self, span: Span) -> None:
+        """Keeps the span.
+
+        Args:
+            span (Span): The finished span.
+        """
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        """Drops every kept span."""
+        self.spans.clear()
+
+
+class OpenTelemetrySpanExporter:
+    """Mirrors spans as OpenTelemetry spans.
+
+    Spans are created through the globally configured tracer provider, such
+    as the Cloud Trace exporter set up by `adk web --trace_to_cloud`, and
+    nest under the ADK's own invocation and tool spans.
+    """
+
+    def __init__(self, tracer_name: str = 'resolutions_agent'):
+        """Gets the tracer.
+
+        Args:
+            tracer_name (str): The instrumentation scope name.
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+
+    def start(self, span: Span, parent: Span | None) -> None:
+        """Starts the matching OpenTelemetry span.
+
+        Args:
+            span (Span): The new span.
+            parent (Span | None): The enclosing span.
+        """
+        context = None
+        if parent is not None and parent._otel_span is not None:
+            context = self._trace.set_span_in_context(parent._otel_span)
+        span._otel_span = self._tracer.start_span(
+            span.name,
+            context=context,
+            start_time=int(span.start_time * 1e9),
+        )
+
+    def export(self, span: Span) -> None:
+        """Ends the matching OpenTelemetry span with the span attributes.
+
+        Args:
+            span (Span): The finished span.
+        """
+        otel_span = span._otel_span
+        if otel_span is None:
+            return
+        otel_span.set_attribute('invocation_id', span.trace_id)
+        for key, value in span.attributes.items():
+            if isinstance(value, bool | int | float | str):
+                otel_span.set_attribute(key, value)
+            else:
+                otel_span.set_attribute(key, str(value))
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    'current_span', default=None
+)
+_span_exporter: SpanExporter | None = None
+_exporter_lock = threading.Lock()
+
+
+def _build_exporter() -> SpanExporter:
+    """Builds the exporter selected by `TRACE_EXPORTER`."""
+    name = os.environ.get('TRACE_EXPORTER', 'none').lower()
+    if name == 'file':
+        return FileSpanExporter(os.environ.get('TRACE_FILE', 'traces.jsonl'))
+    if name == 'memory':
+        return MemorySpanExporter()
+    if name == 'otel':
+        return OpenTelemetrySpanExporter()
+    if name == 'none':
+        return NoopSpanExporter()
+    raise ValueError(f'Unknown TRACE_EXPORTER: {name}')
+
+
+def _exporter() -> SpanExporter:
+    """Returns the process-wide exporter, building it on first use."""
+    global _span_exporter
+    if _span_exporter is None:
+        with _exporter_lock:
+            if _span_exporter is None:
+                _span_exporter = _build_exporter()
+    return _span_exporter
+
+
+def set_exporter(exporter: SpanExporter | None) -> None:
+    """Replaces the process-wide exporter.
+
+    Args:
+        exporter (SpanExporter | None): The new exporter, or None to rebuild
+            it from the environment on next use.
+    """
+    global _span_exporter
+    with _exporter_lock:
+        _span_exporter = exporter
+
+
+def _is_sampled(trace_id: str) -> bool:
+    """Decides once per invocation whether it is traced."""
+    if isinstance(_exporter(), NoopSpanExporter):
+        return False
+    rate = float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+    if rate >= 1:
+        return True
+    digest = hashlib.blake2b(trace_id.encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little') / 2**64 < rate
+
+
+def start_span(
+    name: str, invocation_id: str | None = None, **attributes: Any
+) -> Span:
+    """Starts a span without making it the current span.
+
+    Prefer `span`; this is for spans that start and end in different
+    callbacks.
+
+    Args:
+        name (str): The operation.
+        invocation_id (str | None): The invocation of a root span. Nested
+            spans inherit the invocation of their parent.
+        **attributes (Any): The initial attributes.
+
+    Returns:
+        Span: The started span.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        trace_id, sampled = parent.trace_id, parent.sampled
+    else:
+        trace_id = invocation_id or uuid.uuid4().hex
+        sampled = _is_sampled(trace_id)
+    started = Span(
+        name,
+        trace_id,
+        parent.span_id if parent is not None else None,
+        sampled,
+        attributes if sampled else {},
+    )
+    if sampled:
+        _exporter().start(started, parent)
+    return started
+
+
+@contextmanager
+def span(
+    name: str, invocation_id: str | None = None, **attributes: Any
+) -> Iterator[Span]:
+    """Times a block of code as a span nested in the current one.
+
+    Args:
+        name (str): The operation.
+        invocation_id (str | None): The invocation of a root span.
+        **attributes (Any): The initial attributes.
+
+    Yields:
+        Span: The span, to add attributes to.
+    """
+    current = start_span(name, invocation_id, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def annotate(**attributes: Any) -> None:
+    """Adds attributes to the current span, if there is one.
+
+    Args:
+        **attributes (Any): The attributes to add.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+_agent_spans: OrderedDict[tuple[str, str], tuple[Span, Span | None]] = (
+    OrderedDict()
+)
+_agent_spans_lock = threading.Lock()
+
+
+def start_agent_span(callback_context: CallbackContext) -> Span:
+    """Starts the span of an agent run and makes it the current span.
+
+    Call from the agent's `before_agent_callback`, and end it with
+    `end_agent_span` when the agent finishes or is skipped.
+
+    Args:
+        callback_context (CallbackContext): The context of the agent run.
+
+    Returns:
+        Span: The agent span.
+    """
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    started = start_span(
+        f'agent.{callback_context.agent_name}', callback_context.invocation_id
+    )
+    if started.sampled:
+        # Counting the keys copies the whole state, so only exported spans
+        # pay for it.
+        started.set(state_keys=len(callback_context.state.to_dict()))
+    previous = _current_span.get()
+    _current_span.set(started)
+    with _agent_spans_lock:
+        _agent_spans[key] = (started, previous)
+        while len(_agent_spans) > _MAX_OPEN_AGENT_SPANS:
+            _agent_spans.popitem(last=False)
+    return started
+
+
+def end_agent_span(
+    callback_context: CallbackContext, **attributes: Any
+) -> None:
+    """Ends the span of an agent run.
+
+    Usable directly as an `after_agent_callback`.
+
+    Args:
+        callback_context (CallbackContext): The context of the agent run.
+        **attributes (Any): Attributes to add before ending, such as
+            `skipped=True`.
+    """
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    with _agent_spans_lock:
+        entry = _agent_spans.pop(key, None)
+    if entry is None:
+        return
+    started, previous = entry
+    started.set(**attributes)
+    if _current_span.get() is started:
+        _current_span.set(previous)
+    started.finish()
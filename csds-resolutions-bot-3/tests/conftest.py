@@ -0,0 +1,51 @@
+"""Shared fixtures of the unit tests."""
+
+import importlib
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _utils_modules() -> dict[str, ModuleType]:
+    """Returns the imported `utils` package and its submodules."""
+    return {
+        name: module
+        for name, module in sys.modules.items()
+        if name == 'utils' or name.startswith('utils.')
+    }
+
+
+@pytest.fixture
+def import_isolated() -> Callable[[str, str], ModuleType]:
+    """Imports a module of another import root than the agent.
+
+    The agent, the knowledge base builder and the project root each have a
+    `utils` package. The returned function imports a module with `root`
+    first on the path and the agent's `utils` modules set aside, then
+    restores them, so the module keeps its own `utils` imports. Other
+    `utils` directories are hidden from the path while importing, since a
+    regular package wins over the builder's namespace package.
+    """
+
+    def load(root: str, name: str) -> ModuleType:
+        saved = _utils_modules()
+        for module_name in saved:
+            del sys.modules[module_name]
+        saved_path = sys.path[:]
+        sys.path[:] = [str(PROJECT_ROOT / root)] + [
+            entry for entry in saved_path if not Path(entry, 'utils').is_dir()
+        ]
+        try:
+            return importlib.import_module(name)
+        finally:
+            sys.path[:] = saved_path
+            for module_name in _utils_modules():
+                del sys.modules[module_name]
+            sys.modules.update(saved)
+
+    return load
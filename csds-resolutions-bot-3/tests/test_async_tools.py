@@ -0,0 +1,65 @@
+"""Unit tests for the async agent tools."""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from tools import async_tools, tools
+
+
+def test_run_blocking_runs_off_the_calling_thread():
+    """The callable runs on the tool executor, off the calling thread."""
+    caller = threading.get_ident()
+    worker = asyncio.run(async_tools.run_blocking(threading.get_ident))
+    assert worker != caller
+
+
+def test_run_blocking_times_out():
+    """A callable slower than the timeout raises `TimeoutError`."""
+    with pytest.raises(TimeoutError):
+        asyncio.run(async_tools.run_blocking(time.sleep, 0.5, timeout=0.05))
+
+
+def test_check_order_status_reports_the_order():
+    """The status tool returns the order as JSON."""
+    response = json.loads(
+        asyncio.run(async_tools.check_order_status('WN40000001'))
+    )
+    assert response['order_id'] == 'WN40000001'
+    assert response['status'] == 'PROCESSING'
+
+
+def test_lookup_timeout_asks_for_a_retry(monkeypatch):
+    """A read-only tool that times out can simply be tried again."""
+    monkeypatch.setenv('TOOL_TIMEOUT_SECONDS', '0.05')
+
+    def slow_lookup(order_id):
+        time.sleep(0.3)
+        return {}
+
+    monkeypatch.setattr(tools, 'check_order_status_payload', slow_lookup)
+    response = json.loads(
+        asyncio.run(async_tools.check_order_status('WN40000002'))
+    )
+    assert response['status'] == 'TIMEOUT'
+    assert not response['success']
+
+
+def test_mutating_timeout_reports_an_unknown_outcome(monkeypatch):
+    """A timed-out cancellation may still complete, so it is not a failure."""
+    monkeypatch.setenv('TOOL_TIMEOUT_SECONDS', '0.05')
+    finished = threading.Event()
+
+    def slow_cancel(order_id):
+        time.sleep(0.3)
+        finished.set()
+        return {'success': True}
+
+    monkeypatch.setattr(tools, 'cancel_order_payload', slow_cancel)
+    response = json.loads(asyncio.run(async_tools.cancel_order('WN40000003')))
+    assert response['status'] == 'TIMEOUT_OUTCOME_UNKNOWN'
+    assert 'Check the order status' in response['message']
+    # The worker is not interrupted by the timeout.
+    assert finished.wait(1)
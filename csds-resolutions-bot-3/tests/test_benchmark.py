@@ -0,0 +1,32 @@
+"""Smoke test of the end-to-end pipeline benchmark."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BENCHMARK = Path(__file__).resolve().parents[1] / 'benchmarks' / 'main.py'
+
+
+def test_benchmark_runs_every_conversation(tmp_path):
+    """The pipeline runs against the stand-ins and reports every stage."""
+    report_path = tmp_path / 'report.json'
+    subprocess.run(
+        [
+            sys.executable,
+            str(BENCHMARK),
+            '--conversations=4',
+            '--sessions=2',
+            '--llm-ms=1',
+            '--rag-ms=1',
+            '--summary-ms=1',
+            f'--output={report_path}',
+        ],
+        check=True,
+        capture_output=True,
+        cwd=tmp_path,
+        timeout=120,
+    )
+    report = json.loads(report_path.read_text())
+    assert report['conversation_ms']['count'] == 4
+    assert 'tool.get_instructions_for_user_motivation' in report['stages_ms']
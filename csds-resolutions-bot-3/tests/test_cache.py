@@ -0,0 +1,115 @@
+"""Unit tests for the two-level instruction cache."""
+
+from tools.cache import InstructionCache, normalize_query
+
+
+class FakeClock:
+    """A settable monotonic clock."""
+
+    def __init__(self):
+        """Starts the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+def make_cache(**kwargs) -> InstructionCache:
+    """Builds a cache pinned to one knowledge base version."""
+    kwargs.setdefault('dimension', 256)
+    kwargs.setdefault('version_provider', lambda: 'v1')
+    return InstructionCache(**kwargs)
+
+
+def test_normalize_query_ignores_case_and_punctuation():
+    """Trivially different phrasings share one key."""
+    assert normalize_query('Cancel Order', 'Wants to cancel!') == (
+        normalize_query('cancel  order', 'wants to CANCEL')
+    )
+
+
+def test_exact_hit_and_miss():
+    """A stored request hits; an unrelated one misses."""
+    cache = make_cache()
+    cache.put('Cancel Order', 'The customer wants to cancel', 'steps')
+    assert cache.get('cancel order', 'the customer wants to cancel.') == (
+        'steps'
+    )
+    assert cache.get('Return Item', 'The customer wants a refund') is None
+    stats = cache.stats()
+    assert (stats['exact_hits'], stats['misses']) == (1, 1)
+
+
+def test_semantic_hit_stays_within_the_intent():
+    """Close motivations hit only under the same intent."""
+    cache = make_cache(semantic_distance=0.5)
+    cache.put(
+        'Cancel Order',
+        'The customer wants to cancel a recent order for a drill',
+        'cancel steps',
+    )
+    assert (
+        cache.get(
+            'Cancel Order',
+            'The customer wants to cancel a recent order for a drill today',
+        )
+        == 'cancel steps'
+    )
+    assert cache.stats()['semantic_hits'] == 1
+    assert (
+        cache.get(
+            'Return Item',
+            'The customer wants to cancel a recent order for a drill',
+        )
+        is None
+    )
+
+
+def test_version_change_invalidates_both_tiers():
+    """A new knowledge base version drops every entry."""
+    version = ['v1']
+    cache = make_cache(
+        semantic_distance=0.5, version_provider=lambda: version[0]
+    )
+    cache.put('Cancel Order', 'wants to cancel the order', 'old steps')
+    assert cache.get('Cancel Order', 'wants to cancel the order') == (
+        'old steps'
+    )
+
+    version[0] = 'v2'
+    assert cache.get('Cancel Order', 'wants to cancel the order') is None
+    stats = cache.stats()
+    assert stats['invalidations'] == 1
+    assert stats['kb_version'] == 'v2'
+    assert (stats['exact_entries'], stats['semantic_entries']) == (0, 0)
+
+    cache.put('Cancel Order', 'wants to cancel the order', 'new steps')
+    assert cache.get('Cancel Order', 'wants to cancel the order') == (
+        'new steps'
+    )
+
+
+def test_entries_expire_after_the_ttl():
+    """An entry older than the TTL is a miss."""
+    clock = FakeClock()
+    cache = make_cache(ttl_seconds=10, clock=clock)
+    cache.put('Cancel Order', 'wants to cancel', 'steps')
+    clock.now = 9.9
+    assert cache.get('Cancel Order', 'wants to cancel') == 'steps'
+    clock.now = 10.0
+    assert cache.get('Cancel Order', 'wants to cancel') is None
+    assert cache.stats()['expirations'] >= 1
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    """Beyond `max_entries`, the least recently used entry goes first."""
+    cache = make_cache(max_entries=2, semantic_distance=0)
+    cache.put('A', 'first', 'a')
+    cache.put('B', 'second', 'b')
+    assert cache.get('A', 'first') == 'a'
+    cache.put('C', 'third', 'c')
+    assert cache.get('B', 'second') is None
+    assert cache.get('A', 'first') == 'a'
+    assert cache.get('C', 'third') == 'c'
+    assert cache.stats()['evictions'] == 1
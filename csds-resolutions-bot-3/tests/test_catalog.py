@@ -0,0 +1,156 @@
+"""Unit tests for the indexed product catalog."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tools import catalog as catalog_module
+from tools.catalog import Product, ProductCatalog
+
+CATALOG = """sku,name,price,category
+DRILL1,Cordless Drill,$149.99,Power Tools
+LAMP3,Desk Lamp,$24.50,Lighting
+SAW2,Circular Saw,"$1,299.00",Power Tools
+DRILL1,Duplicate Drill,$1.00,Power Tools
+"""
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A small catalog CSV file."""
+    path = tmp_path / 'catalog.csv'
+    path.write_text(CATALOG, encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def catalog(source, tmp_path) -> ProductCatalog:
+    """The small catalog indexed in a temp directory."""
+    return ProductCatalog.open(source, tmp_path / 'index')
+
+
+def test_products_are_found_by_sku(catalog):
+    """Lookups return the first row of each SKU and miss unknown ones."""
+    assert len(catalog) == 3
+    assert catalog['DRILL1'] == Product(
+        'DRILL1', 'Cordless Drill', 14999, 'Power Tools'
+    )
+    assert catalog.get('SAW2').price == '$1299.00'
+    assert 'LAMP3' in catalog
+    assert 'MISSING' not in catalog
+    assert catalog.get('MISSING') is None
+    with pytest.raises(KeyError):
+        catalog['MISSING']
+
+
+def test_every_sku_of_a_large_catalog_is_found(tmp_path):
+    """The hash table finds every row despite probe collisions."""
+    source = tmp_path / 'large.csv'
+    rows = [f'SKU{number},Item {number},$1.00,Misc' for number in range(2000)]
+    source.write_text(
+        'sku,name,price,category\n' + '\n'.join(rows), encoding='utf-8'
+    )
+
+    large = ProductCatalog.open(source, tmp_path / 'index')
+
+    assert [large.row(f'SKU{number}') for number in range(2000)] == list(
+        range(2000)
+    )
+    assert large.row('SKU2000') is None
+
+
+def test_categories_keep_catalog_order(catalog):
+    """Category rows follow the file order and unknown ones are empty."""
+    assert [p.sku for p in catalog.in_category('Power Tools')] == [
+        'DRILL1',
+        'SAW2',
+    ]
+    assert [p.sku for p in catalog.in_category('Power Tools', limit=1)] == [
+        'DRILL1'
+    ]
+    assert len(catalog.category_rows('Garden')) == 0
+
+
+def test_pick_is_uniform_over_products_or_a_category(catalog):
+    """Fractions map to rows of the catalog or of each pick's category."""
+    fractions = np.array([0.0, 0.5, 0.99])
+
+    assert catalog.skus(catalog.pick(fractions)) == ['DRILL1', 'LAMP3', 'SAW2']
+    rows = catalog.pick(fractions, ['Power Tools', 'Power Tools', 'Lighting'])
+    assert catalog.skus(rows) == ['DRILL1', 'SAW2', 'LAMP3']
+    assert catalog.prices(rows).tolist() == [14999, 129900, 2450]
+    with pytest.raises(ValueError):
+        catalog.pick(fractions[:1], ['Garden'])
+
+
+def test_missing_columns_are_rejected(tmp_path):
+    """A catalog without the required columns is an error."""
+    source = tmp_path / 'catalog.csv'
+    source.write_text('sku,name\nDRILL1,Drill\n', encoding='utf-8')
+
+    with pytest.raises(ValueError, match='lacks columns'):
+        ProductCatalog.open(source, tmp_path / 'index')
+
+
+def test_reopening_reuses_the_index(source, tmp_path):
+    """An unchanged source is not compiled again."""
+    first = ProductCatalog.open(source, tmp_path / 'index')
+    manifest = first.index_dir / 'manifest.json'
+    built_at = manifest.stat().st_mtime_ns
+
+    second = ProductCatalog.open(source, tmp_path / 'index')
+
+    assert second.index_dir == first.index_dir
+    assert manifest.stat().st_mtime_ns == built_at
+
+
+def test_changed_source_prunes_only_old_generations(source, tmp_path):
+    """A new index replaces older ones and leaves other files alone."""
+    index_dir = tmp_path / 'index'
+    old = ProductCatalog.open(source, index_dir).index_dir
+    unrelated = [
+        index_dir / 'notes.txt',
+        index_dir / 'catalog-backup',
+        index_dir / 'catalog-0123456789abcdef',
+    ]
+    unrelated[0].write_text('keep me', encoding='utf-8')
+    unrelated[1].mkdir()
+    unrelated[2].mkdir()
+
+    source.write_text(CATALOG + 'HAMMER4,Hammer,$19.99,Hand Tools\n')
+    os.utime(source, ns=(0, source.stat().st_mtime_ns + 10**9))
+    new = ProductCatalog.open(source, index_dir)
+
+    assert new.index_dir != old
+    assert 'HAMMER4' in new
+    assert not old.exists()
+    assert all(path.exists() for path in unrelated)
+    assert not list(index_dir.glob('.build-*'))
+
+
+def test_get_catalog_follows_the_environment(source, tmp_path, monkeypatch):
+    """The process-wide catalog uses the configured source and index."""
+    monkeypatch.setenv('PRODUCT_CATALOG_PATH', str(source))
+    monkeypatch.setenv('PRODUCT_CATALOG_INDEX_DIR', str(tmp_path / 'shared'))
+    catalog_module.set_catalog(None)
+    try:
+        shared = catalog_module.get_catalog()
+        assert catalog_module.get_catalog() is shared
+        assert shared.index_dir.parent == tmp_path / 'shared'
+    finally:
+        catalog_module.set_catalog(None)
+
+
+def test_default_index_dir_is_the_user_cache(monkeypatch):
+    """Without the setting, indexes go to the user cache, not the package."""
+    monkeypatch.delenv('PRODUCT_CATALOG_INDEX_DIR', raising=False)
+
+    index_dir = catalog_module.catalog_index_dir()
+
+    assert index_dir == (
+        Path.home() / '.cache' / 'resolutions_agent' / 'product_catalog'
+    )
+    assert not index_dir.is_relative_to(
+        Path(catalog_module.__file__).parent.parent
+    )
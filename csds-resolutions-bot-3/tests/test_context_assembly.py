@@ -0,0 +1,126 @@
+"""Unit tests for the token-budgeted context assembly."""
+
+import pytest
+from tools.retrievers import RetrievedContext
+from tools.tools import build_summary_prompt
+from utils.context_assembly import (
+    AssemblyStats,
+    assemble_contexts,
+    estimate_tokens,
+)
+
+from utils import context_assembly
+
+
+def paragraph(topic: str, lines: int = 4) -> str:
+    """Builds a context of distinct lines about a topic."""
+    return '\n'.join(
+        f'Step {number} of the {topic} guide covers {topic} case {number}.'
+        for number in range(lines)
+    )
+
+
+def test_contexts_are_ordered_closest_first():
+    """Distances decide the order; without them the order is kept."""
+    texts = [paragraph('refund'), paragraph('delivery'), paragraph('billing')]
+
+    ordered = assemble_contexts(texts, distances=[0.5, 0.1, 0.3])
+    kept = assemble_contexts(texts)
+
+    assert ordered.texts == [texts[1], texts[2], texts[0]]
+    assert kept.texts == texts
+
+
+def test_summary_prompt_keeps_the_retriever_order():
+    """Contexts reach the prompt best first, whatever their distances."""
+    fused = [
+        RetrievedContext(paragraph('refund'), distance=0.9),
+        RetrievedContext(paragraph('delivery'), distance=0.1),
+    ]
+
+    prompt = build_summary_prompt('Refund', fused)
+
+    assert prompt.index('refund guide') < prompt.index('delivery guide')
+
+
+def test_duplicates_and_overlaps_are_dropped():
+    """Exact duplicates and contexts contained in a closer one are dropped."""
+    closest = paragraph('refund', lines=10)
+    reformatted = '  ' + closest.replace('\n', '\n\n') + '  '
+    contained = '\n'.join(closest.splitlines()[:9])
+
+    assembled = assemble_contexts(
+        [closest, reformatted, contained, paragraph('delivery'), '  ']
+    )
+
+    assert assembled.texts == [closest, paragraph('delivery')]
+    assert assembled.duplicates == 2
+
+
+def test_overlap_threshold_is_configurable():
+    """A lower threshold drops contexts sharing less of their text."""
+    first = paragraph('refund', lines=4)
+    half = '\n'.join(first.splitlines()[:2] + paragraph('tax', 2).splitlines())
+
+    assert len(assemble_contexts([first, half]).texts) == 2
+    assert len(assemble_contexts([first, half], max_overlap=0.4).texts) == 1
+
+
+def test_budget_truncates_at_a_line_break():
+    """The first context over budget is cut at its last fitting line."""
+    first = paragraph('refund', lines=20)
+    second = paragraph('delivery', lines=20)
+    budget = estimate_tokens(first) + 100
+
+    assembled = assemble_contexts([first, second], max_tokens=budget)
+
+    assert assembled.texts[0] == first
+    assert second.startswith(assembled.texts[1])
+    assert assembled.texts[1].endswith('.')
+    assert assembled.truncated == 1
+    assert assembled.output_tokens <= budget
+    assert assembled.trimmed_tokens == (
+        assembled.input_tokens - assembled.output_tokens
+    )
+
+
+def test_contexts_without_enough_budget_are_dropped():
+    """Too little budget left for a useful cut drops the context."""
+    first = paragraph('refund', lines=20)
+    budget = (
+        estimate_tokens(first) + context_assembly._MIN_TRUNCATED_TOKENS - 1
+    )
+
+    assembled = assemble_contexts(
+        [first, paragraph('delivery', lines=20)], max_tokens=budget
+    )
+
+    assert assembled.texts == [first]
+    assert (assembled.dropped, assembled.truncated) == (1, 0)
+
+
+@pytest.mark.parametrize(('value', 'expected'), [('0', None), ('500', 500)])
+def test_context_budget(monkeypatch, value, expected):
+    """A zero budget means unbounded."""
+    monkeypatch.setenv('SUMMARY_CONTEXT_MAX_TOKENS', value)
+    assert context_assembly.context_budget() == expected
+
+
+def test_stats_accumulate_assemblies():
+    """The totals sum every assembly and report the trimmed share."""
+    stats = AssemblyStats()
+    text = paragraph('refund', lines=20)
+    stats.record(assemble_contexts([text, text]))
+    stats.record(assemble_contexts([text], max_tokens=100))
+
+    snapshot = stats.snapshot()
+
+    assert snapshot['calls'] == 2
+    assert snapshot['duplicates'] == 1
+    assert snapshot['truncated'] == 1
+    assert snapshot['trimmed_tokens'] == (
+        snapshot['input_tokens'] - snapshot['output_tokens']
+    )
+    assert 0 < snapshot['trimmed_ratio'] < 1
+    stats.reset()
+    assert stats.snapshot()['calls'] == 0
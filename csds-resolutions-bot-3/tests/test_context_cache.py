@@ -0,0 +1,213 @@
+"""Unit tests for the model-side caching of static prompts."""
+
+import asyncio
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+from utils.context_cache import (
+    ContextCache,
+    LocalContextCacheBackend,
+    context_cache_stats,
+)
+from utils.prompts import PromptTemplate
+
+from utils import context_cache
+
+PROMPT = 'You resolve order issues.\n' * 8
+
+TOOLS = [
+    types.Tool(
+        function_declarations=[
+            types.FunctionDeclaration(
+                name='check_order_status', description='Checks an order.'
+            )
+        ]
+    )
+]
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    """Starts every test without a cache and with empty counters."""
+    context_cache_stats.reset()
+    yield
+    context_cache.set_context_cache(None)
+    context_cache_stats.reset()
+
+
+@pytest.fixture
+def prompt(tmp_path) -> PromptTemplate:
+    """An instruction file that is never reloaded."""
+    path = tmp_path / 'instructions.md'
+    path.write_text(PROMPT, encoding='utf-8')
+    return PromptTemplate(path, reload_interval=-1)
+
+
+def make_cache(**kwargs) -> ContextCache:
+    """Builds a cache over the local backend that caches small prompts."""
+    kwargs.setdefault('min_tokens', 10)
+    return ContextCache(LocalContextCacheBackend(), **kwargs)
+
+
+def request(system_instruction: str, model: str = 'flash') -> LlmRequest:
+    """Builds a request with one user message and the tools."""
+    return LlmRequest(
+        model=model,
+        contents=[types.Content(role='user', parts=[types.Part(text='Hi')])],
+        config=types.GenerateContentConfig(
+            system_instruction=system_instruction, tools=TOOLS
+        ),
+    )
+
+
+def test_small_prefixes_are_not_cached():
+    """A prefix below the model's minimum gets no handle."""
+    cache = make_cache(min_tokens=10_000)
+
+    assert asyncio.run(cache.handle('conversation', 'flash', PROMPT)) is None
+
+
+def test_handles_are_reused_per_slot_and_model():
+    """The same prefix reuses its handle; another model gets its own."""
+    cache = make_cache()
+
+    async def handles():
+        return [
+            await cache.handle('conversation', 'flash', PROMPT, TOOLS),
+            await cache.handle('conversation', 'flash', PROMPT, TOOLS),
+            await cache.handle('conversation', 'pro', PROMPT, TOOLS),
+        ]
+
+    first, again, other_model = asyncio.run(handles())
+
+    assert first == again != other_model
+    prefix = cache.backend.get(first)
+    assert (prefix.model, prefix.system_instruction) == ('flash', PROMPT)
+    assert (
+        context_cache_stats.snapshot()['conversation']['handles_created'] == 2
+    )
+
+
+def test_changed_prompt_replaces_the_handle():
+    """A reloaded prompt gets a new handle and the old one is deleted."""
+    cache = make_cache()
+
+    async def handles():
+        return [
+            await cache.handle('conversation', 'flash', PROMPT),
+            await cache.handle('conversation', 'flash', PROMPT + 'Be brief.'),
+        ]
+
+    old, new = asyncio.run(handles())
+
+    assert old != new
+    assert cache.backend.get(old) is None
+    assert cache.backend.get(new) is not None
+    stats = context_cache_stats.snapshot()['conversation']
+    assert stats['handles_deleted'] == 1
+
+
+def test_handles_are_recreated_before_expiry():
+    """A handle within its refresh window is replaced."""
+    cache = make_cache(ttl_seconds=60, refresh_seconds=60)
+
+    async def handles():
+        return [
+            await cache.handle('conversation', 'flash', PROMPT),
+            await cache.handle('conversation', 'flash', PROMPT),
+        ]
+
+    first, second = asyncio.run(handles())
+
+    assert first != second
+
+
+def test_concurrent_requests_create_one_handle():
+    """Callers racing for a new handle share a single creation."""
+    cache = make_cache()
+
+    async def handles():
+        return await asyncio.gather(
+            *(cache.handle('conversation', 'flash', PROMPT) for _ in range(5))
+        )
+
+    assert len(set(asyncio.run(handles()))) == 1
+
+
+def test_apply_moves_the_dynamic_tail_to_the_contents(prompt):
+    """The static prefix and tools become a handle; the tail a message."""
+    cache = make_cache()
+    original = request(f'{PROMPT}\n\nRetrieved steps: refund.')
+
+    rewritten = asyncio.run(cache.apply(original, prompt, 'conversation'))
+
+    config = rewritten.config
+    assert config.cached_content
+    assert config.system_instruction is None
+    assert config.tools is None
+    assert [content.parts[0].text for content in rewritten.contents] == [
+        'Retrieved steps: refund.',
+        'Hi',
+    ]
+    assert original.config.system_instruction.startswith(PROMPT)
+    assert (
+        context_cache_stats.snapshot()['conversation']['cached_requests'] == 1
+    )
+
+
+def test_apply_keeps_requests_it_cannot_cache(prompt):
+    """Requests without the prompt text are sent unchanged."""
+    cache = make_cache()
+    original = request('Another instruction entirely.')
+
+    assert asyncio.run(cache.apply(original, prompt, 'conversation')) is (
+        original
+    )
+
+
+def test_clear_deletes_every_handle():
+    """Clearing the cache deletes the handle of every slot."""
+    cache = make_cache()
+
+    async def create_and_clear():
+        names = [
+            await cache.handle('conversation', 'flash', PROMPT),
+            await cache.handle('router', 'flash', PROMPT),
+        ]
+        await cache.clear()
+        return names
+
+    names = asyncio.run(create_and_clear())
+
+    assert [cache.backend.get(name) for name in names] == [None, None]
+
+
+def test_backend_follows_the_environment(monkeypatch):
+    """The cache is off by default and rejects unknown backends."""
+    monkeypatch.delenv('CONTEXT_CACHE_BACKEND', raising=False)
+    assert context_cache.get_context_cache() is None
+
+    monkeypatch.setenv('CONTEXT_CACHE_BACKEND', 'local')
+    monkeypatch.setenv('CONTEXT_CACHE_TTL_SECONDS', '120')
+    cache = context_cache._build_context_cache()
+    assert isinstance(cache.backend, LocalContextCacheBackend)
+    assert cache.ttl_seconds == 120
+
+    monkeypatch.setenv('CONTEXT_CACHE_BACKEND', 'redis')
+    with pytest.raises(ValueError, match='CONTEXT_CACHE_BACKEND'):
+        context_cache._build_context_cache()
+
+
+def test_apply_context_cache_falls_back_on_errors():
+    """A failing cache never fails the model call."""
+    context_cache.set_context_cache(make_cache())
+    original = request(PROMPT)
+
+    rewritten = asyncio.run(
+        context_cache.apply_context_cache(
+            original, 'missing_prompt.md', 'conversation'
+        )
+    )
+
+    assert rewritten is original
@@ -0,0 +1,87 @@
+"""Unit tests for the encoding of tool responses."""
+
+import json
+import types
+
+from tools.encoding import (
+    MENTIONED_SKUS_KEY,
+    ResponseStats,
+    compact_payload,
+    encode_response,
+    estimate_tokens,
+)
+
+PRODUCT = {'name': 'Drill', 'price': '$149.99', 'sku': 'DCD778C2'}
+
+
+def test_compact_payload_drops_null_fields_recursively():
+    """Null fields are dropped at every level; falsy values are kept."""
+    payload = {
+        'success': False,
+        'refund_id': None,
+        'remorse_period': {'minutes_left': 0, 'note': None},
+        'orders': [{'order_id': 'WN1', 'delivery_date': None}],
+    }
+    assert compact_payload(payload, set()) == {
+        'success': False,
+        'remorse_period': {'minutes_left': 0},
+        'orders': [{'order_id': 'WN1'}],
+    }
+
+
+def test_compact_payload_sends_each_product_once():
+    """A product already mentioned is reduced to its SKU."""
+    mentioned = set()
+    payload = {'orders': [{'product': PRODUCT}, {'product': PRODUCT}]}
+    assert compact_payload(payload, mentioned) == {
+        'orders': [{'product': PRODUCT}, {'product': {'sku': 'DCD778C2'}}]
+    }
+    assert mentioned == {'DCD778C2'}
+
+
+def test_compact_payload_does_not_mutate_its_input():
+    """The payload is copied, not compacted in place."""
+    payload = {'product': dict(PRODUCT), 'refund_id': None}
+    compact_payload(payload, {'DCD778C2'})
+    assert payload == {'product': PRODUCT, 'refund_id': None}
+
+
+def test_compact_mode_tracks_mentions_in_session_state(monkeypatch):
+    """Products sent in one response are reduced in the next."""
+    monkeypatch.setenv('TOOL_RESPONSE_MODE', 'compact')
+    context = types.SimpleNamespace(state={})
+    first = encode_response(
+        'check_order_status', {'product': PRODUCT}, context
+    )
+    second = encode_response(
+        'check_order_status', {'product': PRODUCT}, context
+    )
+    assert json.loads(first) == {'product': PRODUCT}
+    assert json.loads(second) == {'product': {'sku': 'DCD778C2'}}
+    assert ' ' not in second
+    assert context.state[MENTIONED_SKUS_KEY] == ['DCD778C2']
+
+
+def test_pretty_mode_keeps_every_field(monkeypatch):
+    """The default encoding is indented JSON of the full payload."""
+    monkeypatch.delenv('TOOL_RESPONSE_MODE', raising=False)
+    payload = {'product': PRODUCT, 'refund_id': None}
+    text = encode_response('cancel_order', payload)
+    assert json.loads(text) == payload
+    assert text == json.dumps(payload, indent=2)
+
+
+def test_response_stats_totals_and_averages():
+    """Stats accumulate per tool and reset to empty."""
+    stats = ResponseStats()
+    assert stats.record('cancel_order', 'x' * 8) == estimate_tokens('x' * 8)
+    stats.record('cancel_order', 'x' * 4)
+    snapshot = stats.snapshot()['cancel_order']
+    assert (snapshot['calls'], snapshot['chars'], snapshot['tokens']) == (
+        2,
+        12,
+        3,
+    )
+    assert snapshot['avg_chars'] == 6
+    stats.reset()
+    assert stats.snapshot() == {}
@@ -0,0 +1,67 @@
+"""Unit tests for matching pre-summarized resolution guides."""
+
+import json
+
+import pytest
+from tools.guides import load_resolution_guides, match_resolution_guide
+from tools.knowledge_base import knowledge_base_version
+from tools.retrievers import RetrievedContext
+
+
+@pytest.fixture
+def guides(tmp_path, monkeypatch):
+    """Points the guides at an artifact of the current knowledge base."""
+
+    def write(kb_version: str) -> None:
+        path = tmp_path / f'guides-{kb_version}.json'
+        path.write_text(
+            json.dumps(
+                {
+                    'format_version': 1,
+                    'kb_version': kb_version,
+                    'guides': {'Cancel Order': 'cancel guide'},
+                }
+            )
+        )
+        monkeypatch.setenv('RESOLUTION_GUIDES_PATH', str(path))
+
+    write(knowledge_base_version())
+    return write
+
+
+def context(intent: str | None, distance: float) -> RetrievedContext:
+    """Builds a retrieved context of an intent."""
+    return RetrievedContext(text='', distance=distance, intent=intent)
+
+
+def test_confident_match_serves_the_guide(guides):
+    """A close context well ahead of other intents gets its guide."""
+    contexts = [
+        context('Cancel Order', 0.2),
+        context('Cancel Order', 0.25),
+        context('Return Item', 0.4),
+    ]
+    assert match_resolution_guide(contexts, 0.5, 0.1) == 'cancel guide'
+
+
+@pytest.mark.parametrize(
+    'contexts',
+    [
+        [],
+        [context(None, 0.1)],
+        [context('Cancel Order', 0.6)],
+        [context('Cancel Order', 0.2), context('Return Item', 0.25)],
+        [context('Return Item', 0.1)],
+    ],
+    ids=['empty', 'no-intent', 'too-far', 'ambiguous', 'no-guide'],
+)
+def test_unconfident_match_needs_a_summary(guides, contexts):
+    """Anything short of a confident match with a guide returns None."""
+    assert match_resolution_guide(contexts, 0.5, 0.1) is None
+
+
+def test_guides_of_another_kb_version_are_ignored(guides):
+    """An artifact built from a different knowledge base is not served."""
+    guides('stale')
+    assert load_resolution_guides() == {}
+    assert match_resolution_guide([context('Cancel Order', 0.1)]) is None
@@ -0,0 +1,240 @@
+"""Tests of the shared HTTP client against a local stub server."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+
+class StubServer(ThreadingHTTPServer):
+    """HTTP/1.1 server recording requests and scripted failures."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Listens on a free local port."""
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.requests: list[tuple[str, int, dict]] = []
+        self.failures = 0
+        self.delay = 0.0
+        self.tokens = 0
+        self.expires_in = 3600
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def hits(self, path: str) -> int:
+        """Returns how many requests a path received."""
+        return sum(request[0] == path for request in self.requests)
+
+    def handle_error(self, request, client_address):
+        """Ignores clients that hung up on a slow response."""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes of the stub server."""
+
+    protocol_version = 'HTTP/1.1'
+    server: StubServer
+
+    def log_message(self, format, *args):
+        """Keeps the test output quiet."""
+
+    def _send(self, status: int, body: dict | None = None, **headers) -> None:
+        """Sends a response, with a JSON body unless there is none."""
+        data = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        """Serves the echo, flaky, slow and schema routes."""
+        with self.server.lock:
+            self.server.requests.append(
+                (self.path, self.client_address[1], dict(self.headers))
+            )
+            failing = self.server.failures > 0
+            self.server.failures -= failing
+        if self.path == '/slow':
+            time.sleep(self.server.delay)
+        if self.path == '/flaky' and failing:
+            self._send(503, {'error': 'unavailable'})
+        elif self.path.startswith('/schema'):
+            if failing:
+                self._send(401 if 'denied' in self.path else 500, {})
+            elif self.headers.get('If-None-Match') == '"v1"':
+                self._send(304)
+            else:
+                self._send(200, {'openapi': '3.0.0'}, ETag='"v1"')
+        else:
+            self._send(200, {'path': self.path})
+
+    def do_POST(self):
+        """Issues a new client-credentials token."""
+        self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.requests.append((self.path, 0, dict(self.headers)))
+            self.server.tokens += 1
+            token = f'token-{self.server.tokens}'
+        self._send(
+            200,
+            {'access_token': token, 'expires_in': self.server.expires_in},
+        )
+
+
+@pytest.fixture
+def http_client(import_isolated, monkeypatch):
+    """The project's HTTP client module with a fresh session."""
+    module = import_isolated('.', 'utils.http_client')
+    monkeypatch.setattr(module, '_session', None)
+    yield module
+    if module._session is not None:
+        module._session.close()
+
+
+@pytest.fixture
+def server():
+    """A stub server running on a background thread."""
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_kept_alive(http_client, server):
+    """Sequential requests reuse one pooled connection."""
+    session = http_client.get_session()
+    for _ in range(5):
+        response = session.get(f'{server.url}/echo', timeout=1)
+        assert response.json() == {'path': '/echo'}
+
+    assert http_client.get_session() is session
+    assert len({port for _, port, _ in server.requests}) == 1
+
+
+def test_gateway_errors_are_retried(http_client, server):
+    """Two 503 responses are retried before the request succeeds."""
+    server.failures = 2
+
+    response = http_client.get_session().get(f'{server.url}/flaky', timeout=1)
+
+    assert response.status_code == 200
+    assert server.hits('/flaky') == 3
+
+
+def test_retries_are_bounded(http_client, server):
+    """A dependency that keeps failing fails the request after two retries."""
+    server.failures = 10
+
+    with pytest.raises(requests.exceptions.RetryError):
+        http_client.get_session().get(f'{server.url}/flaky', timeout=1)
+    assert server.hits('/flaky') == 3
+
+
+def test_read_timeout_is_configurable(http_client, server, monkeypatch):
+    """A response slower than the read timeout is retried, then fails."""
+    monkeypatch.setenv('HTTP_READ_TIMEOUT_SECONDS', '0.05')
+    server.delay = 0.3
+
+    start = time.monotonic()
+    with pytest.raises(requests.RequestException):
+        http_client.get_session().get(
+            f'{server.url}/slow', timeout=http_client.request_timeout()
+        )
+    assert time.monotonic() - start < 3 * server.delay
+    assert server.hits('/slow') == 3
+
+
+def test_tokens_are_cached_until_close_to_expiry(http_client, server):
+    """A token is reused until its refresh margin, then renewed."""
+    cache = http_client.TokenCache(refresh_margin=60)
+    token_url = f'{server.url}/token'
+
+    assert cache.get(token_url, 'client', 'secret', 'scope') == 'token-1'
+    assert cache.get(token_url, 'client', 'secret', 'scope') == 'token-1'
+    cache.invalidate(token_url, 'client', 'scope')
+    assert cache.get(token_url, 'client', 'secret', 'scope') == 'token-2'
+
+    server.expires_in = 30
+    assert cache.get(token_url, 'client', 'secret', 'other') == 'token-3'
+    assert cache.get(token_url, 'client', 'secret', 'other') == 'token-4'
+
+
+def test_concurrent_callers_share_one_token_request(http_client, server):
+    """Callers missing the same token wait for a single request."""
+    cache = http_client.TokenCache()
+    token_url = f'{server.url}/token'
+    tokens = []
+
+    def get_token():
+        tokens.append(cache.get(token_url, 'client', 'secret', 'scope'))
+
+    threads = [threading.Thread(target=get_token) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ['token-1'] * 8
+    assert server.hits('/token') == 1
+
+
+def test_schemas_are_revalidated_with_their_etag(
+    http_client, server, tmp_path
+):
+    """A stale schema costs a 304 response instead of a download."""
+    cache = http_client.OpenApiSchemaCache(tmp_path, max_age=0)
+    url = f'{server.url}/schema'
+
+    assert cache.get(url) == {'openapi': '3.0.0'}
+    assert cache.get(url) == {'openapi': '3.0.0'}
+
+    first, second = (headers for _, _, headers in server.requests)
+    assert 'If-None-Match' not in first
+    assert second['If-None-Match'] == '"v1"'
+
+
+def test_fresh_schemas_are_read_from_disk(http_client, server, tmp_path):
+    """A schema younger than the max age is served without a request."""
+    url = f'{server.url}/schema'
+    http_client.OpenApiSchemaCache(tmp_path).get(url)
+
+    cache = http_client.OpenApiSchemaCache(tmp_path)
+
+    assert cache.get(url) == {'openapi': '3.0.0'}
+    assert server.hits('/schema') == 1
+
+
+def test_cached_schema_survives_server_errors(http_client, server, tmp_path):
+    """A failed revalidation serves the cached schema."""
+    cache = http_client.OpenApiSchemaCache(tmp_path, max_age=0)
+    url = f'{server.url}/schema'
+    cache.get(url)
+    server.failures = 1
+
+    assert cache.get(url) == {'openapi': '3.0.0'}
+
+
+def test_rejected_token_is_not_masked_by_the_cache(
+    http_client, server, tmp_path
+):
+    """A 401 is raised so the caller can renew its token."""
+    cache = http_client.OpenApiSchemaCache(tmp_path, max_age=0)
+    url = f'{server.url}/schema-denied'
+    cache.get(url)
+    server.failures = 1
+
+    with pytest.raises(requests.HTTPError) as error:
+        cache.get(url)
+    assert http_client.is_unauthorized(error.value)
@@ -0,0 +1,63 @@
+"""Unit tests for the hybrid BM25 and dense retriever."""
+
+import numpy as np
+import pytest
+from tools.hybrid import BM25Index, HybridRetriever
+from tools.knowledge_base import load_knowledge_base
+
+
+@pytest.fixture(scope='module')
+def entries():
+    """The knowledge base entries."""
+    return load_knowledge_base()
+
+
+@pytest.fixture(scope='module')
+def retriever(entries):
+    """A hybrid retriever over the knowledge base."""
+    return HybridRetriever(entries)
+
+
+def test_bm25_scores_only_entries_sharing_a_term(entries):
+    """Unknown words score nothing; intent words rank their entry first."""
+    index = BM25Index(entries)
+    assert not index.scores('xyzzy plugh').any()
+    scores = index.scores('damaged product return')
+    assert entries[int(np.argmax(scores))]['intent'] == (
+        'Damaged Product Return'
+    )
+
+
+def test_retrieve_ranks_the_matching_intent_first(retriever):
+    """Both signals agree on the intent the query describes."""
+    contexts = retriever.retrieve(
+        'someone accessed my account without authorization'
+    )
+    assert contexts[0].intent == 'Account Security'
+
+
+def test_adaptive_cutoff_drops_weak_candidates(retriever):
+    """Candidates far behind the best one on both signals are dropped."""
+    contexts = retriever.retrieve('I want to return a damaged item', top_k=10)
+    assert contexts[0].intent == 'Damaged Product Return'
+    assert len(contexts) < retriever.candidates
+
+
+def test_top_k_caps_the_results(retriever):
+    """At most `top_k` contexts are returned."""
+    assert len(retriever.retrieve('order delivery', top_k=2)) <= 2
+    assert retriever.retrieve('order delivery', top_k=0) == []
+
+
+def test_reranker_reorders_the_survivors(entries):
+    """A reranker sees the fused candidates and sets the final order."""
+
+    class ReverseReranker:
+        def rerank(self, query, contexts):
+            return contexts[::-1]
+
+    plain = HybridRetriever(entries).retrieve('order delivery', top_k=10)
+    reranked = HybridRetriever(entries, reranker=ReverseReranker()).retrieve(
+        'order delivery', top_k=10
+    )
+    assert reranked == plain[::-1]
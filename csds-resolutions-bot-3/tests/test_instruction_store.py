@@ -0,0 +1,120 @@
+"""Unit tests for keeping instruction text out of session state."""
+
+import asyncio
+import types
+
+import pytest
+from order_resolution import callbacks
+from tools import instruction_store
+from tools.instruction_store import (
+    INSTRUCTIONS_KEY,
+    InstructionStore,
+    instruction_ref,
+    instructions_query,
+    resolve_instructions,
+    store_instructions,
+)
+from tools.tools import CLARIFICATION_RESPONSE
+
+
+class FakeState(dict):
+    """Session state with the `to_dict` of ADK's `State`."""
+
+    def to_dict(self) -> dict:
+        """Returns a copy of the state."""
+        return dict(self)
+
+
+def callback_context(state: dict) -> types.SimpleNamespace:
+    """Builds the parts of a callback context the callbacks use."""
+    return types.SimpleNamespace(
+        state=FakeState(state),
+        agent_name='order_agent',
+        invocation_id='invocation-1',
+    )
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    """Installs an empty process-wide instruction store."""
+    store = InstructionStore()
+    monkeypatch.setattr(instruction_store, '_instruction_store', store)
+    return store
+
+
+def restart(monkeypatch) -> None:
+    """Simulates a worker that never saw the stored instructions."""
+    monkeypatch.setattr(
+        instruction_store, '_instruction_store', InstructionStore()
+    )
+
+
+def test_identical_texts_share_one_entry(store):
+    """A text is stored once under its content address."""
+    assert store.put('Step 1.') == store.put('Step 1.')
+    assert store.put('Step 1.') == instruction_ref('Step 1.')
+    assert store.stats()['entries'] == 1
+
+
+def test_store_evicts_least_recently_used():
+    """Beyond `max_entries`, the least recently read text goes first."""
+    store = InstructionStore(max_entries=2)
+    first, second = store.put('a'), store.put('b')
+    assert store.get(first) == 'a'
+    store.put('c')
+    assert store.get(second) is None
+    assert store.get(first) == 'a'
+    assert store.stats()['evictions'] == 1
+
+
+def test_state_holds_only_the_reference_and_query():
+    """State keeps a reference and the lookup, never the text."""
+    state = {}
+    ref = store_instructions(state, 'Step 1. ' * 100, 'Cancel Order', 'why')
+    assert state[INSTRUCTIONS_KEY] == ref
+    assert 'Step 1.' not in str(state)
+    assert instructions_query(state) == ('Cancel Order', 'why')
+    assert resolve_instructions(state) == 'Step 1. ' * 100
+
+
+def test_inline_instructions_of_older_sessions_resolve():
+    """Values without the reference prefix are the instructions."""
+    assert resolve_instructions({INSTRUCTIONS_KEY: 'Step 1.'}) == 'Step 1.'
+    assert resolve_instructions({}) is None
+
+
+def test_recovery_looks_up_missing_instructions(monkeypatch):
+    """Another worker redoes the lookup recorded with the reference."""
+    context = callback_context({})
+    store_instructions(context.state, 'Step 1.', 'Cancel Order', 'why')
+    restart(monkeypatch)
+    calls = []
+
+    async def lookup(intent, customer_motivation, context):
+        calls.append((intent, customer_motivation))
+        return 'Step 1.'
+
+    monkeypatch.setattr(callbacks, 'lookup_instructions', lookup)
+    result = asyncio.run(callbacks.check_if_agent_should_run(context))
+    assert result is None
+    assert calls == [('Cancel Order', 'why')]
+    assert resolve_instructions(context.state) == 'Step 1.'
+
+
+@pytest.mark.parametrize('recorded_query', [True, False])
+def test_unrecoverable_instructions_skip_the_agent(
+    monkeypatch, recorded_query
+):
+    """Without a usable lookup the reference is cleared and the agent skips."""
+    context = callback_context({})
+    query = ('Cancel Order', 'why') if recorded_query else ()
+    store_instructions(context.state, 'Step 1.', *query)
+    restart(monkeypatch)
+
+    async def lookup(intent, customer_motivation, context):
+        return CLARIFICATION_RESPONSE
+
+    monkeypatch.setattr(callbacks, 'lookup_instructions', lookup)
+    result = asyncio.run(callbacks.check_if_agent_should_run(context))
+    assert 'skipped' in result.parts[0].text
+    assert context.state[INSTRUCTIONS_KEY] is None
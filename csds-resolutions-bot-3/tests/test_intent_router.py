@@ -0,0 +1,71 @@
+"""Unit tests for the fast-path intent classifier."""
+
+import pytest
+from tools.intent_router import (
+    IntentClassifier,
+    router_enabled,
+    router_threshold,
+)
+from tools.knowledge_base import load_knowledge_base
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    """A classifier over the knowledge base."""
+    return IntentClassifier.from_knowledge_base()
+
+
+def test_clear_message_is_confident(classifier):
+    """A message describing one intent gets it with high confidence."""
+    prediction = classifier.predict(
+        'my delivery is late and the package is missing'
+    )
+    assert prediction.intent == 'Late/Missing Delivery'
+    assert prediction.confidence > 0.9
+    assert prediction.runner_up not in (None, prediction.intent)
+
+
+def test_ambiguous_message_has_low_confidence(classifier):
+    """A message fitting two intents splits the probability mass."""
+    prediction = classifier.predict('please cancel my order I placed today')
+    assert {prediction.intent, prediction.runner_up} == {
+        'Cancel Order',
+        'Order Cancellation',
+    }
+    assert prediction.confidence < 0.8
+
+
+@pytest.mark.parametrize(
+    'message', ['I want to return', 'xyzzy plugh frobnicate']
+)
+def test_vague_or_unrelated_message_is_not_classified(classifier, message):
+    """Too few content words, or none in the knowledge base, give None."""
+    assert classifier.predict(message) is None
+
+
+def test_single_intent_knowledge_base():
+    """With one intent there is no runner-up to compare against."""
+    entry = next(
+        entry
+        for entry in load_knowledge_base()
+        if entry['intent'] == 'Account Security'
+    )
+    prediction = IntentClassifier([entry]).predict(
+        'unauthorized access to my home depot account'
+    )
+    assert prediction.intent == 'Account Security'
+    assert prediction.confidence == pytest.approx(1.0)
+    assert prediction.runner_up is None
+
+
+def test_empty_knowledge_base_predicts_nothing():
+    """Without entries nothing is classified."""
+    assert IntentClassifier([]).predict('cancel my order please') is None
+
+
+def test_router_settings(monkeypatch):
+    """The router is off by default and its threshold is configurable."""
+    monkeypatch.delenv('INTENT_ROUTER_ENABLED', raising=False)
+    monkeypatch.setenv('INTENT_ROUTER_THRESHOLD', '0.95')
+    assert not router_enabled()
+    assert router_threshold() == 0.95
@@ -0,0 +1,120 @@
+"""Unit tests for the per-intent knowledge base documents."""
+
+import json
+
+import pytest
+from tools import knowledge_base
+
+
+def make_entry(intent: str, **fields) -> dict:
+    """Builds a minimal knowledge base entry."""
+    return {
+        'intent': intent,
+        'customer_motivation': 'I need help.',
+        'resolution_goals': ['Resolve the issue.'],
+        'resolution_guide': [
+            {'step': 'Check', 'details': ['Look it up.', 'Confirm.']}
+        ],
+        **fields,
+    }
+
+
+@pytest.fixture
+def kb_documents(import_isolated):
+    """The knowledge base builder's documents module."""
+    return import_isolated('construct_kb', 'utils.kb_documents')
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch, kb_documents):
+    """A knowledge base and its documents artifact used by the agent."""
+    source = tmp_path / 'kb.json'
+    source.write_text(
+        json.dumps([make_entry('Late Order'), make_entry('Refund Status')]),
+        encoding='utf-8',
+    )
+    destination = tmp_path / 'kb_documents.json'
+    artifact = kb_documents.build_kb_documents(str(source), str(destination))
+    monkeypatch.setenv('KNOWLEDGE_BASE_PATH', str(source))
+    monkeypatch.setenv('KB_DOCUMENTS_PATH', str(destination))
+    return source, destination, artifact
+
+
+def test_entry_key_is_a_slug(kb_documents):
+    """Intents become lowercase, dash-separated keys."""
+    assert kb_documents.entry_key({'intent': ' Late / Missing Order!'}) == (
+        'late-missing-order'
+    )
+
+
+def test_entry_category_prefers_explicit_category(kb_documents):
+    """An explicit category wins, otherwise the intent decides."""
+    assert kb_documents.entry_category(make_entry('Cancel Order')) == (
+        'cancellation'
+    )
+    assert kb_documents.entry_category(make_entry('Refund Status')) == (
+        'returns'
+    )
+    assert kb_documents.entry_category(make_entry('Hello')) == 'general'
+    assert (
+        kb_documents.entry_category(make_entry('Hello', category='billing'))
+        == 'billing'
+    )
+
+
+def test_render_kb_document_lists_every_step(kb_documents):
+    """The document carries the intent, category, goals and steps."""
+    text = kb_documents.render_kb_document(make_entry('Late Order'))
+
+    assert text.splitlines() == [
+        'Intent: Late Order',
+        'Category: orders',
+        'Customer Motivation: I need help.',
+        'Resolution Goals:',
+        '- Resolve the issue.',
+        'Resolution Guide:',
+        '1. Check: Look it up. Confirm.',
+    ]
+
+
+def test_agent_uses_built_documents(built, kb_documents):
+    """The agent hands the summarizer the built document of an entry."""
+    source, _, artifact = built
+
+    assert artifact['kb_version'] == knowledge_base.knowledge_base_version(
+        source
+    )
+    entry = knowledge_base.knowledge_base_entry('Late Order')
+    assert knowledge_base.entry_document_text(entry) == (
+        kb_documents.render_kb_document(entry)
+    )
+
+
+def test_intent_of_document_ignores_sync_suffix(built):
+    """Document IDs resolve to intents with or without the hash suffix."""
+    assert knowledge_base.intent_of_document('late-order') == 'Late Order'
+    assert (
+        knowledge_base.intent_of_document('refund-status-0123456789ab')
+        == 'Refund Status'
+    )
+    assert knowledge_base.intent_of_document('unknown') is None
+
+
+def test_stale_documents_are_ignored(built):
+    """Documents built from another knowledge base version are not used."""
+    source, _, _ = built
+    entry = make_entry('Late Order', customer_motivation='Where is it?')
+    source.write_text(json.dumps([entry]), encoding='utf-8')
+
+    assert knowledge_base.load_kb_documents() == {}
+    assert json.loads(knowledge_base.entry_document_text(entry)) == entry
+
+
+def test_shipped_documents_match_shipped_knowledge_base(monkeypatch):
+    """The committed artifact is rebuilt with the committed knowledge base."""
+    monkeypatch.delenv('KNOWLEDGE_BASE_PATH', raising=False)
+    monkeypatch.delenv('KB_DOCUMENTS_PATH', raising=False)
+
+    documents = knowledge_base.load_kb_documents()
+
+    assert len(documents) == len(knowledge_base.load_knowledge_base())
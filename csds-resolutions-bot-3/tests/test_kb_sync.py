@@ -0,0 +1,204 @@
+"""Unit tests for the incremental knowledge base sync."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+
+def make_entry(intent: str, motivation: str = 'I need help.') -> dict:
+    """Builds a minimal knowledge base entry."""
+    return {
+        'intent': intent,
+        'customer_motivation': motivation,
+        'resolution_goals': ['Resolve the issue.'],
+        'resolution_guide': [{'step': 'Check', 'details': ['Look it up.']}],
+    }
+
+
+@pytest.fixture
+def kb_sync(import_isolated):
+    """The knowledge base builder's sync module."""
+    return import_isolated('construct_kb', 'utils.kb_sync')
+
+
+@pytest.fixture
+def workspace(tmp_path, kb_sync):
+    """A source file, manifest path and local stores in a temp directory."""
+
+    class Workspace:
+        source = tmp_path / 'kb.json'
+        manifest = str(tmp_path / 'manifest.json')
+        blobs = kb_sync.LocalBlobStore(str(tmp_path / 'bucket'))
+        corpus = kb_sync.LocalRagCorpus(str(tmp_path / 'rag'))
+
+        def write(self, entries: list[dict]) -> None:
+            """Replaces the knowledge base."""
+            self.source.write_text(json.dumps(entries), encoding='utf-8')
+
+        def manifest_json(self) -> dict:
+            """Reads the saved manifest."""
+            return json.loads(Path(self.manifest).read_text(encoding='utf-8'))
+
+        def sync(self, **kwargs):
+            """Syncs the knowledge base to the local stores."""
+            return kb_sync.sync_knowledge_base(
+                str(self.source),
+                self.manifest,
+                self.blobs,
+                self.corpus,
+                'kb',
+                **kwargs,
+            )
+
+    return Workspace()
+
+
+def test_load_manifest_without_file_is_empty(tmp_path, kb_sync):
+    """A missing manifest means nothing was published yet."""
+    manifest = kb_sync.load_manifest(str(tmp_path / 'missing.json'))
+
+    assert manifest['entries'] == {}
+    assert manifest['corpus_name'] is None
+
+
+def test_manifest_round_trip(tmp_path, kb_sync):
+    """A saved manifest loads back unchanged, without temp files."""
+    path = str(tmp_path / 'manifest.json')
+    manifest = {
+        'format_version': kb_sync.MANIFEST_FORMAT_VERSION,
+        'corpus_name': 'corpora/kb',
+        'entries': {'a': {'hash': 'h'}},
+    }
+
+    kb_sync.save_manifest(path, manifest)
+
+    assert kb_sync.load_manifest(path) == manifest
+    assert [p.name for p in tmp_path.iterdir()] == ['manifest.json']
+
+
+def test_load_manifest_rejects_other_format(tmp_path, kb_sync):
+    """A manifest of another format version is an error."""
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps({'format_version': 99}), encoding='utf-8')
+
+    with pytest.raises(ValueError, match='Unsupported manifest format'):
+        kb_sync.load_manifest(str(path))
+
+
+def test_plan_sync_classifies_entries(kb_sync):
+    """Entries are added, changed, unchanged or removed against the manifest."""
+    same, edited = make_entry('Same'), make_entry('Edited')
+    manifest = {
+        'entries': {
+            'same': {'hash': kb_sync.entry_hash(same)},
+            'edited': {
+                'hash': kb_sync.entry_hash(make_entry('Edited', 'Old'))
+            },
+            'gone': {'hash': 'x'},
+        }
+    }
+
+    plan = kb_sync.plan_sync([same, edited, make_entry('New')], manifest)
+
+    assert plan.added == ['new']
+    assert plan.changed == ['edited']
+    assert plan.unchanged == ['same']
+    assert plan.removed == ['gone']
+    assert not plan.is_empty
+    assert plan.summary() == '1 added, 1 changed, 1 removed, 1 unchanged'
+
+
+def test_plan_sync_rejects_duplicate_intents(kb_sync):
+    """Two entries with the same intent slug are an error."""
+    with pytest.raises(ValueError, match='Duplicate'):
+        kb_sync.plan_sync(
+            [make_entry('Late Order'), make_entry('late order')],
+            {'entries': {}},
+        )
+
+
+def test_sync_rejects_duplicate_intents(workspace):
+    """Duplicate intents in the source file fail the sync."""
+    workspace.write([make_entry('Late Order'), make_entry('late order')])
+
+    with pytest.raises(ValueError, match='Duplicate'):
+        workspace.sync(dry_run=True)
+
+
+def test_dry_run_publishes_nothing(workspace):
+    """A dry run returns the plan without touching the stores."""
+    workspace.write([make_entry('Late Order')])
+
+    plan = workspace.sync(dry_run=True)
+
+    assert plan.added == ['late-order']
+    assert not workspace.blobs.root.exists()
+    assert not workspace.corpus.root.exists()
+
+
+def test_sync_publishes_only_changes(workspace):
+    """A second sync only replaces changed entries and removes deleted ones."""
+    workspace.write([make_entry('Late Order'), make_entry('Refund')])
+    first = workspace.sync()
+    published = workspace.manifest_json()['entries']
+    old_file = workspace.corpus.root / published['late-order']['rag_file']
+
+    assert first.added == ['late-order', 'refund']
+    assert old_file.exists()
+    assert workspace.sync().is_empty
+
+    workspace.write([make_entry('Late Order', 'Where is my order?')])
+    second = workspace.sync()
+    entries = workspace.manifest_json()['entries']
+    new_file = workspace.corpus.root / entries['late-order']['rag_file']
+
+    assert second.changed == ['late-order']
+    assert second.removed == ['refund']
+    assert list(entries) == ['late-order']
+    assert new_file.exists()
+    assert 'Where is my order?' in new_file.read_text(encoding='utf-8')
+    assert not old_file.exists()
+    assert not (workspace.blobs.root / published['refund']['blob']).exists()
+
+
+def test_new_corpus_republishes_everything(workspace):
+    """Entries are published again when the corpus is recreated."""
+    workspace.write([make_entry('Late Order')])
+    workspace.sync()
+    manifest = workspace.manifest_json()
+    manifest['corpus_name'] = 'corpora/deleted'
+    Path(workspace.manifest).write_text(json.dumps(manifest))
+    workspace.corpus.ensure_corpus = lambda name, corpus: 'corpora/kb'
+
+    plan = workspace.sync()
+
+    assert plan.added == ['late-order']
+
+
+def test_failed_import_keeps_the_published_entry(workspace):
+    """An entry missing from the import result is retried by the next sync."""
+    workspace.write([make_entry('Late Order')])
+    workspace.sync()
+    before = workspace.manifest_json()['entries']['late-order']
+    old_file = workspace.corpus.root / before['rag_file']
+    import_files = workspace.corpus.import_files
+    workspace.corpus.import_files = lambda corpus, uris: {}
+
+    workspace.write([make_entry('Late Order', 'Where is my order?')])
+    failed = workspace.sync()
+
+    assert failed.changed == failed.failed == ['late-order']
+    assert failed.summary().endswith(', 1 failed')
+    assert workspace.manifest_json()['entries']['late-order'] == before
+    assert old_file.exists()
+    assert [path.name for path in workspace.blobs.root.rglob('*.txt')] == [
+        Path(before['blob']).name
+    ]
+
+    workspace.corpus.import_files = import_files
+    retried = workspace.sync()
+
+    assert retried.changed == ['late-order']
+    assert not retried.failed
+    assert not old_file.exists()
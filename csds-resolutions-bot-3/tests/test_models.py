@@ -0,0 +1,180 @@
+"""Unit tests for the per-role model tiers."""
+
+import asyncio
+import math
+from collections.abc import AsyncGenerator
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from utils.models import TieredGenerativeModel, TieredLlm, model_stats
+
+from utils import models
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    """Starts every test with empty model counters."""
+    model_stats.reset()
+    yield
+    model_stats.reset()
+
+
+class FakeModel:
+    """A `GenerativeModel` stand-in with a fixed delay or error."""
+
+    def __init__(self, name: str, delay: float = 0.0, error: bool = False):
+        """Initializes the model."""
+        self.name = name
+        self.delay = delay
+        self.error = error
+
+    def generate_content(self, prompt: str) -> str:
+        """Answers, or fails, synchronously."""
+        if self.error:
+            raise RuntimeError(f'{self.name} is down')
+        return f'{self.name}: {prompt}'
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        """Answers, or fails, after the delay."""
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(f'{self.name} is down')
+        if not stream:
+            return f'{self.name}: {prompt}'
+
+        async def chunks():
+            for chunk in (self.name, prompt):
+                yield chunk
+
+        return chunks()
+
+
+def tiered(*fakes: FakeModel, budget: float | None = None):
+    """Builds a summarizer model over fake tiers."""
+    by_name = {fake.name: fake for fake in fakes}
+    return TieredGenerativeModel(
+        models.SUMMARIZER,
+        list(by_name),
+        budget_seconds=budget,
+        factory=by_name.__getitem__,
+    )
+
+
+def test_model_tiers_default_to_the_base_model(monkeypatch):
+    """Without a role setting the single tier is `GOOGLE_CLOUD_LLM_NAME`."""
+    monkeypatch.setenv('GOOGLE_CLOUD_LLM_NAME', 'base')
+    monkeypatch.delenv('MODEL_ROUTER', raising=False)
+    assert models.model_tiers(models.ROUTER) == ['base']
+
+    monkeypatch.setenv('MODEL_ROUTER', ' pro , flash,,')
+    assert models.model_tiers(models.ROUTER) == ['pro', 'flash']
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected'),
+    [(None, None), ('', None), ('0', None), ('1.5', 1.5)],
+)
+def test_latency_budget(monkeypatch, value, expected):
+    """An unset, empty or zero budget means no budget."""
+    if value is None:
+        monkeypatch.delenv('MODEL_ROUTER_BUDGET_SECONDS', raising=False)
+    else:
+        monkeypatch.setenv('MODEL_ROUTER_BUDGET_SECONDS', value)
+    assert models.latency_budget(models.ROUTER) == expected
+
+
+def test_sync_call_falls_back_on_errors():
+    """A failing tier is recorded and the next tier serves the call."""
+    model = tiered(FakeModel('pro', error=True), FakeModel('flash'))
+
+    assert model.generate_content('hi') == 'flash: hi'
+
+    stats = model_stats.snapshot()[models.SUMMARIZER]
+    assert stats['pro']['errors'] == stats['pro']['fallbacks'] == 1
+    assert stats['flash']['calls'] == 1
+    assert stats['flash']['errors'] == 0
+    assert math.isnan(stats['pro']['p50_ms'])
+
+
+def test_last_tier_error_is_raised():
+    """The error of the last tier reaches the caller."""
+    model = tiered(
+        FakeModel('pro', error=True), FakeModel('flash', error=True)
+    )
+
+    with pytest.raises(RuntimeError, match='flash is down'):
+        model.generate_content('hi')
+    assert model_stats.snapshot()[models.SUMMARIZER]['flash']['fallbacks'] == 0
+
+
+def test_async_call_over_budget_falls_back():
+    """A tier slower than the budget is abandoned for the next one."""
+    model = tiered(FakeModel('pro', delay=1), FakeModel('flash'), budget=0.05)
+
+    assert asyncio.run(model.generate_content_async('hi')) == 'flash: hi'
+    assert model_stats.snapshot()[models.SUMMARIZER]['pro']['errors'] == 1
+
+
+def test_last_tier_has_no_budget():
+    """The last tier may take longer than the budget."""
+    model = tiered(FakeModel('flash', delay=0.1), budget=0.01)
+
+    assert asyncio.run(model.generate_content_async('hi')) == 'flash: hi'
+
+
+def test_stream_budget_covers_the_first_chunk():
+    """A streamed call yields every chunk of the tier that started in time."""
+    model = tiered(FakeModel('pro', delay=1), FakeModel('flash'), budget=0.05)
+
+    async def collect():
+        chunks = await model.generate_content_async('hi', stream=True)
+        return [chunk async for chunk in chunks]
+
+    assert asyncio.run(collect()) == ['flash', 'hi']
+    assert model_stats.snapshot()[models.SUMMARIZER]['flash']['calls'] == 1
+
+
+class FakeLlm(BaseLlm):
+    """An ADK model answering with its name after a delay."""
+
+    delay: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Yields one response naming the model."""
+        await asyncio.sleep(self.delay)
+        yield LlmResponse(
+            content=types.Content(
+                role='model', parts=[types.Part(text=llm_request.model)]
+            )
+        )
+
+
+def test_tiered_llm_falls_back_over_budget():
+    """The ADK model switches tiers when the first response is late."""
+    llm = TieredLlm(
+        model='pro',
+        role=models.CONVERSATION,
+        tiers=['pro', 'flash'],
+        budget_seconds=0.05,
+    )
+    llm._llms.update(
+        pro=FakeLlm(model='pro', delay=1), flash=FakeLlm(model='flash')
+    )
+
+    async def collect():
+        return [
+            response.content.parts[0].text
+            async for response in llm.generate_content_async(
+                LlmRequest(model='pro')
+            )
+        ]
+
+    assert asyncio.run(collect()) == ['flash']
+    stats = model_stats.snapshot()[models.CONVERSATION]
+    assert stats['pro']['fallbacks'] == 1
+    assert stats['flash']['calls'] == 1
@@ -0,0 +1,155 @@
+"""Unit tests for the order store backends."""
+
+import threading
+from datetime import datetime
+
+import pytest
+from tools.order_store import (
+    InMemoryOrderStore,
+    OrderRecord,
+    SQLiteOrderStore,
+    _StripedOrderStore,
+)
+
+
+class FakeClock:
+    """A settable clock."""
+
+    def __init__(self, now: float = 1000.0):
+        """Starts the clock at `now`."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+def record(order_id: str, status: str = 'PROCESSING') -> OrderRecord:
+    """Builds an order record."""
+    return OrderRecord(
+        order_id=order_id,
+        order_timestamp=datetime(2026, 1, 1, 12, 0),
+        status=status,
+        delivery_date=datetime(2026, 1, 6),
+        payment_method='Credit Card',
+        amount='$149.99',
+        sku='DCD778C2',
+    )
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    """Builds a store of each backend."""
+
+    def make(**kwargs):
+        if request.param == 'memory':
+            return InMemoryOrderStore(**kwargs)
+        return SQLiteOrderStore(tmp_path / 'orders.sqlite3', **kwargs)
+
+    return make
+
+
+def test_striped_store_is_abstract():
+    """The shared base cannot be instantiated on its own."""
+    with pytest.raises(TypeError):
+        _StripedOrderStore()
+
+
+def test_put_and_get_round_trip(make_store):
+    """A stored record comes back equal, and unknown orders are None."""
+    store = make_store()
+    store.put(record('WN1001'))
+    assert store.get('WN1001') == record('WN1001')
+    assert store.get('WN9999') is None
+
+
+def test_get_returns_a_copy(make_store):
+    """Mutating a returned record does not change the stored one."""
+    store = make_store()
+    store.put(record('WN1001'))
+    store.get('WN1001').status = 'CANCELLED'
+    assert store.get('WN1001').status == 'PROCESSING'
+
+
+def test_orders_expire_after_the_ttl(make_store):
+    """An order not updated within the TTL is gone."""
+    clock = FakeClock()
+    store = make_store(ttl_seconds=10, clock=clock)
+    store.put(record('WN1001'))
+    clock.now += 9
+    assert store.get('WN1001') is not None
+    clock.now += 1
+    assert store.get('WN1001') is None
+
+
+def test_get_or_create_builds_once(make_store):
+    """The factory only runs for an unknown order."""
+    store = make_store()
+    calls = []
+
+    def factory(order_id):
+        calls.append(order_id)
+        return record(order_id)
+
+    first = store.get_or_create('WN1001', factory)
+    second = store.get_or_create('WN1001', factory)
+    assert first == second
+    assert calls == ['WN1001']
+
+
+def test_lock_is_stable_and_reentrant(make_store):
+    """An order always maps to the same reentrant lock."""
+    store = make_store()
+    lock = store.lock('WN1001')
+    assert store.lock('WN1001') is lock
+    with lock, lock:
+        pass
+
+
+def test_memory_store_evicts_least_recently_used():
+    """Beyond `max_entries`, the least recently read order goes first."""
+    store = InMemoryOrderStore(max_entries=2)
+    store.put_many([record('WN1'), record('WN2')])
+    store.get('WN1')
+    store.put(record('WN3'))
+    assert store.get('WN2') is None
+    assert store.get('WN1') is not None
+    assert store.stats()['evictions'] == 1
+
+
+def test_sqlite_store_evicts_in_maintenance_passes(tmp_path):
+    """Writes may overshoot capacity until the next maintenance pass."""
+    clock = FakeClock()
+    store = SQLiteOrderStore(
+        tmp_path / 'orders.sqlite3',
+        max_entries=3,
+        clock=clock,
+        maintenance_interval=5,
+    )
+    for number in range(4):
+        clock.now += 1
+        store.put(record(f'WN{number}'))
+    assert store.get('WN0') is not None
+    assert store.evictions == 0
+
+    clock.now += 1
+    store.put(record('WN4'))
+    assert store.evictions == 2
+    assert [store.get(f'WN{n}') is None for n in range(5)] == [
+        True,
+        True,
+        False,
+        False,
+        False,
+    ]
+
+
+def test_sqlite_store_is_shared_across_threads_and_instances(tmp_path):
+    """Each thread has its own connection to the same database."""
+    path = tmp_path / 'orders.sqlite3'
+    store = SQLiteOrderStore(path)
+    thread = threading.Thread(target=store.put, args=(record('WN1001'),))
+    thread.start()
+    thread.join()
+    assert store.get('WN1001') == record('WN1001')
+    assert SQLiteOrderStore(path).get('WN1001') == record('WN1001')
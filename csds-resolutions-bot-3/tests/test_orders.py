@@ -0,0 +1,102 @@
+"""Unit tests for the typed order lookups."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from tools import tools
+from tools.order_store import InMemoryOrderStore, OrderRecord, set_order_store
+from tools.orders import lookup_order, lookup_orders, update_order
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def store():
+    """Installs an empty in-memory order store."""
+    store = InMemoryOrderStore()
+    set_order_store(store)
+    yield store
+    set_order_store(None)
+
+
+def record(
+    order_id: str,
+    status: str = 'PROCESSING',
+    age: timedelta = timedelta(minutes=10),
+    sku: str = 'DCD778C2',
+) -> OrderRecord:
+    """Builds an order placed `age` before `NOW`."""
+    return OrderRecord(
+        order_id=order_id,
+        order_timestamp=NOW - age,
+        status=status,
+        delivery_date=NOW + timedelta(days=5),
+        payment_method='Credit Card',
+        amount='$149.99',
+        sku=sku,
+    )
+
+
+def test_recent_processing_order_can_be_cancelled(store):
+    """Within the remorse period a processing order can be cancelled."""
+    store.put(record('WN1001'))
+    order = lookup_order('WN1001', NOW)
+    assert order.in_remorse_period
+    assert order.remorse_minutes_left == 35
+    assert order.can_cancel
+    assert not order.can_return
+    assert order.product.sku == 'DCD778C2'
+
+
+def test_old_or_shipped_orders_cannot_be_cancelled(store):
+    """Past the remorse period or once shipped, only a return is left."""
+    store.put(record('WN1002', age=timedelta(hours=2)))
+    store.put(record('WG1003', status='SHIPPED'))
+    late = lookup_order('WN1002', NOW)
+    assert (late.can_cancel, late.remorse_minutes_left) == (False, 0)
+    shipped = lookup_order('WG1003', NOW)
+    assert (shipped.can_cancel, shipped.can_return) == (False, True)
+
+
+def test_unknown_orders_are_generated_once(store):
+    """An order seen for the first time is generated and then kept."""
+    first = lookup_order('HD77777777')
+    assert store.get('HD77777777') == first.record
+    assert lookup_order('HD77777777').record == first.record
+
+
+def test_lookup_orders_dedupes_in_first_given_order(store):
+    """Repeated IDs are looked up once, in the order first given."""
+    orders = lookup_orders(['WN2', 'WN1', 'WN2'])
+    assert [order.record.order_id for order in orders] == ['WN2', 'WN1']
+
+
+def test_update_order_changes_stored_fields(store):
+    """Updates are written back; unknown orders are ignored."""
+    store.put(record('WN1001'))
+    update_order('WN1001', status='CANCELLED')
+    update_order('WN9999', status='CANCELLED')
+    assert store.get('WN1001').status == 'CANCELLED'
+    assert store.get('WN9999') is None
+
+
+def test_sku_missing_from_the_catalog(store):
+    """An order whose product left the catalog reports only its SKU."""
+    store.put(record('WN1001', sku='GONE1'))
+    order = lookup_order('WN1001', NOW)
+    assert order.product is None
+    assert order.product_name == 'item GONE1'
+    assert order.to_dict()['product'] == {'sku': 'GONE1'}
+
+
+def test_check_orders_status_payload_lists_every_order(store):
+    """The batch tool reports each order in the shape of the single one."""
+    store.put(record('WN1001'))
+    payload = tools.check_orders_status_payload(['WN1001', 'WG1002'])
+    assert [order['order_id'] for order in payload['orders']] == [
+        'WN1001',
+        'WG1002',
+    ]
+    assert payload['orders'][0].keys() == (
+        tools.check_order_status_payload('WN1001').keys()
+    )
@@ -0,0 +1,138 @@
+"""Unit tests for the speculative order lookups."""
+
+import asyncio
+import json
+import types
+
+import pytest
+from google.genai import types as genai_types
+from tools import prefetch
+from tools.order_store import InMemoryOrderStore, set_order_store
+from tools.tools import check_order_status
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    """Installs an empty order store and the default prefetch settings."""
+    for name in (
+        'ORDER_PREFETCH_ENABLED',
+        'ORDER_PREFETCH_PATTERN',
+        'ORDER_PREFETCH_MAX_ORDERS',
+        'TOOL_RESPONSE_MODE',
+    ):
+        monkeypatch.delenv(name, raising=False)
+    set_order_store(InMemoryOrderStore())
+    yield
+    set_order_store(None)
+    prefetch._pending.clear()
+
+
+def callback_context(message: str, invocation_id: str = 'invocation-1'):
+    """Builds the parts of a callback context the callbacks use."""
+    return types.SimpleNamespace(
+        user_content=genai_types.Content(
+            role='user', parts=[genai_types.Part(text=message)]
+        ),
+        invocation_id=invocation_id,
+        state={},
+    )
+
+
+def test_extract_order_ids_matches_every_prefix():
+    """IDs of each prefix are found, upper-cased and deduplicated."""
+    message = 'Orders wn12345, WG2222 and HD98765; again WN12345, not XY1234.'
+
+    assert prefetch.extract_order_ids(message) == [
+        'WN12345',
+        'WG2222',
+        'HD98765',
+    ]
+
+
+def test_extract_order_ids_ignores_short_or_embedded_ids():
+    """Too few digits or an ID inside a word is not an order ID."""
+    assert prefetch.extract_order_ids('WN123 and AWN12345 and WN12345X') == []
+
+
+def test_extract_order_ids_honors_settings(monkeypatch):
+    """The pattern and the most orders per message are configurable."""
+    monkeypatch.setenv('ORDER_PREFETCH_MAX_ORDERS', '2')
+    assert prefetch.extract_order_ids('WN1111 WN2222 WN3333') == [
+        'WN1111',
+        'WN2222',
+    ]
+
+    monkeypatch.setenv('ORDER_PREFETCH_PATTERN', r'\bORD-[0-9]+\b')
+    assert prefetch.extract_order_ids('ord-7 and WN1111') == ['ORD-7']
+
+
+def test_prefetched_status_reaches_the_instructions():
+    """A prefetched lookup is stored and appended for the same turn only."""
+    context = callback_context('Where is WN12345?')
+
+    async def run():
+        prefetch.start_order_prefetch(context)
+        await prefetch.apply_order_prefetch(context)
+
+    asyncio.run(run())
+
+    prefetched = context.state[prefetch.PREFETCH_STATE_KEY]
+    assert prefetched['tool'] == 'check_order_status'
+    assert json.loads(prefetched['response'])['order_id'] == 'WN12345'
+    assert prefetch.prefetched_orders(context).startswith(
+        prefetch.PREFETCHED_ORDERS_HEADER
+    )
+    context.invocation_id = 'invocation-2'
+    assert prefetch.prefetched_orders(context) is None
+
+
+def test_compact_prefetch_leaves_products_unmentioned(monkeypatch):
+    """A later turn's order lookup still sends the full product."""
+    monkeypatch.setenv('TOOL_RESPONSE_MODE', 'compact')
+    context = callback_context('Where is WN12345?')
+
+    async def run():
+        prefetch.start_order_prefetch(context)
+        await prefetch.apply_order_prefetch(context)
+
+    asyncio.run(run())
+    prefetched = json.loads(
+        context.state[prefetch.PREFETCH_STATE_KEY]['response']
+    )
+    later = json.loads(
+        check_order_status(
+            'WN12345', types.SimpleNamespace(state=context.state)
+        )
+    )
+
+    assert 'name' in prefetched['product']
+    assert later['product'] == prefetched['product']
+
+
+def test_several_orders_use_the_batch_tool():
+    """Several order IDs are looked up with one batch call."""
+    context = callback_context('Compare WN12345 with HD54321.')
+
+    async def run():
+        prefetch.start_order_prefetch(context)
+        await prefetch.apply_order_prefetch(context)
+
+    asyncio.run(run())
+
+    assert context.state[prefetch.PREFETCH_STATE_KEY]['tool'] == (
+        'check_orders_status'
+    )
+
+
+def test_no_prefetch_without_order_ids_or_when_disabled(monkeypatch):
+    """Nothing starts for messages without IDs or with prefetch disabled."""
+
+    async def run(message: str):
+        context = callback_context(message)
+        prefetch.start_order_prefetch(context)
+        await prefetch.apply_order_prefetch(context)
+        return context.state
+
+    assert asyncio.run(run('Where is my order?')) == {}
+    monkeypatch.setenv('ORDER_PREFETCH_ENABLED', 'false')
+    assert asyncio.run(run('Where is WN12345?')) == {}
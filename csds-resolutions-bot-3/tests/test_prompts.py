@@ -0,0 +1,107 @@
+"""Unit tests for the prompt registry."""
+
+import os
+
+import pytest
+from utils.prompts import (
+    PROVEN_STEPS_HEADER,
+    PromptRegistry,
+    PromptTemplate,
+    instruction_provider,
+)
+
+from utils import prompts
+
+
+class FakeClock:
+    """A settable monotonic clock."""
+
+    def __init__(self):
+        """Starts the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+def rewrite(path, text: str) -> None:
+    """Rewrites a file and moves its modification time forward."""
+    mtime_ns = path.stat().st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+
+@pytest.fixture
+def prompt(tmp_path):
+    """An instruction file."""
+    path = tmp_path / 'instructions.md'
+    path.write_text('Be helpful.')
+    return path
+
+
+def test_reloads_only_after_the_interval(prompt):
+    """A changed file is picked up at the next check, not before."""
+    clock = FakeClock()
+    template = PromptTemplate(prompt, reload_interval=2, clock=clock)
+    assert template.text == 'Be helpful.'
+    rewrite(prompt, 'Be brief.')
+    clock.now = 1
+    assert template.text == 'Be helpful.'
+    clock.now = 2
+    assert template.text == 'Be brief.'
+    assert template.reloads == 2
+
+
+def test_negative_interval_never_reloads(prompt):
+    """With reloading disabled the first read is kept."""
+    clock = FakeClock()
+    template = PromptTemplate(prompt, reload_interval=-1, clock=clock)
+    assert template.text == 'Be helpful.'
+    rewrite(prompt, 'Be brief.')
+    clock.now = 100
+    assert template.text == 'Be helpful.'
+
+
+def test_deleted_file_keeps_the_cached_prompt(prompt):
+    """A file that disappears keeps serving its last text."""
+    clock = FakeClock()
+    template = PromptTemplate(prompt, reload_interval=0, clock=clock)
+    assert template.text == 'Be helpful.'
+    prompt.unlink()
+    clock.now = 1
+    assert template.text == 'Be helpful.'
+
+
+def test_with_proven_steps(prompt):
+    """Steps are appended under their heading, and only if present."""
+    template = PromptTemplate(prompt)
+    assert template.with_proven_steps(None) == 'Be helpful.'
+    assert template.with_proven_steps('Step 1.') == (
+        f'Be helpful.{PROVEN_STEPS_HEADER}Step 1.'
+    )
+
+
+def test_registry_shares_templates(tmp_path, prompt):
+    """Each name maps to one template relative to the root."""
+    registry = PromptRegistry(tmp_path)
+    template = registry.get('instructions.md')
+    assert registry.get('instructions.md') is template
+    assert template.path == prompt
+    assert registry.templates() == [template]
+
+
+def test_instruction_provider(tmp_path, prompt, monkeypatch):
+    """The provider serves the prompt with its steps and appendix."""
+    monkeypatch.setattr(prompts, 'prompt_registry', PromptRegistry(tmp_path))
+    plain = instruction_provider('instructions.md')
+    full = instruction_provider(
+        'instructions.md',
+        steps=lambda context: context['steps'],
+        appendix=lambda context: '\n\nAppendix',
+    )
+    assert plain({}) == 'Be helpful.'
+    assert full({'steps': 'Step 1.'}) == (
+        f'Be helpful.{PROVEN_STEPS_HEADER}Step 1.\n\nAppendix'
+    )
+    assert full({'steps': None}) == 'Be helpful.\n\nAppendix'
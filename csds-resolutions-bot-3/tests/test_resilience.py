@@ -0,0 +1,248 @@
+"""Unit tests for retries, hedging and circuit breaking."""
+
+import asyncio
+import itertools
+import threading
+import time
+import types
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+from utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCall,
+    RetryPolicy,
+)
+
+from utils import resilience
+
+
+class FakeClock:
+    """A settable monotonic clock."""
+
+    def __init__(self):
+        """Starts the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    """Drives the circuit breaker's clock."""
+    clock = FakeClock()
+    monkeypatch.setattr(
+        resilience, 'time', types.SimpleNamespace(monotonic=clock)
+    )
+    return clock
+
+
+class Flaky:
+    """A remote call failing a given number of times before answering."""
+
+    def __init__(self, failures: int, error: Exception | None = None):
+        """Initializes the call."""
+        self.failures = failures
+        self.error = error or ConnectionError('reset')
+        self.calls = 0
+
+    def __call__(self, value: str) -> str:
+        """Fails, then echoes the value."""
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return value
+
+
+def policy(max_attempts: int = 3, failures: int = 5) -> ResilientCall:
+    """Builds a policy without backoff or hedging."""
+    return ResilientCall(
+        'test',
+        retry=RetryPolicy(max_attempts=max_attempts, base_delay=0),
+        breaker=CircuitBreaker(failure_threshold=failures),
+        hedge=False,
+    )
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    """Failures open the circuit only when consecutive."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_lets_one_trial_through(clock):
+    """After the reset timeout one trial call decides the state."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit(clock):
+    """A failed trial opens the circuit for another reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 19
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize(
+    ('error', 'transient'),
+    [
+        (ConnectionError(), True),
+        (TimeoutError(), True),
+        (api_exceptions.ServiceUnavailable('down'), True),
+        (api_exceptions.TooManyRequests('slow down'), True),
+        (api_exceptions.InvalidArgument('bad'), False),
+        (CircuitOpenError(), False),
+    ],
+)
+def test_is_transient(error, transient):
+    """Only client errors other than rate limiting are not retried."""
+    assert resilience.is_transient(error) is transient
+
+
+def test_backoff_is_capped_and_jittered():
+    """Backoffs grow exponentially up to the cap, with full jitter."""
+    retry = RetryPolicy(base_delay=0.1, max_delay=0.3)
+    for attempt, ceiling in zip(itertools.count(1), (0.1, 0.2, 0.3, 0.3)):
+        delays = [retry.backoff(attempt) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+
+
+def test_call_retries_transient_errors():
+    """Transient failures are retried until an attempt succeeds."""
+    flaky = Flaky(failures=2)
+
+    assert policy().call(flaky, 'ok') == 'ok'
+    assert flaky.calls == 3
+
+
+def test_call_raises_after_the_last_attempt():
+    """The error of the last attempt reaches the caller."""
+    flaky = Flaky(failures=5)
+
+    with pytest.raises(ConnectionError):
+        policy(max_attempts=2).call(flaky, 'ok')
+    assert flaky.calls == 2
+
+
+def test_call_does_not_retry_client_errors():
+    """A client error fails the call on the first attempt."""
+    flaky = Flaky(failures=1, error=api_exceptions.InvalidArgument('bad'))
+
+    with pytest.raises(api_exceptions.InvalidArgument):
+        policy().call(flaky, 'ok')
+    assert flaky.calls == 1
+
+
+def test_client_errors_do_not_open_the_circuit():
+    """Only transient failures count towards opening the circuit."""
+    call = policy(failures=1)
+    flaky = Flaky(failures=2, error=api_exceptions.InvalidArgument('bad'))
+    for _ in range(2):
+        with pytest.raises(api_exceptions.InvalidArgument):
+            call.call(flaky, 'ok')
+
+    assert call.breaker.state == CircuitBreaker.CLOSED
+    assert call.call(flaky, 'ok') == 'ok'
+
+
+def test_open_circuit_fails_fast():
+    """Once open, the circuit rejects calls without attempting them."""
+    call = policy(max_attempts=2, failures=2)
+    flaky = Flaky(failures=10)
+    with pytest.raises(ConnectionError):
+        call.call(flaky, 'ok')
+
+    with pytest.raises(CircuitOpenError):
+        call.call(flaky, 'ok')
+    assert flaky.calls == 2
+
+
+def test_call_times_out():
+    """A call slower than its timeout raises `TimeoutError`."""
+    with pytest.raises(TimeoutError):
+        policy(max_attempts=1).call(time.sleep, 0.5, timeout=0.05)
+
+
+def test_slow_attempt_is_hedged():
+    """An attempt slower than the usual latency gets a duplicate."""
+    call = ResilientCall('test', min_hedge_delay=0.01)
+    for _ in range(resilience._MIN_HEDGE_SAMPLES):
+        call.latencies.record(0.01)
+    lock = threading.Lock()
+    calls = []
+
+    def first_is_slow() -> int:
+        with lock:
+            calls.append(None)
+            number = len(calls)
+        if number == 1:
+            time.sleep(0.5)
+        return number
+
+    start = time.monotonic()
+    assert call.call(first_is_slow) == 2
+    assert time.monotonic() - start < 0.5
+
+
+def test_call_async_retries_and_hedges():
+    """The async call retries failures and hedges slow attempts."""
+    call = ResilientCall(
+        'test', retry=RetryPolicy(base_delay=0), min_hedge_delay=0.01
+    )
+    for _ in range(resilience._MIN_HEDGE_SAMPLES):
+        call.latencies.record(0.01)
+    calls = []
+
+    async def remote() -> int:
+        calls.append(None)
+        number = len(calls)
+        if number == 1:
+            raise ConnectionError('reset')
+        if number == 2:
+            await asyncio.sleep(0.5)
+        return number
+
+    assert asyncio.run(call.call_async(remote, timeout=1)) == 3
+
+
+def test_resilient_call_reads_the_environment(monkeypatch):
+    """The policy of a dependency comes from its prefixed settings."""
+    monkeypatch.setenv('RAG_MAX_ATTEMPTS', '4')
+    monkeypatch.setenv('RAG_RETRY_BASE_SECONDS', '0.5')
+    monkeypatch.setenv('RAG_HEDGE', 'false')
+    monkeypatch.setenv('RAG_BREAKER_FAILURES', '7')
+    monkeypatch.setenv('RAG_BREAKER_RESET_SECONDS', '60')
+
+    call = resilience.resilient_call('rag')
+
+    assert call.retry == RetryPolicy(max_attempts=4, base_delay=0.5)
+    assert not call.hedge
+    assert call.breaker.failure_threshold == 7
+    assert call.breaker.reset_timeout == 60
@@ -0,0 +1,80 @@
+"""Unit tests for the in-process vector retriever."""
+
+import numpy as np
+from tools.embeddings import HashingEmbedder, normalize_rows, tokenize
+from tools.knowledge_base import load_knowledge_base
+from tools.retrievers import LocalVectorRetriever, whole_entry_contexts
+
+ENTRIES = [
+    {
+        'intent': 'Cancel Order',
+        'customer_motivation': 'The customer wants to cancel an order.',
+        'resolution_goals': 'Cancel the order.',
+        'resolution_guide': 'Step 1. Check the order status.',
+    },
+    {
+        'intent': 'Return Item',
+        'customer_motivation': 'The customer wants to return a delivered '
+        'item for a refund.',
+        'resolution_goals': 'Start the return.',
+        'resolution_guide': 'Step 1. Check the item was delivered.',
+    },
+    {
+        'intent': 'Account Security',
+        'customer_motivation': 'The customer sees unauthorized access to '
+        'their account.',
+        'resolution_goals': 'Secure the account.',
+        'resolution_guide': 'Step 1. Reset the password.',
+    },
+]
+
+
+def test_tokenize_drops_stop_words():
+    """Tokens are lowercase words without stop words."""
+    assert tokenize('I want to CANCEL the order') == [
+        'want',
+        'cancel',
+        'order',
+    ]
+
+
+def test_normalize_rows_keeps_zero_rows():
+    """Rows get unit norm; all-zero rows stay zero."""
+    normalized = normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    np.testing.assert_allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_hashing_embedder_is_deterministic():
+    """The same text embeds to the same unit vector in every instance."""
+    texts = ['cancel my order', 'return a drill']
+    first = HashingEmbedder(dimension=64).embed(texts)
+    second = HashingEmbedder(dimension=64).embed(texts)
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1.0, rtol=1e-6)
+
+
+def test_retrieve_orders_closest_first():
+    """The entry sharing the query's words comes first, with its intent."""
+    retriever = LocalVectorRetriever(ENTRIES)
+    contexts = retriever.retrieve('return a delivered item for a refund')
+    assert [context.intent for context in contexts][0] == 'Return Item'
+    distances = [context.distance for context in contexts]
+    assert distances == sorted(distances)
+    assert len(contexts) == 3
+
+
+def test_retrieve_caps_top_k_and_threshold():
+    """`top_k` caps the results and distant entries are dropped."""
+    retriever = LocalVectorRetriever(ENTRIES, vector_distance_threshold=0.9)
+    assert len(retriever.retrieve('cancel order', top_k=10)) <= len(ENTRIES)
+    contexts = retriever.retrieve('cancel order')
+    assert [context.intent for context in contexts] == ['Cancel Order']
+    assert retriever.retrieve('cancel order', top_k=0) == []
+
+
+def test_whole_entry_contexts_keeps_one_context_per_intent():
+    """Later contexts of an intent already seen are dropped."""
+    retriever = LocalVectorRetriever(load_knowledge_base())
+    first, second = retriever.context(0, 0.1), retriever.context(1, 0.2)
+    repeat = retriever.context(0, 0.3)
+    assert whole_entry_contexts([first, second, repeat]) == [first, second]
@@ -0,0 +1,98 @@
+"""Unit tests for the optional warm-up."""
+
+import threading
+
+import pytest
+from google.adk.agents import LlmAgent, SequentialAgent
+from tools import startup
+from utils.models import TieredLlm
+
+
+def agent_tree() -> SequentialAgent:
+    """Builds a pipeline with one tiered and one plain model agent."""
+    return SequentialAgent(
+        name='pipeline',
+        sub_agents=[
+            LlmAgent(
+                name='tiered',
+                model=TieredLlm(
+                    model='pro', role='conversation', tiers=['pro']
+                ),
+            ),
+            LlmAgent(name='plain', model='gemini-2.5-flash'),
+        ],
+    )
+
+
+def test_steps_cover_every_tiered_model(monkeypatch):
+    """Each agent with a tiered model gets its own warm-up step."""
+    monkeypatch.delenv('INTENT_ROUTER_ENABLED', raising=False)
+
+    names = [name for name, _ in startup.warm_up_steps(agent_tree())]
+
+    assert names[0] == 'prompts'
+    assert 'model.summarizer' in names
+    assert 'model.tiered' in names
+    assert 'model.plain' not in names
+    assert 'intent_router' not in names
+
+
+def test_router_step_follows_its_setting(monkeypatch):
+    """The intent classifier is warmed up only when the router is on."""
+    monkeypatch.setenv('INTENT_ROUTER_ENABLED', 'true')
+
+    names = [name for name, _ in startup.warm_up_steps(agent_tree())]
+
+    assert 'intent_router' in names
+
+
+def test_failing_step_does_not_stop_the_warm_up(monkeypatch):
+    """A failed step is logged and the remaining steps still run."""
+    ran = []
+
+    def fail():
+        raise RuntimeError('no credentials')
+
+    monkeypatch.setattr(
+        startup,
+        'warm_up_steps',
+        lambda root_agent: [('broken', fail), ('ok', lambda: ran.append(1))],
+    )
+
+    timings = startup.warm_up(agent_tree())
+
+    assert list(timings) == ['broken', 'ok']
+    assert ran == [1]
+
+
+@pytest.mark.parametrize('mode', ['none', 'blocking', 'background'])
+def test_start_warm_up_modes(monkeypatch, mode):
+    """The warm-up runs inline, on a thread or not at all."""
+    done = threading.Event()
+    threads = []
+
+    def warm_up(root_agent):
+        threads.append(threading.current_thread())
+        done.set()
+
+    monkeypatch.setattr(startup, 'warm_up', warm_up)
+    monkeypatch.setenv('STARTUP_WARM_UP', mode)
+
+    startup.start_warm_up(agent_tree())
+
+    if mode == 'none':
+        assert not done.is_set()
+        return
+    assert done.wait(5)
+    if mode == 'blocking':
+        assert threads == [threading.current_thread()]
+    else:
+        assert threads[0].name == 'warm-up'
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    """A misspelled mode is an error rather than a silent cold start."""
+    monkeypatch.setenv('STARTUP_WARM_UP', 'eager')
+
+    with pytest.raises(ValueError, match='STARTUP_WARM_UP'):
+        startup.start_warm_up(agent_tree())
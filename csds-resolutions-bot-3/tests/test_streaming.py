@@ -0,0 +1,89 @@
+"""Unit tests for streamed instruction summaries."""
+
+import asyncio
+import types
+
+import pytest
+from tools.streaming import (
+    get_instruction_stream,
+    start_instruction_stream,
+    usable_prefix,
+)
+
+
+class FakeStreamingModel:
+    """Streams fixed chunks, optionally failing after them."""
+
+    def __init__(self, chunks, error=None, delay=0.0):
+        """Initializes the model with the chunks it streams."""
+        self.chunks = chunks
+        self.error = error
+        self.delay = delay
+
+    async def generate_content_async(self, prompt, stream=False):
+        """Returns an async iterator over the chunks."""
+
+        async def chunks():
+            for text in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield types.SimpleNamespace(text=text)
+            if self.error:
+                raise self.error
+
+        return chunks()
+
+
+def test_usable_prefix_stops_at_the_last_line_break():
+    """Only complete lines count, and only once long enough."""
+    assert usable_prefix('Step 1. Check\nStep 2. Ca', 5) == 'Step 1. Check'
+    assert usable_prefix('Step 1. Check\nStep 2. Ca', 50) is None
+    assert usable_prefix('no line break yet', 1) is None
+
+
+def test_wait_for_prefix_returns_before_the_stream_ends():
+    """The consumer is released on the first usable prefix."""
+
+    async def run():
+        model = FakeStreamingModel(
+            ['Step 1. Look up the order.\n', 'Step 2. ', 'Cancel it.\n'],
+            delay=0.05,
+        )
+        stream = start_instruction_stream(model, 'prompt')
+        prefix = await stream.wait_for_prefix(min_chars=10, timeout=1)
+        assert not stream.done
+        await stream.task
+        return prefix, stream
+
+    prefix, stream = asyncio.run(run())
+    assert prefix == 'Step 1. Look up the order.'
+    assert stream.text == 'Step 1. Look up the order.\nStep 2. Cancel it.'
+    assert get_instruction_stream(stream.stream_id) is stream
+
+
+def test_completed_stream_calls_on_complete_once():
+    """The full text is handed over once the stream ends cleanly."""
+    completed = []
+
+    async def run():
+        stream = start_instruction_stream(
+            FakeStreamingModel(['Short']), 'prompt', completed.append
+        )
+        text = await stream.wait_for_prefix(min_chars=100, timeout=1)
+        await stream.task
+        return text
+
+    assert asyncio.run(run()) == 'Short'
+    assert completed == ['Short']
+
+
+def test_failed_stream_without_text_raises():
+    """An error before any text reaches the consumer."""
+
+    async def run():
+        stream = start_instruction_stream(
+            FakeStreamingModel([], error=ValueError('boom')), 'prompt'
+        )
+        await stream.wait_for_prefix(min_chars=1, timeout=1)
+
+    with pytest.raises(RuntimeError, match='boom'):
+        asyncio.run(run())
@@ -0,0 +1,165 @@
+"""Unit tests for the deterministic synthetic orders and their hashing."""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+from tools.catalog import ProductCatalog
+from tools.hashing import fnv1a_64, fnv1a_64_one, splitmix64
+from tools.order_store import InMemoryOrderStore
+from tools.synthetic_orders import (
+    OrderProfile,
+    SyntheticOrderGenerator,
+    preload_orders,
+)
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+CATALOG = """sku,name,price,category
+DRILL1,Cordless Drill,$149.99,Power Tools
+SAW2,Circular Saw,$99.00,Power Tools
+LAMP3,Desk Lamp,$24.50,Lighting
+"""
+
+
+@pytest.fixture
+def catalog(tmp_path) -> ProductCatalog:
+    """A three-product catalog indexed in a temp directory."""
+    source = tmp_path / 'catalog.csv'
+    source.write_text(CATALOG, encoding='utf-8')
+    return ProductCatalog.open(source, tmp_path / 'index')
+
+
+@pytest.mark.parametrize(
+    ('text', 'expected'),
+    [
+        ('', 0xCBF29CE484222325),
+        ('a', 0xAF63DC4C8601EC8C),
+        ('foobar', 0x85944171F73967E8),
+    ],
+)
+def test_fnv1a_64_known_vectors(text, expected):
+    """The hashes match the published FNV-1a test vectors."""
+    assert int(fnv1a_64([text])[0]) == expected
+    assert fnv1a_64_one(text) == expected
+
+
+def test_fnv1a_64_does_not_depend_on_the_batch():
+    """A string hashes the same alone, in bulk or one at a time."""
+    texts = ['WN00000001', 'a', 'é', 'a much longer order identifier', '']
+
+    bulk = fnv1a_64(texts)
+
+    assert bulk.dtype == np.uint64
+    assert [int(value) for value in bulk] == [
+        int(fnv1a_64([text])[0]) for text in texts
+    ]
+    assert [int(value) for value in bulk] == [fnv1a_64_one(t) for t in texts]
+    assert fnv1a_64([]).shape == (0,)
+
+
+def test_splitmix64_streams_are_deterministic_and_distinct():
+    """Each stream is reproducible and unrelated to the others."""
+    hashes = fnv1a_64(['WN1', 'WN2', 'WN3'])
+
+    first = splitmix64(hashes, 0)
+
+    assert np.array_equal(first, splitmix64(hashes, 0))
+    assert not np.isin(first, splitmix64(hashes, 1)).any()
+    assert int(splitmix64(np.zeros(1, dtype=np.uint64), 0)[0]) == (
+        0xE220A8397B1DCDAF
+    )
+
+
+def test_orders_do_not_depend_on_the_batch(catalog):
+    """An order is the same generated alone or in a batch."""
+    generator = SyntheticOrderGenerator(
+        catalog, OrderProfile(status_weights={'DELIVERED': 1, 'SHIPPED': 1})
+    )
+    order_ids = [f'XY{number:05d}' for number in range(50)]
+
+    batch = generator.records(order_ids, NOW)
+
+    assert batch == [
+        generator.generate(order_id, NOW) for order_id in order_ids
+    ]
+    assert {record.status for record in batch} == {'DELIVERED', 'SHIPPED'}
+    assert {record.sku for record in batch} <= {'DRILL1', 'SAW2', 'LAMP3'}
+
+
+def test_seed_changes_the_orders(catalog):
+    """Another seed draws other orders from the same IDs."""
+    order_ids = [f'XY{number:05d}' for number in range(50)]
+    profile = OrderProfile(status_weights={'DELIVERED': 1, 'SHIPPED': 1})
+
+    first = SyntheticOrderGenerator(catalog, profile).records(order_ids, NOW)
+    again = SyntheticOrderGenerator(catalog, profile).records(order_ids, NOW)
+    reseeded = SyntheticOrderGenerator(
+        catalog, OrderProfile(seed=1, status_weights=profile.status_weights)
+    ).records(order_ids, NOW)
+
+    assert first == again
+    assert first != reseeded
+
+
+def test_prefixes_and_categories_constrain_the_draws(catalog):
+    """Status prefixes and category weights are honored."""
+    generator = SyntheticOrderGenerator(
+        catalog, OrderProfile(category_weights={'Lighting': 1})
+    )
+
+    processing, shipped = generator.records(['WN00001', 'WG00002'], NOW)
+
+    assert (processing.status, shipped.status) == ('PROCESSING', 'SHIPPED')
+    assert processing.sku == shipped.sku == 'LAMP3'
+    assert processing.amount == '$24.50'
+
+
+def test_batches_cycle_through_the_prefixes(catalog):
+    """Sequential IDs use the prefixes in turn and fill a store."""
+    generator = SyntheticOrderGenerator(catalog)
+    batches = list(generator.batches(5, batch_size=2, start=3, digits=4))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [record.order_id for batch in batches for record in batch] == [
+        'WN0003',
+        'WG0004',
+        'HD0005',
+        'WN0006',
+        'WG0007',
+    ]
+
+    store = InMemoryOrderStore()
+    assert preload_orders(store, generator, 7, batch_size=3, now=NOW) == 7
+    assert store.get('HD00000005') == generator.generate('HD00000005', NOW)
+
+
+def test_profile_from_environment(monkeypatch):
+    """The `SYNTHETIC_ORDER_*` variables configure the profile."""
+    monkeypatch.setenv('SYNTHETIC_ORDER_SEED', '7')
+    monkeypatch.setenv(
+        'SYNTHETIC_ORDER_STATUS_WEIGHTS', 'DELIVERED=3,SHIPPED=1'
+    )
+    monkeypatch.setenv('SYNTHETIC_ORDER_AGE_MINUTES', 'SHIPPED=10-20')
+    monkeypatch.setenv('SYNTHETIC_ORDER_CATEGORY_WEIGHTS', 'Lighting=1')
+
+    profile = OrderProfile.from_env()
+
+    assert profile.seed == 7
+    assert profile.status_weights == {'DELIVERED': 3.0, 'SHIPPED': 1.0}
+    assert profile.age_minutes['SHIPPED'] == (10, 20)
+    assert profile.category_weights == {'Lighting': 1.0}
+
+
+@pytest.mark.parametrize(
+    'profile',
+    [
+        OrderProfile(status_weights={'LOST': 1}),
+        OrderProfile(category_weights={'Garden': 1}),
+        OrderProfile(status_weights={'DELIVERED': 0}),
+    ],
+)
+def test_invalid_profiles_are_rejected(catalog, profile):
+    """Unknown statuses, empty categories and zero weights are errors."""
+    with pytest.raises(ValueError):
+        SyntheticOrderGenerator(catalog, profile)
@@ -0,0 +1,136 @@
+"""Unit tests for span tracing."""
+
+import json
+import types
+
+import pytest
+from utils.tracing import (
+    FileSpanExporter,
+    MemorySpanExporter,
+    NoopSpanExporter,
+    annotate,
+    end_agent_span,
+    set_exporter,
+    span,
+    start_agent_span,
+)
+
+from utils import tracing
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Installs an in-memory exporter tracing every invocation."""
+    monkeypatch.delenv('TRACE_SAMPLE_RATE', raising=False)
+    exporter = MemorySpanExporter()
+    set_exporter(exporter)
+    yield exporter
+    set_exporter(None)
+
+
+def test_spans_nest_and_share_the_invocation(exporter):
+    """A span opened inside another records it as its parent."""
+    with (
+        span('outer', 'invocation-1', query_chars=3) as outer,
+        span('inner') as inner,
+    ):
+        annotate(contexts=2)
+    assert [s.name for s in exporter.spans] == ['inner', 'outer']
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id == 'invocation-1'
+    assert inner.attributes == {'contexts': 2}
+    assert outer.attributes == {'query_chars': 3}
+    assert outer.duration_ms >= inner.duration_ms >= 0
+
+
+def test_errors_are_recorded_and_reraised(exporter):
+    """An exception ends the span with its type and propagates."""
+    with pytest.raises(ValueError), span('failing'):
+        raise ValueError('boom')
+    assert exporter.spans[0].attributes == {'error': 'ValueError'}
+
+
+def test_annotate_without_a_span_is_a_noop(exporter):
+    """Attributes outside any span are dropped."""
+    annotate(ignored=True)
+    assert not exporter.spans
+
+
+def test_sampling_is_decided_per_invocation(exporter, monkeypatch):
+    """Every span of an invocation is traced, or none is."""
+    monkeypatch.setenv('TRACE_SAMPLE_RATE', '0.5')
+    sampled = set()
+    for number in range(200):
+        with (
+            span('outer', f'invocation-{number}') as outer,
+            span('inner') as inner,
+        ):
+            assert inner.sampled == outer.sampled
+        sampled.add(outer.sampled)
+        with span('outer', f'invocation-{number}') as again:
+            assert again.sampled == outer.sampled
+    assert sampled == {True, False}
+
+
+def test_noop_exporter_samples_nothing():
+    """With tracing off, spans keep no attributes."""
+    set_exporter(NoopSpanExporter())
+    try:
+        with span('outer', answer=42) as outer:
+            outer.set(more=1)
+        assert not outer.sampled
+        assert outer.attributes == {}
+    finally:
+        set_exporter(None)
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    """Each finished span is one JSON line."""
+    path = tmp_path / 'traces.jsonl'
+    set_exporter(FileSpanExporter(str(path)))
+    try:
+        with span('outer', 'invocation-1'), span('inner', size=1):
+            pass
+    finally:
+        set_exporter(None)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['name'] for line in lines] == ['inner', 'outer']
+    assert lines[0]['attributes'] == {'size': 1}
+    assert lines[0]['parent_id'] == lines[1]['span_id']
+
+
+def test_agent_spans_span_callbacks(exporter):
+    """An agent span started in one callback is the parent until ended."""
+    context = types.SimpleNamespace(
+        invocation_id='invocation-1',
+        agent_name='order_agent',
+        state=types.SimpleNamespace(to_dict=lambda: {'a': 1}),
+    )
+    agent = start_agent_span(context)
+    with span('tool.check_order_status') as tool:
+        pass
+    end_agent_span(context, skipped=False)
+    end_agent_span(context)
+    assert tool.parent_id == agent.span_id
+    assert agent.attributes == {'state_keys': 1, 'skipped': False}
+    assert [s.name for s in exporter.spans] == [
+        'tool.check_order_status',
+        'agent.order_agent',
+    ]
+    assert tracing._current_span.get() is None
+
+
+def test_unsampled_agent_spans_do_not_copy_the_state():
+    """Without tracing, entering an agent leaves the state untouched."""
+
+    def to_dict():
+        raise AssertionError('the state was copied')
+
+    context = types.SimpleNamespace(
+        invocation_id='invocation-1',
+        agent_name='order_agent',
+        state=types.SimpleNamespace(to_dict=to_dict),
+    )
+    agent = start_agent_span(context)
+    end_agent_span(context)
+    assert not agent.sampled
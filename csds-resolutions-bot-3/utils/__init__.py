@@ -1,22 +1,21 @@
 """Utility functions for the resolutions agent."""
 
-import requests
+from .http_client import (
+    get_session,
+    is_unauthorized,
+    schema_cache,
+    token_cache,
+    token_url,
+)
 
 
 def get_token(client_id, client_secret, scope):
-    """Get an OAuth2 token using client credentials."""
-    resp = requests.post(
-        # TODO externalize this
-        'https://identity.service.homedepot.dev/oauth2/v1/token',
-        data={
-            'grant_type': 'client_credentials',
-            'client_id': client_id,
-            'client_secret': client_secret,
-            'scope': scope,
-        },
-    )
-    resp.raise_for_status()
-    return resp.json()['access_token']
+    """Get an OAuth2 token using client credentials.
+
+    Tokens are cached until shortly before they expire, so repeated calls
+    only reach the identity service (`IDENTITY_TOKEN_URL`) when needed.
+    """
+    return token_cache.get(token_url(), client_id, client_secret, scope)
 
 
 def read_instructions_from_file(filepath):
@@ -26,8 +25,26 @@ def read_instructions_from_file(filepath):
 
 
 def get_openapi_schema(url, client_id, client_secret, scope):
-    """Get OpenAPI schema from a URL using OAuth2 client credentials."""
-    token = get_token(client_id, client_secret, scope)
-    return requests.get(
-        url, headers={'Authorization': f'Bearer {token}'}
-    ).json()
+    """Get OpenAPI schema from a URL using OAuth2 client credentials.
+
+    Schemas are cached on disk and revalidated with their ETag. A rejected
+    token is renewed once.
+    """
+    for attempt in range(2):
+        token = get_token(client_id, client_secret, scope)
+        try:
+            return schema_cache.get(
+                url, headers={'Authorization': f'Bearer {token}'}
+            )
+        except Exception as e:
+            if attempt or not is_unauthorized(e):
+                raise
+            token_cache.invalidate(token_url(), client_id, scope)
+
+
+__all__ = [
+    'get_openapi_schema',
+    'get_session',
+    'get_token',
+    'read_instructions_from_file',
+]
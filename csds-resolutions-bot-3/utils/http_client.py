@@ -0,0 +1,283 @@
+"""Shared HTTP client for OpenAPI-backed tools.
+
+Provides one pooled keep-alive session per process, client-credentials
+tokens cached until shortly before they expire, and OpenAPI schemas cached
+on disk and revalidated with their ETag.
+
+Configuration:
+    IDENTITY_TOKEN_URL: The OAuth2 token endpoint.
+    HTTP_POOL_MAXSIZE: Keep-alive connections kept per host.
+    HTTP_CONNECT_TIMEOUT_SECONDS: The connect timeout of every request.
+    HTTP_READ_TIMEOUT_SECONDS: The read timeout of every request.
+    TOKEN_REFRESH_MARGIN_SECONDS: How long before expiry a token is renewed.
+    OPENAPI_CACHE_DIR: Where schemas are cached.
+    OPENAPI_CACHE_MAX_AGE_SECONDS: How long a cached schema is used without
+        revalidation.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TOKEN_URL = 'https://identity.service.homedepot.dev/oauth2/v1/token'
+
+DEFAULT_OPENAPI_CACHE_DIR = (
+    Path.home() / '.cache' / 'resolutions_agent' / 'openapi'
+)
+
+
+def token_url():
+    """Returns the OAuth2 token endpoint (`IDENTITY_TOKEN_URL`)."""
+    return os.environ.get('IDENTITY_TOKEN_URL', DEFAULT_TOKEN_URL)
+
+
+def request_timeout():
+    """Returns the (connect, read) timeout of every request in seconds."""
+    return (
+        float(os.environ.get('HTTP_CONNECT_TIMEOUT_SECONDS', 3)),
+        float(os.environ.get('HTTP_READ_TIMEOUT_SECONDS', 10)),
+    )
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the process-wide pooled session, creating it on first use.
+
+    Connections are kept alive and reused across calls and threads. Failed
+    connections and gateway errors are retried with backoff; other errors
+    are left to the caller.
+
+    Returns:
+        requests.Session: The session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+                retry = Retry(
+                    total=2,
+                    backoff_factor=0.2,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=None,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class TokenCache:
+    """Thread-safe cache of client-credentials tokens.
+
+    A token is reused until `refresh_margin` seconds before its
+    `expires_in`. Concurrent callers needing the same expired token wait
+    for a single request to the identity service.
+    """
+
+    def __init__(self, refresh_margin=60.0):
+        """Initializes an empty cache.
+
+        Args:
+            refresh_margin (float): Seconds before expiry a token is
+                renewed.
+        """
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._tokens = {}
+
+    def get(self, url, client_id, client_secret, scope):
+        """Returns a valid token, requesting a new one if needed.
+
+        Args:
+            url (str): The token endpoint.
+            client_id (str): The client ID.
+            client_secret (str): The client secret.
+            scope (str): The requested scope.
+
+        Returns:
+            str: The access token.
+        """
+        key = (url, client_id, scope)
+        token = self._valid(key)
+        if token is not None:
+            return token
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            token = self._valid(key)
+            if token is not None:
+                return token
+            resp = get_session().post(
+                url,
+                data={
+                    'grant_type': 'client_credentials',
+                    'client_id': client_id,
+                    'client_secret': client_secret,
+                    'scope': scope,
+                },
+                timeout=request_timeout(),
+            )
+            resp.raise_for_status()
+            body = resp.json()
+            expires_in = float(body.get('expires_in', 0))
+            expires_at = time.monotonic() + max(
+                0.0, expires_in - self.refresh_margin
+            )
+            with self._lock:
+                self._tokens[key] = (body['access_token'], expires_at)
+            return body['access_token']
+
+    def invalidate(self, url, client_id, scope):
+        """Drops a token, for example after the API rejected it.
+
+        Args:
+            url (str): The token endpoint.
+            client_id (str): The client ID.
+            scope (str): The scope of the token.
+        """
+        with self._lock:
+            self._tokens.pop((url, client_id, scope), None)
+
+    def _valid(self, key):
+        """Returns the cached token of a key if it is not about to expire."""
+        with self._lock:
+            cached = self._tokens.get(key)
+        if cached is None or time.monotonic() >= cached[1]:
+            return None
+        return cached[0]
+
+
+token_cache = TokenCache(
+    refresh_margin=float(os.environ.get('TOKEN_REFRESH_MARGIN_SECONDS', 60))
+)
+
+
+def is_unauthorized(error):
+    """Returns whether a request failed because its token was rejected."""
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code == 401
+
+
+class OpenApiSchemaCache:
+    """On-disk cache of OpenAPI schemas revalidated with their ETag.
+
+    A schema younger than `max_age` is served from memory or disk without a
+    request. An older one is revalidated with `If-None-Match`, so an
+    unchanged schema costs a 304 response instead of a download. If
+    revalidation fails, the cached schema is served.
+    """
+
+    def __init__(self, directory, max_age=300.0):
+        """Initializes the cache.
+
+        Args:
+            directory (str | Path): Where schemas are written.
+            max_age (float): Seconds a schema is used without revalidation.
+        """
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _path(self, url):
+        """Returns the cache file of a schema URL."""
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        return self.directory / f'{digest}.json'
+
+    def _load(self, url):
+        """Returns the cached entry of a URL from memory or disk."""
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._path(url), encoding='utf-8') as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def _save(self, url, entry):
+        """Writes an entry to memory and, atomically, to disk."""
+        with self._lock:
+            self._entries[url] = entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(url)
+        temp_path = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(temp_path, path)
+
+    def get(self, url, headers=None):
+        """Returns a schema, downloading or revalidating it if needed.
+
+        Args:
+            url (str): The schema URL.
+            headers (dict | None): Headers of the request, such as
+                `Authorization`.
+
+        Returns:
+            dict: The schema.
+        """
+        entry = self._load(url)
+        if entry is not None and time.time() - entry['fetched_at'] < (
+            self.max_age
+        ):
+            return entry['schema']
+
+        headers = dict(headers or {})
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        try:
+            resp = get_session().get(
+                url, headers=headers, timeout=request_timeout()
+            )
+            if resp.status_code == 304 and entry is not None:
+                entry = {**entry, 'fetched_at': time.time()}
+                self._save(url, entry)
+                return entry['schema']
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            # A rejected token is the caller's to renew.
+            if entry is None or is_unauthorized(e):
+                raise
+            print(f'Serving cached OpenAPI schema of {url}: {e}')
+            return entry['schema']
+
+        entry = {
+            'url': url,
+            'etag': resp.headers.get('ETag'),
+            'fetched_at': time.time(),
+            'schema': resp.json(),
+        }
+        self._save(url, entry)
+        return entry['schema']
+
+
+schema_cache = OpenApiSchemaCache(
+    os.environ.get('OPENAPI_CACHE_DIR', DEFAULT_OPENAPI_CACHE_DIR),
+    max_age=float(os.environ.get('OPENAPI_CACHE_MAX_AGE_SECONDS', 300)),
+)